@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Startup time benchmark for the TikTok to YouTube Shorts Automation System
+
+Launches the GUI several times with T2Y_EXIT_AFTER_STARTUP set, so the
+application quits as soon as the main window is shown, and reports the wall
+clock time of each run together with the startup time logged by main.py.
+
+Usage:
+    python benchmark_startup.py [--runs N] [--imports]
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+STARTUP_PATTERN = re.compile(r"Application startup complete in (\d+) ms")
+
+def run_once(extra_args=None):
+    """
+    Start the application once and wait for it to exit.
+    
+    Args:
+        extra_args: Additional interpreter options (optional)
+    
+    Returns:
+        tuple: (wall time in ms, startup time logged by the app in ms or None, stderr output)
+    """
+    env = dict(os.environ, T2Y_EXIT_AFTER_STARTUP="1")
+    # Offscreen rendering lets the benchmark run without a display
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    
+    command = [sys.executable] + (extra_args or []) + [MAIN_SCRIPT]
+    started = time.perf_counter()
+    result = subprocess.run(
+        command,
+        cwd=os.path.dirname(MAIN_SCRIPT),
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=False
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    
+    if result.returncode != 0:
+        raise RuntimeError(f"Application exited with code {result.returncode}:\n{result.stderr}")
+    
+    match = STARTUP_PATTERN.search(result.stderr)
+    return wall_ms, int(match.group(1)) if match else None, result.stderr
+
+def report_imports(stderr, top=15):
+    """
+    Print the slowest imports from ``-X importtime`` output.
+    
+    Args:
+        stderr: Standard error of a run with ``-X importtime``
+        top: Number of imports to show
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        imports.append((int(cumulative), name))
+    
+    print("\nSlowest imports (cumulative):")
+    for cumulative, name in sorted(imports, reverse=True)[:top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description="Measure application startup time")
+    parser.add_argument("--runs", type=int, default=5, help="Number of timed runs")
+    parser.add_argument("--imports", action="store_true", help="Also report the slowest imports")
+    args = parser.parse_args()
+    
+    wall_times = []
+    startup_times = []
+    for run in range(1, args.runs + 1):
+        wall_ms, startup_ms, _ = run_once()
+        wall_times.append(wall_ms)
+        if startup_ms is not None:
+            startup_times.append(startup_ms)
+        print(f"Run {run}: {wall_ms:.0f} ms wall, {startup_ms if startup_ms is not None else '?'} ms to window")
+    
+    print(f"\nWall time:   min {min(wall_times):.0f} ms, median {statistics.median(wall_times):.0f} ms")
+    if startup_times:
+        print(f"Window time: min {min(startup_times)} ms, median {statistics.median(startup_times):.0f} ms")
+    
+    if args.imports:
+        _, _, stderr = run_once(["-X", "importtime"])
+        report_imports(stderr)
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,123 @@
 import json
 import os
+import re
+import copy
+import atexit
+import tempfile
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
+class ConfigError(ValueError):
+    """Raised when configuration values fail validation"""
+    
+    def __init__(self, problems):
+        """
+        Initialize the error.
+        
+        Args:
+            problems: List of messages, one per invalid value
+        """
+        super().__init__("Invalid configuration:\n" + "\n".join(problems))
+        self.problems = problems
+
+def _number(kind, minimum=None, maximum=None):
+    """Validator for an int or float setting within an optional range"""
+    def validate(value):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"expected a number, got {value!r}")
+        if kind is int and value != int(value):
+            raise ValueError(f"expected a whole number, got {value!r}")
+        if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+            raise ValueError(f"{value!r} is outside {minimum}..{maximum if maximum is not None else ''}")
+        return kind(value)
+    return validate
+
+def _flag(value):
+    """Validator for a boolean setting"""
+    if not isinstance(value, bool):
+        raise ValueError(f"expected true or false, got {value!r}")
+    return value
+
+def _text(pattern=None):
+    """Validator for a non-empty string setting, optionally matching a pattern"""
+    def validate(value):
+        if not isinstance(value, str) or not value:
+            raise ValueError(f"expected a non-empty string, got {value!r}")
+        if pattern and not re.fullmatch(pattern, value):
+            raise ValueError(f"{value!r} is not in the expected format")
+        return value
+    return validate
+
 class Config:
-    """Configuration manager for the application"""
+    """
+    Configuration manager for the application
+    
+    Changes are copy-on-write: ``set`` replaces the dictionaries along the
+    changed path instead of modifying them, so a tree obtained from ``get`` or
+    ``snapshot`` is never changed underneath a reader in another thread. Treat
+    returned dictionaries as read-only and change values through ``set``.
+    
+    Saving is debounced: ``config.json`` is written once changes have stopped
+    for ``SAVE_DELAY`` seconds, through a temporary file that is renamed over
+    the old one, and pending changes are flushed when the process exits.
+    """
+    
+    # Seconds to wait for further changes before writing config.json
+    SAVE_DELAY = 0.5
+    
+    # Validators for settings whose values are checked when the configuration is
+    # loaded or changed; each returns the value converted to its proper type
+    SCHEMA = {
+        "ffmpeg_path": _text(),
+        "videos_dir": _text(),
+        "output_dir": _text(),
+        "watermarks_dir": _text(),
+        "processing.color_saturation": _number(float, 0.0, 3.0),
+        "processing.brightness": _number(float, 0.0, 2.0),
+        "processing.zoom_pulse": _number(float, 1.0, 2.0),
+        "processing.denoise_strength": _number(int, 0, 10),
+        "processing.sharpness": _number(float, 0.0, 5.0),
+        "processing.watermark_opacity": _number(float, 0.0, 1.0),
+        "processing.speed_randomization": _number(float, 0.0, 1.0),
+        "processing.zoom_factor": _number(float, 1.0, 2.0),
+        "processing.pixel_shift": _number(int, 0, 100),
+        "processing.audio_normalization": _flag,
+        "processing.crf": _number(int, 0, 51),
+        "processing.bitrate": _text(r"\d+(\.\d+)?[kKmM]?"),
+        "processing.threads": _number(int, 0, 256),
+        "processing.video_encoder": _text(),
+        "processing.segment_parallel": _flag,
+        "processing.segment_min_duration": _number(float, 0),
+        "processing.segment_duration": _number(float, 1),
+        "processing.segment_workers": _number(int, 0),
+        "render_cache.enabled": _flag,
+        "render_cache.max_size_mb": _number(int, 0),
+        "watcher.enabled": _flag,
+        "watcher.use_native": _flag,
+        "watcher.poll_interval": _number(float, 0.1),
+        "watcher.settle_seconds": _number(float, 0),
+        "watcher.auto_enqueue": _flag,
+        "upload.base_url": _text(r"https?://.+"),
+        "upload.chunk_size_mb": _number(float, 0.25),
+        "upload.max_retries": _number(int, 0),
+        "upload.timeout": _number(float, 1),
+        "upload.workers": _number(int, 1, 32),
+        "upload.per_channel": _number(int, 1),
+        "upload.max_bandwidth_mbps": _number(float, 0),
+        "upload.max_attempts": _number(int, 1),
+        "upload.daily_quota": _number(int, 0),
+        "upload.quota_cost": _number(int, 0),
+        "upload.prestage_minutes": _number(float, 0),
+        "upload.stream_while_encoding": _flag,
+        "metadata.category_id": _number(int, 1),
+        "metadata.related_tags": _number(int, 0),
+        "thumbnail.smart_selection": _flag,
+        "thumbnail.sample_fps": _number(float, 0, 30),
+        "daemon.poll_interval": _number(float, 0.1),
+        "scheduler.deadline_window_minutes": _number(float, 0),
+        "scheduler.default_weight": _number(float, 0.01)
+    }
     
     # Default configuration with sensible presets
     DEFAULT_CONFIG = {
@@ -31,7 +145,67 @@ class Config:
             "audio_normalization": True, # Professional audio normalization
             "crf": 23,                  # Quality (lower is better, 18-28 typical range)
             "bitrate": "2M",            # Video bitrate
-            "threads": 4                # Multi-threading support
+            "threads": 4,               # Multi-threading support
+            "video_encoder": "auto",    # H.264 encoder, "auto" picks the fastest working one
+            
+            # Segment-parallel encoding for long inputs
+            "segment_parallel": False,  # Split, encode segments in parallel, then concat
+            "segment_min_duration": 120, # Only for videos at least this long (seconds)
+            "segment_duration": 30,     # Target segment length (seconds)
+            "segment_workers": 0        # Parallel FFmpeg processes (0 = one per CPU core)
+        },
+        "render_cache": {
+            "enabled": True,            # Reuse identical renders instead of re-encoding
+            "directory": "./output/.render_cache",
+            "max_size_mb": 5120         # Disk budget before LRU eviction
+        },
+        "toolchain": {
+            "cache_file": "./toolchain_cache.json" # Probed FFmpeg/yt-dlp capabilities
+        },
+        "watcher": {
+            "enabled": True,            # Pick up files dropped into videos_dir automatically
+            "use_native": True,         # Use OS file notifications when watchdog is installed
+            "poll_interval": 2,         # Seconds between checks (and polls without watchdog)
+            "settle_seconds": 2,        # Size must be stable this long before a file is ingested
+            "auto_enqueue": False,      # Queue ingested videos for processing
+            "channel_id": ""            # Channel to process auto-queued videos for
+        },
+        "upload": {
+            "base_url": "https://www.googleapis.com", # YouTube API host (or a local stand-in)
+            "chunk_size_mb": 8,         # Data sent per request, rounded to 256 KiB
+            "max_retries": 8,           # Retries with exponential backoff per request
+            "timeout": 60,              # Seconds before a request is considered lost
+            "workers": 3,               # Uploads running at the same time
+            "per_channel": 1,           # Uploads running at the same time per channel
+            "max_bandwidth_mbps": 0,    # Total upload rate limit in Mbit/s (0 = unlimited)
+            "max_attempts": 3,          # Attempts per video before it is marked failed
+            "daily_quota": 10000,       # API units per quota project and day
+            "quota_cost": 1600,         # API units used by starting an upload
+            "prestage_minutes": 180,    # Start scheduled uploads this long before they go public
+            "stream_while_encoding": False # Upload processed videos while they are being encoded (daemon)
+        },
+        "metadata": {
+            "templates": {              # Placeholders: {title} {original_title} {hashtags} {tags} {channel} {date}
+                "title": "{title}",
+                "description": "{title}\n\n{hashtags} #Shorts"
+            },
+            "default_tags": ["shorts"], # Added to every video's tags
+            "related_tags": 3,          # Tags often used with the video's hashtags to add
+            "category_id": 24,          # YouTube category (24 = Entertainment)
+            "rules": []                 # {"match": regex, "tags": [...], "hashtags": [...], "category_id": n}
+        },
+        "thumbnail": {
+            "smart_selection": True,    # Score candidate frames for the thumbnail (needs NumPy)
+            "sample_fps": 0             # Candidates per second (0 = keyframes only, fastest)
+        },
+        "daemon": {
+            "services": ["download", "processing", "metadata", "upload"],
+            "poll_interval": 5,         # Seconds between checks for new work
+            "privacy_status": "private" # Privacy of metadata created by the daemon
+        },
+        "scheduler": {
+            "deadline_window_minutes": 180, # Render clips due this soon earliest-deadline-first
+            "default_weight": 1         # Fair-share weight of channels without their own
         },
         "channels": {},  # Will store channel-specific settings
         "telegram": {
@@ -42,10 +216,35 @@ class Config:
         }
     }
     
-    def __init__(self, config_file="config.json"):
-        """Initialize the configuration manager"""
+    def __init__(self, config_file="config.json", save_delay=None):
+        """
+        Initialize the configuration manager
+        
+        Args:
+            config_file: Path to the JSON configuration file
+            save_delay: Seconds to debounce saves by (defaults to SAVE_DELAY, 0 saves immediately)
+        """
         self.config_file = config_file
-        self.config = self.load_config()
+        self.save_delay = self.SAVE_DELAY if save_delay is None else save_delay
+        
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._save_timer = None
+        
+        # Uncommitted tree of the transaction in progress, and the thread running it
+        self._transaction_depth = 0
+        self._transaction_config = None
+        self._transaction_thread = None
+        
+        # Resolved get() results for the current tree, and change subscribers
+        self._get_cache = (None, {})
+        self._processing_cache = (None, None)
+        self._subscribers = []
+        
+        self.config = self._validate(self.load_config())
+        
+        # Don't lose a debounced save when the application exits
+        atexit.register(self.flush)
     
     def load_config(self):
         """Load configuration from file or create default"""
@@ -55,83 +254,313 @@ class Config:
                     return json.load(f)
             except Exception as e:
                 print(f"Error loading config: {e}")
-                return self.DEFAULT_CONFIG.copy()
+                return copy.deepcopy(self.DEFAULT_CONFIG)
         else:
             # Create default config
-            config = self.DEFAULT_CONFIG.copy()
+            config = copy.deepcopy(self.DEFAULT_CONFIG)
             self.save_config(config)
             return config
     
     def save_config(self, config=None):
-        """Save current configuration to file"""
-        if config is None:
-            config = self.config
+        """Save current configuration to file now, without waiting for the debounce"""
+        with self._lock:
+            if config is None:
+                config = self.config
+                self._cancel_save()
+                self._dirty = False
+            self._write(config)
+    
+    def flush(self):
+        """Write pending changes to file, if there are any"""
+        with self._lock:
+            if self._dirty:
+                self.save_config()
+    
+    def snapshot(self):
+        """
+        Get the whole configuration as a consistent, read-only tree.
+        
+        Returns:
+            dict: Configuration as of the last committed change
+        """
+        return self._current()
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Group several changes into one atomic update and one save.
+        
+        Other threads keep seeing the previous configuration until the outermost
+        transaction ends. If the block raises, its changes are discarded.
+        
+        Example:
+            with config.transaction():
+                config.set("processing.crf", 20)
+                config.set("processing.bitrate", "4M")
+        """
+        old_config = new_config = None
+        with self._lock:
+            if self._transaction_depth == 0:
+                self._transaction_config = self.config
+                self._transaction_thread = threading.get_ident()
+            self._transaction_depth += 1
             
-        try:
-            with open(self.config_file, 'w') as f:
-                json.dump(config, f, indent=4)
-            print(f"Configuration saved to {self.config_file}")
-        except Exception as e:
-            print(f"Error saving config: {e}")
+            committed = False
+            try:
+                yield self
+                committed = True
+            finally:
+                self._transaction_depth -= 1
+                if self._transaction_depth == 0:
+                    config = self._transaction_config
+                    self._transaction_config = None
+                    self._transaction_thread = None
+                    if committed and config is not self.config:
+                        old_config, new_config = self.config, config
+                        self._publish(config)
+        
+        if new_config is not None:
+            self._notify(old_config, new_config)
     
     def get(self, key, default=None):
         """Get configuration value by key
         
         Supports dot notation for nested keys, e.g. 'processing.color_saturation'
         """
-        keys = key.split('.')
-        value = self.config
+        tree = self._current()
         
-        for k in keys:
-            if isinstance(value, dict) and k in value:
-                value = value[k]
-            else:
-                return default
-                
-        return value
+        # Values are cached per tree, which is replaced rather than modified
+        cache_tree, cache = self._get_cache
+        if cache_tree is not tree:
+            if tree is not self.config:
+                return _lookup(tree, key, default)  # Inside a transaction
+            cache = {}
+            self._get_cache = (tree, cache)
+        
+        value = cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = cache[key] = _lookup(tree, key, _MISSING)
+        return default if value is _MISSING else value
     
     def set(self, key, value):
         """Set configuration value by key
         
         Supports dot notation for nested keys, e.g. 'processing.color_saturation'
+        
+        Raises:
+            ConfigError: If the new value fails validation
         """
-        keys = key.split('.')
-        config = self.config
+        with self._lock:
+            if _lookup(self._current(), key, _MISSING) == value:
+                return  # Nothing to change or save
+            
+            old_config = self.config
+            new_config = self._validate(_with_value(self._current(), _split_key(key), value))
+            self._update(new_config)
+            published = self.config is new_config
         
-        # Navigate to the correct level
-        for i, k in enumerate(keys[:-1]):
-            if k not in config:
-                config[k] = {}
-            config = config[k]
+        if published:
+            self._notify(old_config, new_config)
+    
+    def subscribe(self, key, callback):
+        """
+        Call a function whenever a setting changes.
         
-        # Set the value
-        config[keys[-1]] = value
+        The callback receives the new value (None if it was removed). It runs on
+        the thread that made the change, after the change is visible, so GUI code
+        should hand it over to the GUI thread.
         
-        # Save the updated config
-        self.save_config()
+        Args:
+            key: Dotted key of the setting or section to watch
+            callback: Function taking the new value
+        """
+        with self._lock:
+            self._subscribers.append((key, callback))
+    
+    def unsubscribe(self, key, callback):
+        """Stop calling a function subscribed with subscribe()"""
+        with self._lock:
+            self._subscribers = [
+                entry for entry in self._subscribers if entry != (key, callback)
+            ]
+    
+    def processing_settings(self):
+        """
+        Get the processing settings with defaults filled in.
+        
+        Values have been validated and converted to their proper types. The
+        result is built once per change of the processing section.
         
+        Returns:
+            dict: Processing settings (read-only)
+        """
+        processing = self.get("processing")
+        cached_processing, settings = self._processing_cache
+        if cached_processing is not processing or settings is None:
+            settings = dict(self.DEFAULT_CONFIG["processing"])
+            settings.update(processing or {})
+            self._processing_cache = (processing, settings)
+        return settings
+    
     def add_channel(self, channel_id, channel_name, watermark_path=None):
         """Add a YouTube channel to the configuration"""
-        if "channels" not in self.config:
-            self.config["channels"] = {}
-            
-        self.config["channels"][channel_id] = {
+        self.set(f"channels.{channel_id}", {
             "name": channel_name,
             "watermark": watermark_path,
+            "weight": 1,  # Share of processing time relative to other channels
             "upload_schedule": {
                 "enabled": False,
                 "time": "12:00",
                 "days": ["Monday", "Wednesday", "Friday"]
             }
-        }
+        })
         
-        self.save_config()
         print(f"Added channel: {channel_name}")
-        
+    
     def remove_channel(self, channel_id):
         """Remove a YouTube channel from the configuration"""
-        if "channels" in self.config and channel_id in self.config["channels"]:
-            channel_name = self.config["channels"][channel_id]["name"]
-            del self.config["channels"][channel_id]
-            self.save_config()
-            print(f"Removed channel: {channel_name}") 
+        with self._lock:
+            channels = self.get("channels", {})
+            if channel_id in channels:
+                channel_name = channels[channel_id]["name"]
+                self.set("channels", {cid: info for cid, info in channels.items() if cid != channel_id})
+                print(f"Removed channel: {channel_name}")
+    
+    def _current(self):
+        """The tree the calling thread should read (call without holding the lock)"""
+        if self._transaction_thread == threading.get_ident():
+            return self._transaction_config
+        return self.config
+    
+    def _validate(self, config):
+        """
+        Check every value covered by SCHEMA.
+        
+        Args:
+            config: Configuration tree
+        
+        Returns:
+            dict: The tree with values converted to their types (a new tree if any changed)
+        
+        Raises:
+            ConfigError: If any value is invalid
+        """
+        problems = []
+        for key, validate in self.SCHEMA.items():
+            value = _lookup(config, key, _MISSING)
+            if value is _MISSING:
+                continue
+            try:
+                converted = validate(value)
+            except ValueError as e:
+                problems.append(f"{key}: {e}")
+                continue
+            if type(converted) is not type(value):
+                config = _with_value(config, _split_key(key), converted)
+        
+        if problems:
+            raise ConfigError(problems)
+        return config
+    
+    def _notify(self, old_config, new_config):
+        """Call the subscribers whose settings differ between two trees"""
+        for key, callback in list(self._subscribers):
+            old_value = _lookup(old_config, key, None)
+            new_value = _lookup(new_config, key, None)
+            # Unchanged sections are shared between trees, so most checks are identity checks
+            if old_value is new_value or old_value == new_value:
+                continue
+            try:
+                callback(new_value)
+            except Exception as e:
+                print(f"Error in config change handler for {key}: {e}")
+    
+    def _update(self, config):
+        """Replace the configuration tree, inside the transaction if one is open"""
+        if self._transaction_depth:
+            self._transaction_config = config
+        else:
+            self._publish(config)
+    
+    def _publish(self, config):
+        """Make a new tree visible to all threads and schedule a save"""
+        self.config = config
+        self._dirty = True
+        
+        self._cancel_save()
+        if self.save_delay <= 0:
+            self.flush()
+        else:
+            self._save_timer = threading.Timer(self.save_delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def _cancel_save(self):
+        """Cancel a scheduled save"""
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+    
+    def _write(self, config):
+        """Write a configuration to file atomically"""
+        directory = os.path.dirname(os.path.abspath(self.config_file))
+        temp_path = None
+        try:
+            # Write next to the target so the rename stays on one filesystem
+            fd, temp_path = tempfile.mkstemp(prefix=".config-", suffix=".tmp", dir=directory)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(config, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.config_file)
+            temp_path = None
+            print(f"Configuration saved to {self.config_file}")
+        except Exception as e:
+            print(f"Error saving config: {e}")
+        finally:
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+# Marks keys that aren't present, since None is a valid setting
+_MISSING = object()
+
+_split_cache = {}
+
+def _split_key(key):
+    """Split a dotted key into its parts, reusing earlier results"""
+    keys = _split_cache.get(key)
+    if keys is None:
+        keys = _split_cache[key] = tuple(key.split('.'))
+    return keys
+
+def _lookup(tree, key, default):
+    """Resolve a dotted key in a configuration tree"""
+    value = tree
+    for k in _split_key(key):
+        if isinstance(value, dict) and k in value:
+            value = value[k]
+        else:
+            return default
+    return value
+
+def _with_value(tree, keys, value):
+    """
+    Copy a configuration tree with one nested value replaced.
+    
+    Only the dictionaries along the path are copied; everything else is shared
+    with the original tree, which is left unchanged.
+    
+    Args:
+        tree: Configuration tree (or None)
+        keys: Path of keys to the value
+        value: New value
+    
+    Returns:
+        dict: The new tree
+    """
+    new_tree = dict(tree) if isinstance(tree, dict) else {}
+    if len(keys) == 1:
+        new_tree[keys[0]] = value
+    else:
+        new_tree[keys[0]] = _with_value(new_tree.get(keys[0]), keys[1:], value)
+    return new_tree
@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+TikTok to YouTube Shorts Automation System
+Headless daemon entry point
+
+Runs the pipeline stages as background services without a GUI, against the
+same configuration and database as the desktop application, and provides a
+small command line interface to manage the processing queue:
+    
+    python daemon.py run [--services download processing metadata upload]
+    python daemon.py enqueue VIDEO [VIDEO ...] [--channel ID] [--priority N]
+    python daemon.py status [--all]
+    python daemon.py cancel VIDEO_ID [VIDEO_ID ...]
+"""
+
+import sys
+import os
+import signal
+import logging
+import argparse
+import threading
+from datetime import datetime
+
+# Internal imports (no Qt, so this runs on machines without a display)
+from config import Config, ConfigError
+from database.db_manager import DatabaseManager
+from downloader.library import VideoLibrary
+from downloader.folder_watcher import FolderWatcher
+from processor.ffmpeg_handler import FFmpegHandler
+from processor.process_runner import ProcessingCancelled
+from processor.scheduler import ProcessingScheduler
+from metadata.generator import MetadataGenerator
+from metadata.tag_index import TagIndex
+from uploader.youtube_uploader import UploadError, UploadCancelled
+from uploader.scheduler import UploadScheduler
+from uploader.dispatcher import PublishDispatcher
+from uploader.streaming import StreamingUpload
+
+# Create a named logger for the daemon
+logger = logging.getLogger("TikTok2YouTube.daemon")
+
+def setup_logging():
+    """Log to daemon.log and the console"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler("daemon.log"),
+            logging.StreamHandler()
+        ]
+    )
+
+class Service:
+    """
+    Base class for a pipeline stage running in a background thread.
+    
+    Subclasses implement tick(), which is called every poll interval until the
+    service is stopped. Errors are logged and don't stop the service.
+    """
+    
+    name = "service"
+    
+    def __init__(self, config, db):
+        """
+        Initialize the service.
+        
+        Args:
+            config: Application configuration manager
+            db: Database manager shared by all services
+        """
+        self.config = config
+        self.db = db
+        self.stop_event = threading.Event()
+        self._thread = None
+    
+    @property
+    def interval(self):
+        """Seconds between ticks"""
+        return self.config.get("daemon.poll_interval", 5)
+    
+    def start(self):
+        """Start the service thread"""
+        self.stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+        logger.info(f"Started {self.name} service")
+    
+    def stop(self):
+        """Ask the service to stop"""
+        self.stop_event.set()
+    
+    def join(self, timeout=None):
+        """Wait for the service thread to finish"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+    
+    def tick(self):
+        """Do one round of work"""
+        raise NotImplementedError
+    
+    def _loop(self):
+        """Service thread: tick until stopped"""
+        while not self.stop_event.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                logger.exception(f"Error in {self.name} service: {e}")
+            self.stop_event.wait(self.interval)
+        logger.info(f"Stopped {self.name} service")
+
+class DownloadService(Service):
+    """
+    Ingests videos arriving in the videos directory.
+    
+    Downloads themselves happen outside the daemon (Telegram bot, yt-dlp or
+    other tools writing into videos_dir); this service registers the finished
+    files in the database and optionally queues them for processing.
+    """
+    
+    name = "download"
+    
+    def __init__(self, config, db):
+        super().__init__(config, db)
+        self.library = VideoLibrary(config, db)
+        self.watcher = FolderWatcher(config, self.library)
+    
+    def start(self):
+        """Reconcile the library with the directory, then watch it"""
+        self.library.sync(force=True)
+        self.watcher.start()
+        logger.info(f"Started {self.name} service")
+    
+    def stop(self):
+        """Stop watching the videos directory"""
+        self.watcher.stop()
+        logger.info(f"Stopped {self.name} service")
+    
+    def tick(self):
+        """The folder watcher does the work on its own thread"""
+
+class ProcessingService(Service):
+    """
+    Processes queued videos one at a time, in scheduler order.
+    
+    Jobs can be cancelled from another process through the database; the
+    running FFmpeg process is stopped when the request is seen.
+    """
+    
+    name = "processing"
+    
+    # Seconds between checks for a cancel request while a job runs
+    CANCEL_CHECK_INTERVAL = 1
+    
+    def __init__(self, config, db):
+        super().__init__(config, db)
+        self.ffmpeg = FFmpegHandler(config, db)
+        self.scheduler = ProcessingScheduler(config, db)
+        self.streaming = StreamingUpload(config, db, self.ffmpeg)
+        self.generator = MetadataGenerator(config, TagIndex(db))
+        self._cancel_event = None
+    
+    def start(self):
+        """Requeue jobs interrupted by a crash before starting"""
+        for output_path in self.db.recover_interrupted_processing():
+            self.ffmpeg.discard_partial_output(output_path)
+        super().start()
+    
+    def stop(self):
+        """Stop after interrupting the running job, which goes back in the queue"""
+        super().stop()
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+    
+    def tick(self):
+        """Process queued videos until the queue is empty"""
+        while not self.stop_event.is_set():
+            queued = [
+                {"id": row["video_id"], "channel_id": row["channel_id"] or "", "priority": row["priority"] or 0,
+                 "filepath": row["filepath"], "title": row["title"], "filename": row["filename"],
+                 "hashtags": row["hashtags"]}
+                for row in self.db.get_processing_queue()
+                if row["status"] == "queued"
+            ]
+            item = self.scheduler.next_item(queued)
+            if item is None:
+                return
+            self._process(item)
+    
+    def _process(self, item):
+        """Run one processing job"""
+        video_id = item["id"]
+        output_path = self.ffmpeg.make_output_path(item["filepath"])
+        if not self.db.start_processing(video_id, output_path):
+            return  # Cancelled or claimed by another worker in the meantime
+        self.scheduler.started(item)
+        
+        logger.info(f"Processing video {video_id}: {item['filepath']}")
+        
+        self._cancel_event = threading.Event()
+        job_done = threading.Event()
+        threading.Thread(
+            target=self._watch_cancel,
+            args=(video_id, self._cancel_event, job_done),
+            daemon=True
+        ).start()
+        
+        try:
+            uploaded = None
+            if self.streaming.can_stream(item["channel_id"] or None):
+                uploaded = self._process_streaming(item, output_path)
+            else:
+                self.ffmpeg.process_video(
+                    item["filepath"],
+                    item["channel_id"] or None,
+                    video_id=video_id,
+                    output_path=output_path,
+                    cancel_event=self._cancel_event
+                )
+            if uploaded:
+                # Recorded as uploaded first, so the metadata and upload stages never pick it up
+                metadata, result = uploaded
+                youtube_url = f"https://youtube.com/shorts/{result['id']}"
+                self.db.record_upload(video_id, result["id"], youtube_url)
+                self.db.add_processing_info(video_id, output_path, self.config.get("processing", {}),
+                                            update_status=False)
+                self.db.add_metadata_bulk([metadata], update_status=False)
+                logger.info(f"Processed and uploaded video {video_id}: {youtube_url}")
+            else:
+                self.db.add_processing_info(video_id, output_path, self.config.get("processing", {}))
+                logger.info(f"Processed video {video_id}: {output_path}")
+        except ProcessingCancelled:
+            if self.stop_event.is_set():
+                # Shutting down: leave the job for the next run
+                self.db.requeue_processing(video_id)
+                logger.info(f"Requeued video {video_id} for the next run")
+            else:
+                self.db.record_processing_cancelled(video_id)
+                logger.info(f"Cancelled processing of video {video_id}")
+        except Exception as e:
+            self.db.record_processing_failure(video_id, str(e))
+            logger.error(f"Processing video {video_id} failed: {e}")
+        finally:
+            job_done.set()
+            self._cancel_event = None
+    
+    def _process_streaming(self, item, output_path):
+        """
+        Process a video while uploading it.
+        
+        Returns:
+            tuple: (metadata entry, uploaded video resource), or None if the upload
+                   failed and the video should go through the normal stages
+        """
+        metadata = self.generator.generate_batch(
+            [item], privacy_status=self.config.get("daemon.privacy_status", "private")
+        )[0]
+        
+        try:
+            result = self.streaming.process_and_upload(
+                item["filepath"],
+                output_path,
+                {
+                    "title": metadata["title"],
+                    "description": metadata["description"],
+                    "tags": metadata["tags"].split(","),
+                    "category_id": metadata["category_id"],
+                    "privacy_status": metadata["privacy_status"]
+                },
+                channel_id=item["channel_id"],
+                video_id=item["id"],
+                cancel_event=self._cancel_event
+            )
+        except (UploadError, UploadCancelled) as e:
+            logger.warning(f"Streaming upload of video {item['id']} failed, it will be uploaded normally: {e}")
+            return None
+        return metadata, result
+    
+    def _watch_cancel(self, video_id, cancel_event, job_done):
+        """Turn a cancel request stored in the database into the job's cancel event"""
+        while not job_done.wait(self.CANCEL_CHECK_INTERVAL):
+            if self.db.is_processing_cancel_requested(video_id):
+                cancel_event.set()
+                return
+
+class MetadataService(Service):
+    """Generates metadata for processed videos so they can move on to upload"""
+    
+    name = "metadata"
+    
+    def __init__(self, config, db):
+        super().__init__(config, db)
+        self.generator = MetadataGenerator(config, TagIndex(db))
+    
+    def tick(self):
+        """Create metadata for processed videos that don't have any"""
+        videos = self.db.get_videos_by_status("processed")
+        if not videos:
+            return
+        
+        entries = self.generator.generate_batch(
+            videos, privacy_status=self.config.get("daemon.privacy_status", "private")
+        )
+        self.db.add_metadata_bulk(entries)
+        logger.info(f"Created metadata for {len(entries)} videos")
+
+class UploadService(Service):
+    """
+    Uploads videos whose metadata is ready.
+    
+    Videos are handed to an UploadScheduler, which uploads several at once
+    within the per-channel, bandwidth and API quota limits. Videos of channels
+    with an enabled ``upload_schedule`` are given the next free slot instead,
+    and a PublishDispatcher starts their uploads ahead of time so they go
+    public on schedule. Uploads are resumable: when the daemon stops mid-upload
+    the session is kept, and the next run continues from the last byte YouTube
+    acknowledged.
+    """
+    
+    name = "upload"
+    
+    def __init__(self, config, db):
+        super().__init__(config, db)
+        self.scheduler = UploadScheduler(
+            config,
+            db,
+            on_finished=self._on_finished,
+            on_failed=self._on_failed,
+            on_deferred=self._on_deferred
+        )
+        self.dispatcher = PublishDispatcher(config, db, self.scheduler)
+    
+    def start(self):
+        """Start the upload workers and the dispatcher, then the service thread"""
+        self.scheduler.start()
+        self.dispatcher.start()
+        super().start()
+    
+    def stop(self):
+        """Stop the service thread and interrupt running uploads"""
+        super().stop()
+        self.dispatcher.stop()
+        self.scheduler.stop()
+    
+    def tick(self):
+        """Schedule or queue videos whose metadata is ready"""
+        for video in self.db.get_videos_ready_for_upload():
+            if self.scheduler.has_job(video["id"]):
+                continue
+            
+            publish_time = self.dispatcher.schedule_next_slot(video)
+            if publish_time is not None:
+                logger.info(f"Scheduled video {video['id']} to go public at {publish_time:%Y-%m-%d %H:%M}")
+                continue
+            
+            filepath = video["processed_filepath"] or video["filepath"]
+            logger.info(f"Queued video {video['id']} for upload: {filepath}")
+            self.scheduler.submit(
+                video["id"],
+                filepath,
+                self.scheduler.uploader.video_metadata(video),
+                video_id=video["id"],
+                channel_id=video["channel_id"]
+            )
+    
+    def _on_finished(self, video_id, result):
+        """Log a completed upload (upload thread)"""
+        logger.info(f"Uploaded video {video_id}: https://youtube.com/shorts/{result['id']}")
+    
+    def _on_failed(self, video_id, error):
+        """Log a failed or interrupted upload (upload thread)"""
+        if isinstance(error, UploadCancelled):
+            logger.info(f"Upload of video {video_id} interrupted, it resumes on the next run")
+        else:
+            logger.error(f"Uploading video {video_id} failed: {error}")
+    
+    def _on_deferred(self, video_id, retry_at, reason):
+        """Log an upload put off until later (upload thread)"""
+        logger.warning(f"Upload of video {video_id} deferred until {datetime.fromtimestamp(retry_at):%Y-%m-%d %H:%M}: {reason}")
+
+SERVICES = {
+    "download": DownloadService,
+    "processing": ProcessingService,
+    "metadata": MetadataService,
+    "upload": UploadService
+}
+
+def run(args, config, db):
+    """Run the selected services until interrupted"""
+    names = args.services or config.get("daemon.services", list(SERVICES))
+    
+    services = []
+    for name in names:
+        try:
+            services.append(SERVICES[name](config, db))
+        except Exception as e:
+            logger.error(f"Could not start {name} service: {e}")
+    
+    if not services:
+        logger.error("No services to run")
+        return 1
+    
+    stop = threading.Event()
+    
+    def request_stop(signum, frame):
+        logger.info("Shutting down")
+        stop.set()
+    
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+    
+    for service in services:
+        service.start()
+    
+    logger.info(f"Daemon running with services: {', '.join(service.name for service in services)}")
+    
+    # Wake up regularly so signals are handled promptly on every platform
+    while not stop.wait(1):
+        pass
+    
+    for service in services:
+        service.stop()
+    for service in services:
+        service.join()
+    
+    return 0
+
+def enqueue(args, config, db):
+    """Register videos and queue them for processing"""
+    videos_dir = config.get("videos_dir", "./videos")
+    exit_code = 0
+    
+    for path in args.videos:
+        if not os.path.isfile(path):
+            print(f"Not a file: {path}")
+            exit_code = 1
+            continue
+        
+        # Store files in the videos directory under the same path the library uses
+        if os.path.isdir(videos_dir) and os.path.samefile(os.path.dirname(os.path.abspath(path)), videos_dir):
+            path = os.path.join(videos_dir, os.path.basename(path))
+        
+        video_id = db.add_video(path)
+        db.enqueue_processing(video_id, args.channel, args.priority)
+        print(f"Queued video {video_id}: {path}")
+    
+    return exit_code
+
+def status(args, config, db):
+    """Print the processing queue"""
+    rows = db.get_processing_queue()
+    if not args.all:
+        rows = [row for row in rows if row["status"] in ("queued", "processing", "failed")]
+    
+    if not rows:
+        print("The processing queue is empty.")
+        return 0
+    
+    print(f"{'ID':>6}  {'STATUS':<11} {'PRIO':>4} {'TRIES':>5}  {'CHANNEL':<16} VIDEO")
+    for row in rows:
+        print(
+            f"{row['video_id']:>6}  {row['status']:<11} {row['priority'] or 0:>4} {row['attempts'] or 0:>5}  "
+            f"{(row['channel_id'] or '-'):<16} {row['title'] or os.path.basename(row['filepath'])}"
+        )
+        if row["status"] == "failed" and row["error_message"]:
+            print(f"{'':>8}{row['error_message'].splitlines()[0]}")
+    
+    return 0
+
+def cancel(args, config, db):
+    """Cancel queued or running jobs"""
+    exit_code = 0
+    
+    for video_id in args.video_ids:
+        result = db.request_processing_cancel(video_id)
+        if result == "cancelled":
+            print(f"Cancelled video {video_id}")
+        elif result == "requested":
+            print(f"Asked the daemon to stop processing video {video_id}")
+        else:
+            print(f"Video {video_id} is not queued or processing")
+            exit_code = 1
+    
+    return exit_code
+
+def main(argv=None):
+    """
+    Daemon entry point.
+    
+    Args:
+        argv: Command line arguments (defaults to sys.argv[1:])
+    
+    Returns:
+        int: Exit code
+    """
+    parser = argparse.ArgumentParser(description="Headless TikTok to YouTube Shorts pipeline")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    run_parser = subparsers.add_parser("run", help="Run the pipeline services")
+    run_parser.add_argument("--services", nargs="+", choices=list(SERVICES),
+                            help="Services to run (default: daemon.services from the config)")
+    run_parser.set_defaults(handler=run)
+    
+    enqueue_parser = subparsers.add_parser("enqueue", help="Queue videos for processing")
+    enqueue_parser.add_argument("videos", nargs="+", help="Video files to queue")
+    enqueue_parser.add_argument("--channel", help="YouTube channel ID to process for")
+    enqueue_parser.add_argument("--priority", type=int, default=0, help="Queue priority, higher first")
+    enqueue_parser.set_defaults(handler=enqueue)
+    
+    status_parser = subparsers.add_parser("status", help="Show the processing queue")
+    status_parser.add_argument("--all", action="store_true", help="Include completed videos")
+    status_parser.set_defaults(handler=status)
+    
+    cancel_parser = subparsers.add_parser("cancel", help="Cancel queued or running jobs")
+    cancel_parser.add_argument("video_ids", nargs="+", type=int, help="IDs of the videos to cancel")
+    cancel_parser.set_defaults(handler=cancel)
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == "run":
+        setup_logging()
+    
+    try:
+        config = Config()
+    except ConfigError as e:
+        print(e, file=sys.stderr)
+        return 2
+    
+    db = DatabaseManager()
+    return args.handler(args, config, db)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,15 @@
 import sqlite3
 import os
 import json
+import time
+import random
+import re
+from itertools import combinations
 from datetime import datetime
 
+# Hashtags counted per video in the tag index; bounds the pairs a video adds
+MAX_INDEXED_TAGS = 30
+
 class DatabaseManager:
     """
     Manages database operations for the application.
@@ -20,6 +27,7 @@ class DatabaseManager:
             db_file: Path to the SQLite database file (default: videos.db)
         """
         self.db_file = db_file
+        self.search_available = False  # Set when the full-text index exists
         self._create_tables_if_needed()
     
     def _create_tables_if_needed(self):
@@ -71,6 +79,15 @@ class DatabaseManager:
             duration_seconds REAL,
             status TEXT DEFAULT 'pending',
             error_message TEXT,
+            seed INTEGER,  -- Base seed for randomised processing parameters
+            channel_id TEXT,  -- Channel the video is processed for
+            priority INTEGER DEFAULT 0,  -- Higher values are processed first
+            attempts INTEGER DEFAULT 0,  -- Number of times processing was started
+            queued_at TIMESTAMP,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP,
+            dismissed INTEGER DEFAULT 0,  -- 1 once cleared from the processing queue view
+            cancel_requested INTEGER DEFAULT 0,  -- 1 when a running job should be stopped
             FOREIGN KEY (video_id) REFERENCES videos (id) ON DELETE CASCADE
         )
         ''')
@@ -89,12 +106,172 @@ class DatabaseManager:
         )
         ''')
         
+        # Render cache table - index of cached processed outputs for reuse
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS render_cache (
+            cache_key TEXT PRIMARY KEY,
+            filepath TEXT NOT NULL,
+            size_bytes INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_accessed REAL  -- Unix time, used for LRU eviction
+        )
+        ''')
+        
+        # API quota table - YouTube API units used per quota project and day
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS api_quota (
+            project TEXT NOT NULL,
+            quota_day TEXT NOT NULL,  -- YYYY-MM-DD in the API's (Pacific) day
+            units_used INTEGER DEFAULT 0,
+            exhausted INTEGER DEFAULT 0,  -- Set when the API reported the quota used up
+            PRIMARY KEY (project, quota_day)
+        )
+        ''')
+        
+        # Tag index - how often each hashtag is used, overall (channel_id '') and per channel
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tags (
+            channel_id TEXT NOT NULL DEFAULT '',
+            tag TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (channel_id, tag)
+        ) WITHOUT ROWID
+        ''')
+        
+        # Tag pairs - how often two hashtags are used on the same video (tag_a < tag_b)
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tag_pairs (
+            channel_id TEXT NOT NULL DEFAULT '',
+            tag_a TEXT NOT NULL,
+            tag_b TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (channel_id, tag_a, tag_b)
+        ) WITHOUT ROWID
+        ''')
+        
+        # Add columns introduced after the initial schema to existing databases
+        self._add_column_if_missing(cursor, "processing", "seed", "INTEGER")
+        self._add_column_if_missing(cursor, "processing", "channel_id", "TEXT")
+        self._add_column_if_missing(cursor, "processing", "priority", "INTEGER DEFAULT 0")
+        self._add_column_if_missing(cursor, "processing", "attempts", "INTEGER DEFAULT 0")
+        self._add_column_if_missing(cursor, "processing", "queued_at", "TIMESTAMP")
+        self._add_column_if_missing(cursor, "processing", "started_at", "TIMESTAMP")
+        self._add_column_if_missing(cursor, "processing", "finished_at", "TIMESTAMP")
+        self._add_column_if_missing(cursor, "processing", "dismissed", "INTEGER DEFAULT 0")
+        self._add_column_if_missing(cursor, "processing", "cancel_requested", "INTEGER DEFAULT 0")
+        self._add_column_if_missing(cursor, "uploads", "session_uri", "TEXT")
+        self._add_column_if_missing(cursor, "uploads", "upload_file", "TEXT")
+        self._add_column_if_missing(cursor, "uploads", "upload_size", "INTEGER")
+        self._add_column_if_missing(cursor, "uploads", "bytes_uploaded", "INTEGER DEFAULT 0")
+        self._add_column_if_missing(cursor, "videos", "hashtags", "TEXT")  # Space-separated, from the source
+        self._add_column_if_missing(cursor, "videos", "tags_indexed", "INTEGER DEFAULT 0")
+        self._add_column_if_missing(cursor, "videos", "tags_channel", "TEXT")  # Channel the tags are counted for
+        
+        # Indexes for file path lookups and the paged library view
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_videos_filepath ON videos (filepath)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_videos_filename ON videos (filename)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_videos_status ON videos (status, id)")
+        
+        # Indexes for tag suggestions and for finding videos whose tags aren't counted yet
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tags_count ON tags (channel_id, count DESC)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tag_pairs_b ON tag_pairs (channel_id, tag_b)")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_videos_tags_pending ON videos (id) "
+            "WHERE tags_indexed = 0 AND hashtags IS NOT NULL AND hashtags != ''"
+        )
+        
+        # Count the tags of videos added before the tag index existed
+        self._index_pending_tags(cursor)
+        
+        self.search_available = self._create_search_index(cursor)
+        
         conn.commit()
         conn.close()
         
         print(f"Database initialized: {self.db_file}")
     
-    def add_video(self, filepath, title=None, source_url=None, channel_id=None):
+    def _create_search_index(self, cursor):
+        """
+        Create the full-text index over video titles, hashtags and metadata.
+        
+        The index is kept in sync by triggers, so nothing else has to update
+        it. It is filled from the existing rows when it is first created.
+        
+        Args:
+            cursor: Database cursor
+        
+        Returns:
+            bool: False if this SQLite build has no FTS5 support
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'video_search'")
+        exists = cursor.fetchone() is not None
+        
+        try:
+            cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS video_search USING fts5(
+                title, meta_title, description, tags, hashtags,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+            ''')
+        except sqlite3.OperationalError as e:
+            print(f"Full-text search not available, falling back to LIKE: {e}")
+            return False
+        
+        # Rows are keyed by video ID
+        cursor.executescript('''
+        CREATE TRIGGER IF NOT EXISTS video_search_video_insert AFTER INSERT ON videos BEGIN
+            INSERT INTO video_search (rowid, title, hashtags) VALUES (new.id, new.title, new.hashtags);
+        END;
+        CREATE TRIGGER IF NOT EXISTS video_search_video_update AFTER UPDATE OF title, hashtags ON videos BEGIN
+            UPDATE video_search SET title = new.title, hashtags = new.hashtags WHERE rowid = new.id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS video_search_video_delete AFTER DELETE ON videos BEGIN
+            DELETE FROM video_search WHERE rowid = old.id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS video_search_metadata_insert AFTER INSERT ON metadata BEGIN
+            UPDATE video_search SET meta_title = new.title, description = new.description, tags = new.tags
+            WHERE rowid = new.video_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS video_search_metadata_update
+        AFTER UPDATE OF title, description, tags ON metadata BEGIN
+            UPDATE video_search SET meta_title = new.title, description = new.description, tags = new.tags
+            WHERE rowid = new.video_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS video_search_metadata_delete AFTER DELETE ON metadata BEGIN
+            UPDATE video_search SET meta_title = NULL, description = NULL, tags = NULL
+            WHERE rowid = old.video_id;
+        END;
+        ''')
+        
+        if not exists:
+            cursor.execute(
+                """
+                INSERT INTO video_search (rowid, title, meta_title, description, tags, hashtags)
+                SELECT v.id, v.title, m.title, m.description, m.tags, v.hashtags
+                FROM videos v
+                LEFT JOIN metadata m ON m.video_id = v.id
+                """
+            )
+        return True
+    
+    def _add_column_if_missing(self, cursor, table, column, definition):
+        """
+        Add a column to an existing table if it isn't there yet.
+        
+        Args:
+            cursor: Database cursor
+            table: Table name
+            column: Column name
+            definition: Column type and constraints
+        """
+        cursor.execute(f"PRAGMA table_info({table})")
+        columns = [row[1] for row in cursor.fetchall()]
+        
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    
+    def add_video(self, filepath, title=None, source_url=None, channel_id=None, hashtags=None):
         """
         Add a new video to the database.
         
@@ -103,7 +280,8 @@ class DatabaseManager:
             title: Video title (optional)
             source_url: Original TikTok URL (optional)
             channel_id: YouTube channel ID (optional)
-            
+            hashtags: Hashtags of the original video, space-separated (optional)
+        
         Returns:
             video_id: ID of the newly added video
         """
@@ -128,11 +306,13 @@ class DatabaseManager:
         
         # Insert new video
         cursor.execute(
-            "INSERT INTO videos (filename, filepath, title, source_url, channel_id, status) VALUES (?, ?, ?, ?, ?, ?)",
-            (filename, filepath, title, source_url, channel_id, "downloaded")
+            "INSERT INTO videos (filename, filepath, title, source_url, channel_id, hashtags, status) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (filename, filepath, title, source_url, channel_id, hashtags, "downloaded")
         )
         
         video_id = cursor.lastrowid
+        self._index_pending_tags(cursor)
         conn.commit()
         conn.close()
         
@@ -164,7 +344,7 @@ class DatabaseManager:
         
         Args:
             video_id: ID of the video
-            
+        
         Returns:
             dict: Video information or None if not found
         """
@@ -182,273 +362,1288 @@ class DatabaseManager:
         
         return None
     
-    def get_videos_by_status(self, status):
+    def get_video_by_filepath(self, filepath):
         """
-        Get all videos with a specific status.
+        Get video information by file path.
         
         Args:
-            status: Status to filter by
-            
+            filepath: Full path to the video file
+        
         Returns:
-            list: List of video dictionaries
+            dict: Video information or None if not found
         """
         conn = sqlite3.connect(self.db_file)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
-        cursor.execute("SELECT * FROM videos WHERE status = ?", (status,))
-        rows = cursor.fetchall()
+        cursor.execute("SELECT * FROM videos WHERE filepath = ?", (filepath,))
+        row = cursor.fetchone()
         
         conn.close()
         
-        return [dict(row) for row in rows]
+        if row:
+            return dict(row)
+        
+        return None
     
-    def get_all_videos(self):
+    def add_videos_bulk(self, videos):
         """
-        Get all videos from the database.
+        Add many videos to the database in a single transaction.
+        
+        Videos whose file path is already in the database are skipped.
+        
+        Args:
+            videos: Iterable of (filepath, title) or (filepath, title, hashtags) tuples
         
         Returns:
-            list: List of video dictionaries
+            int: Number of videos added
         """
+        rows = [
+            (os.path.basename(video[0]), video[0], video[1], video[2] if len(video) > 2 else None, video[0])
+            for video in videos
+        ]
+        if not rows:
+            return 0
+        
         conn = sqlite3.connect(self.db_file)
-        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
-        cursor.execute("SELECT * FROM videos ORDER BY created_at DESC")
-        rows = cursor.fetchall()
+        cursor.executemany(
+            """
+            INSERT INTO videos (filename, filepath, title, hashtags, status)
+            SELECT ?, ?, ?, ?, 'downloaded'
+            WHERE NOT EXISTS (SELECT 1 FROM videos WHERE filepath = ?)
+            """,
+            rows
+        )
+        added = cursor.rowcount
+        self._index_pending_tags(cursor)
         
+        conn.commit()
         conn.close()
         
-        return [dict(row) for row in rows]
+        if added:
+            print(f"Added {added} videos to database")
+        return added
     
-    def add_processing_info(self, video_id, processed_filepath, settings=None):
+    def get_video_ids_by_filepaths(self, filepaths):
         """
-        Add processing information for a video.
+        Look up the IDs of videos by file path.
         
         Args:
-            video_id: ID of the video
-            processed_filepath: Path to the processed video file
-            settings: Dictionary of processing settings (optional)
-            
+            filepaths: File paths of the videos
+        
         Returns:
-            bool: True if successful, False otherwise
+            dict: Mapping of file path to video ID, for paths in the database
         """
+        filepaths = list(filepaths)
+        if not filepaths:
+            return {}
+        
         conn = sqlite3.connect(self.db_file)
         cursor = conn.cursor()
         
-        # Convert settings dict to JSON string
-        settings_json = json.dumps(settings) if settings else None
-        
-        # Check if processing entry already exists
-        cursor.execute("SELECT video_id FROM processing WHERE video_id = ?", (video_id,))
-        existing = cursor.fetchone()
-        
-        if existing:
-            # Update existing entry
-            cursor.execute(
-                """
-                UPDATE processing SET 
-                    processed_filepath = ?, 
-                    settings = ?, 
-                    processing_date = CURRENT_TIMESTAMP,
-                    status = 'completed'
-                WHERE video_id = ?
-                """,
-                (processed_filepath, settings_json, video_id)
-            )
-        else:
-            # Insert new entry
-            cursor.execute(
-                """
-                INSERT INTO processing (
-                    video_id, processed_filepath, settings, 
-                    processing_date, status
-                ) VALUES (?, ?, ?, CURRENT_TIMESTAMP, 'completed')
-                """,
-                (video_id, processed_filepath, settings_json)
-            )
-        
-        # Update video status
+        placeholders = ", ".join("?" for _ in filepaths)
         cursor.execute(
-            "UPDATE videos SET status = 'processed' WHERE id = ?",
-            (video_id,)
+            f"SELECT filepath, id FROM videos WHERE filepath IN ({placeholders})",
+            filepaths
         )
+        rows = cursor.fetchall()
         
-        conn.commit()
         conn.close()
         
-        return True
+        return dict(rows)
     
-    def add_metadata(self, video_id, title, description=None, tags=None, 
-                    thumbnail_path=None, category_id=None, privacy_status='private'):
+    def get_library_filepaths(self, directory):
         """
-        Add or update metadata for a video.
+        Get the statuses of all videos stored in a directory.
         
         Args:
-            video_id: ID of the video
-            title: Video title
-            description: Video description (optional)
-            tags: Comma-separated tags (optional)
-            thumbnail_path: Path to thumbnail image (optional)
-            category_id: YouTube category ID (optional)
-            privacy_status: Privacy status (default: 'private')
-            
+            directory: Directory the video files live in
+        
         Returns:
-            bool: True if successful, False otherwise
+            dict: Mapping of file path to video status
         """
         conn = sqlite3.connect(self.db_file)
         cursor = conn.cursor()
         
-        # Check if metadata already exists
-        cursor.execute("SELECT video_id FROM metadata WHERE video_id = ?", (video_id,))
-        existing = cursor.fetchone()
-        
-        if existing:
-            # Update existing entry
-            cursor.execute(
-                """
-                UPDATE metadata SET 
-                    title = ?, 
-                    description = ?, 
-                    tags = ?,
-                    thumbnail_path = ?,
-                    category_id = ?,
-                    privacy_status = ?,
-                    last_updated = CURRENT_TIMESTAMP
-                WHERE video_id = ?
-                """,
-                (title, description, tags, thumbnail_path, category_id, privacy_status, video_id)
-            )
-        else:
-            # Insert new entry
-            cursor.execute(
-                """
-                INSERT INTO metadata (
-                    video_id, title, description, tags,
-                    thumbnail_path, category_id, privacy_status
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
-                (video_id, title, description, tags, thumbnail_path, category_id, privacy_status)
-            )
-        
-        # Update video status
         cursor.execute(
-            "UPDATE videos SET status = 'metadata_ready' WHERE id = ?",
-            (video_id,)
+            "SELECT filepath, status FROM videos WHERE filepath >= ? AND filepath < ?",
+            _directory_range(directory)
         )
+        rows = cursor.fetchall()
         
-        conn.commit()
         conn.close()
         
-        return True
+        return dict(rows)
     
-    def schedule_upload(self, video_id, scheduled_time=None, youtube_channel_id=None):
+    def set_videos_missing(self, filepaths, missing=True):
         """
-        Schedule a video for upload.
+        Flag downloaded videos whose files disappeared, or restore them.
+        
+        Only videos that haven't been processed yet are affected, so the history
+        of videos further along the pipeline is kept.
         
         Args:
-            video_id: ID of the video
-            scheduled_time: Scheduled upload time (optional)
-            youtube_channel_id: YouTube channel ID (optional)
-            
-        Returns:
-            bool: True if successful, False otherwise
+            filepaths: File paths of the videos
+            missing: True to flag the videos as missing, False to restore them
         """
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        
-        # Check if upload already scheduled
-        cursor.execute("SELECT video_id FROM uploads WHERE video_id = ?", (video_id,))
-        existing = cursor.fetchone()
+        filepaths = list(filepaths)
+        if not filepaths:
+            return
         
-        if existing:
-            # Update existing entry
-            cursor.execute(
-                """
-                UPDATE uploads SET 
-                    scheduled_time = ?,
-                    status = 'scheduled'
-                WHERE video_id = ?
-                """,
-                (scheduled_time, video_id)
-            )
-        else:
-            # Insert new entry
-            cursor.execute(
-                """
-                INSERT INTO uploads (
-                    video_id, scheduled_time, status
-                ) VALUES (?, ?, 'scheduled')
-                """,
-                (video_id, scheduled_time)
-            )
+        old_status, new_status = ("downloaded", "missing") if missing else ("missing", "downloaded")
         
-        # Update video channel if provided
-        if youtube_channel_id:
-            cursor.execute(
-                "UPDATE videos SET channel_id = ? WHERE id = ?",
-                (youtube_channel_id, video_id)
-            )
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
         
-        # Update video status
-        cursor.execute(
-            "UPDATE videos SET status = 'scheduled' WHERE id = ?",
-            (video_id,)
+        cursor.executemany(
+            "UPDATE videos SET status = ? WHERE filepath = ? AND status = ?",
+            [(new_status, filepath, old_status) for filepath in filepaths]
         )
         
         conn.commit()
         conn.close()
-        
-        return True
     
-    def record_upload(self, video_id, youtube_video_id, youtube_url):
+    def fill_missing_titles(self, titles):
         """
-        Record successful video upload.
+        Set titles for videos that don't have one yet.
         
         Args:
-            video_id: ID of the video
-            youtube_video_id: YouTube video ID
-            youtube_url: YouTube video URL
-            
-        Returns:
-            bool: True if successful, False otherwise
+            titles: Mapping of file path to title
         """
+        if not titles:
+            return
+        
         conn = sqlite3.connect(self.db_file)
         cursor = conn.cursor()
         
-        cursor.execute(
-            """
-            UPDATE uploads SET 
-                youtube_video_id = ?,
-                youtube_url = ?,
-                uploaded_time = CURRENT_TIMESTAMP,
-                status = 'uploaded'
-            WHERE video_id = ?
-            """,
-            (youtube_video_id, youtube_url, video_id)
-        )
-        
-        # Update video status
-        cursor.execute(
-            "UPDATE videos SET status = 'uploaded' WHERE id = ?",
-            (video_id,)
+        cursor.executemany(
+            "UPDATE videos SET title = ? WHERE filepath = ? AND (title IS NULL OR title = '')",
+            [(title, filepath) for filepath, title in titles.items()]
         )
         
         conn.commit()
         conn.close()
-        
-        return True
     
-    def record_upload_failure(self, video_id, error_message):
+    def fill_missing_hashtags(self, hashtags):
         """
-        Record failed video upload.
+        Set hashtags for videos that don't have any yet.
         
         Args:
-            video_id: ID of the video
-            error_message: Error message
-            
-        Returns:
-            bool: True if successful, False otherwise
+            hashtags: Mapping of file path to space-separated hashtags
+        """
+        if not hashtags:
+            return
+        
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.executemany(
+            "UPDATE videos SET hashtags = ? WHERE filepath = ? AND (hashtags IS NULL OR hashtags = '')",
+            [(tags, filepath) for filepath, tags in hashtags.items()]
+        )
+        self._index_pending_tags(cursor)
+        
+        conn.commit()
+        conn.close()
+    
+    def get_top_tags(self, channel_id=None, limit=None):
+        """
+        Get the most used hashtags.
+        
+        Args:
+            channel_id: YouTube channel ID, or None for all videos
+            limit: Maximum number of tags (optional)
+        
+        Returns:
+            list: (tag, count) tuples, most used first
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            "SELECT tag, count FROM tags WHERE channel_id = ? AND count > 0 ORDER BY count DESC, tag LIMIT ?",
+            (channel_id or "", -1 if limit is None else limit)
+        )
+        rows = cursor.fetchall()
+        
+        conn.close()
+        
+        return rows
+    
+    def get_related_tags(self, tags, channel_id=None, limit=10, min_count=2):
+        """
+        Get the hashtags most often used together with some others.
+        
+        Tags are ranked by the share of their uses that are together with the
+        given tags, so tags used on almost every video rank below tags
+        specific to the topic.
+        
+        Args:
+            tags: Hashtags to find related tags for (with or without '#')
+            channel_id: YouTube channel ID, or None for all videos
+            limit: Maximum number of tags (default: 10)
+            min_count: Minimum number of videos a pair must share (default: 2)
+        
+        Returns:
+            list: (tag, times used together, times used) tuples, most related first
+        """
+        tags = sorted({tag.lstrip("#").lower() for tag in tags if tag.lstrip("#")})
+        if not tags:
+            return []
+        
+        channel_id = channel_id or ""
+        placeholders = ", ".join("?" for _ in tags)
+        
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            f"""
+            SELECT related.tag, SUM(related.count) AS together, t.count
+            FROM (
+                SELECT tag_b AS tag, count FROM tag_pairs
+                WHERE channel_id = ? AND tag_a IN ({placeholders})
+                UNION ALL
+                SELECT tag_a AS tag, count FROM tag_pairs
+                WHERE channel_id = ? AND tag_b IN ({placeholders})
+            ) AS related
+            JOIN tags t ON t.channel_id = ? AND t.tag = related.tag
+            WHERE related.tag NOT IN ({placeholders})
+            GROUP BY related.tag
+            HAVING together >= ?
+            ORDER BY together * 1.0 / t.count DESC, together DESC, related.tag
+            LIMIT ?
+            """,
+            [channel_id, *tags, channel_id, *tags, channel_id, *tags, min_count, limit]
+        )
+        rows = cursor.fetchall()
+        
+        conn.close()
+        
+        return rows
+    
+    def _index_pending_tags(self, cursor):
+        """Count the hashtags of videos that got hashtags since the last call"""
+        cursor.execute(
+            "SELECT id, channel_id, hashtags FROM videos "
+            "WHERE tags_indexed = 0 AND hashtags IS NOT NULL AND hashtags != ''"
+        )
+        for video_id, channel_id, hashtags in cursor.fetchall():
+            tags = _tag_words(hashtags)
+            self._count_tags(cursor, "", tags, 1)
+            if channel_id:
+                self._count_tags(cursor, channel_id, tags, 1)
+            cursor.execute(
+                "UPDATE videos SET tags_indexed = 1, tags_channel = ? WHERE id = ?",
+                (channel_id or None, video_id)
+            )
+    
+    def _move_tags_to_channel(self, cursor, video_id, channel_id):
+        """Count a video's hashtags for the channel it now belongs to instead of its previous one"""
+        cursor.execute("SELECT hashtags, tags_indexed, tags_channel FROM videos WHERE id = ?", (video_id,))
+        row = cursor.fetchone()
+        if not row or not row[1] or (row[2] or None) == (channel_id or None):
+            return
+        
+        tags = _tag_words(row[0])
+        if row[2]:
+            self._count_tags(cursor, row[2], tags, -1)
+        if channel_id:
+            self._count_tags(cursor, channel_id, tags, 1)
+        cursor.execute("UPDATE videos SET tags_channel = ? WHERE id = ?", (channel_id or None, video_id))
+    
+    def _count_tags(self, cursor, channel_id, tags, delta):
+        """Add delta to the counts of some tags and of every pair of them"""
+        cursor.executemany(
+            "INSERT INTO tags (channel_id, tag, count) VALUES (?, ?, ?) "
+            "ON CONFLICT (channel_id, tag) DO UPDATE SET count = count + excluded.count",
+            [(channel_id, tag, delta) for tag in tags]
+        )
+        cursor.executemany(
+            "INSERT INTO tag_pairs (channel_id, tag_a, tag_b, count) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (channel_id, tag_a, tag_b) DO UPDATE SET count = count + excluded.count",
+            [(channel_id, tag_a, tag_b, delta) for tag_a, tag_b in combinations(tags, 2)]
+        )
+        if delta < 0:
+            cursor.execute("DELETE FROM tags WHERE channel_id = ? AND count <= 0", (channel_id,))
+            cursor.execute("DELETE FROM tag_pairs WHERE channel_id = ? AND count <= 0", (channel_id,))
+    
+    def count_library_videos(self, directory):
+        """
+        Count the videos shown in the library view of a directory.
+        
+        Args:
+            directory: Directory the video files live in
+        
+        Returns:
+            int: Number of videos whose files are present
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            "SELECT COUNT(*) FROM videos WHERE filepath >= ? AND filepath < ? AND status != 'missing'",
+            _directory_range(directory)
+        )
+        count = cursor.fetchone()[0]
+        
+        conn.close()
+        
+        return count
+    
+    def get_library_page(self, directory, offset, limit):
+        """
+        Get one page of the library view of a directory.
+        
+        Args:
+            directory: Directory the video files live in
+            offset: Number of videos to skip
+            limit: Maximum number of videos to return
+        
+        Returns:
+            list: List of video dictionaries, newest file name first
+        """
+        conn = sqlite3.connect(self.db_file)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            """
+            SELECT id, filename, filepath, title, channel_id, status
+            FROM videos
+            WHERE filepath >= ? AND filepath < ? AND status != 'missing'
+            ORDER BY filename DESC, id DESC
+            LIMIT ? OFFSET ?
+            """,
+            _directory_range(directory) + (limit, offset)
+        )
+        rows = cursor.fetchall()
+        
+        conn.close()
+        
+        return [dict(row) for row in rows]
+    
+    def search_videos(self, query, directory=None, offset=0, limit=50):
+        """
+        Find videos by words in their titles, hashtags, descriptions and tags.
+        
+        Every word must match. The last word matches as a prefix while it is
+        being typed (unless followed by a space), and so does any word ending
+        in '*'. Results are ranked by relevance, with titles weighing most.
+        
+        Args:
+            query: Search text
+            directory: Only search videos in the library view of this directory (optional)
+            offset: Number of results to skip (default: 0)
+            limit: Maximum number of results (default: 50)
+        
+        Returns:
+            list: List of video dictionaries with meta_title, description and
+                  tags, best match first
+        """
+        sql, parameters = self._search_sql(query, directory)
+        if sql is None:
+            return []
+        
+        conn = sqlite3.connect(self.db_file)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            f"""
+            SELECT v.id, v.filename, v.filepath, v.title, v.channel_id, v.status,
+                   m.title AS meta_title, m.description, m.tags
+            {sql}
+            LIMIT ? OFFSET ?
+            """,
+            parameters + [limit, offset]
+        )
+        rows = cursor.fetchall()
+        
+        conn.close()
+        
+        return [dict(row) for row in rows]
+    
+    def count_search_results(self, query, directory=None):
+        """
+        Count the videos search_videos finds for a query.
+        
+        Args:
+            query: Search text
+            directory: Only search videos in the library view of this directory (optional)
+        
+        Returns:
+            int: Number of matching videos
+        """
+        sql, parameters = self._search_sql(query, directory, ranked=False)
+        if sql is None:
+            return 0
+        
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute(f"SELECT COUNT(*) {sql}", parameters)
+        count = cursor.fetchone()[0]
+        
+        conn.close()
+        
+        return count
+    
+    def _search_sql(self, query, directory=None, ranked=True):
+        """
+        Build the FROM, WHERE and ORDER BY clauses of a search.
+        
+        Returns:
+            tuple: (SQL, parameters), or (None, None) if the query has no words
+        """
+        terms = _search_terms(query)
+        if not terms:
+            return None, None
+        
+        if self.search_available:
+            sql = """
+                FROM video_search
+                JOIN videos v ON v.id = video_search.rowid
+                LEFT JOIN metadata m ON m.video_id = v.id
+                WHERE video_search MATCH ?
+            """
+            match = " ".join(f'"{word}"' + ("*" if prefix else "") for word, prefix in terms)
+            parameters = [match]
+            # Column weights: title, metadata title, description, tags, hashtags
+            order = "ORDER BY bm25(video_search, 4.0, 4.0, 1.0, 2.0, 2.0), v.id DESC"
+        else:
+            sql = """
+                FROM videos v
+                LEFT JOIN metadata m ON m.video_id = v.id
+                WHERE 1
+            """
+            parameters = []
+            for word, prefix in terms:
+                pattern = "%" + word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                sql += " AND (" + " OR ".join(
+                    f"{column} LIKE ? ESCAPE '\\'"
+                    for column in ("v.title", "v.hashtags", "m.title", "m.description", "m.tags")
+                ) + ")"
+                parameters.extend([pattern] * 5)
+            order = "ORDER BY v.id DESC"
+        
+        if directory is not None:
+            sql += " AND v.filepath >= ? AND v.filepath < ? AND v.status != 'missing'"
+            parameters.extend(_directory_range(directory))
+        
+        return (sql + " " + order if ranked else sql), parameters
+    
+    def count_metadata_videos(self):
+        """
+        Count the videos shown in the metadata editor.
+        
+        Returns:
+            int: Number of processed videos and videos with metadata ready
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT COUNT(*) FROM videos WHERE status IN ('processed', 'metadata_ready')")
+        count = cursor.fetchone()[0]
+        
+        conn.close()
+        
+        return count
+    
+    def get_metadata_page(self, offset, limit):
+        """
+        Get one page of the metadata editor: processed videos with their metadata.
+        
+        Args:
+            offset: Number of videos to skip
+            limit: Maximum number of videos to return
+        
+        Returns:
+            list: List of video dictionaries with source_title, hashtags,
+                  processed_filepath and the metadata fields (None where a
+                  video has no metadata yet), most recently added first
+        """
+        conn = sqlite3.connect(self.db_file)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            """
+            SELECT v.id, v.filename, v.filepath, v.title AS source_title, v.hashtags,
+                   v.channel_id, v.status, p.processed_filepath,
+                   m.title, m.description, m.tags, m.category_id, m.privacy_status
+            FROM videos v
+            LEFT JOIN metadata m ON m.video_id = v.id
+            LEFT JOIN processing p ON p.video_id = v.id
+            WHERE v.status IN ('processed', 'metadata_ready')
+            ORDER BY v.id DESC
+            LIMIT ? OFFSET ?
+            """,
+            (limit, offset)
+        )
+        rows = cursor.fetchall()
+        
+        conn.close()
+        
+        return [dict(row) for row in rows]
+    
+    def get_videos_by_status(self, status):
+        """
+        Get all videos with a specific status.
+        
+        Args:
+            status: Status to filter by
+        
+        Returns:
+            list: List of video dictionaries
+        """
+        conn = sqlite3.connect(self.db_file)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT * FROM videos WHERE status = ?", (status,))
+        rows = cursor.fetchall()
+        
+        conn.close()
+        
+        return [dict(row) for row in rows]
+    
+    def get_all_videos(self):
+        """
+        Get all videos from the database.
+        
+        Returns:
+            list: List of video dictionaries
+        """
+        conn = sqlite3.connect(self.db_file)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT * FROM videos ORDER BY created_at DESC")
+        rows = cursor.fetchall()
+        
+        conn.close()
+        
+        return [dict(row) for row in rows]
+    
+    def add_processing_info(self, video_id, processed_filepath, settings=None, update_status=True):
+        """
+        Add processing information for a video.
+        
+        Args:
+            video_id: ID of the video
+            processed_filepath: Path to the processed video file
+            settings: Dictionary of processing settings (optional)
+            update_status: Move the video to the 'processed' status (default: True)
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        # Convert settings dict to JSON string
+        settings_json = json.dumps(settings) if settings else None
+        
+        # Check if processing entry already exists
+        cursor.execute("SELECT video_id FROM processing WHERE video_id = ?", (video_id,))
+        existing = cursor.fetchone()
+        
+        if existing:
+            # Update existing entry
+            cursor.execute(
+                """
+                UPDATE processing SET 
+                    processed_filepath = ?, 
+                    settings = ?, 
+                    processing_date = CURRENT_TIMESTAMP,
+                    finished_at = CURRENT_TIMESTAMP,
+                    status = 'completed'
+                WHERE video_id = ?
+                """,
+                (processed_filepath, settings_json, video_id)
+            )
+        else:
+            # Insert new entry
+            cursor.execute(
+                """
+                INSERT INTO processing (
+                    video_id, processed_filepath, settings, 
+                    processing_date, finished_at, status
+                ) VALUES (?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, 'completed')
+                """,
+                (video_id, processed_filepath, settings_json)
+            )
+        
+        # Update video status
+        if update_status:
+            cursor.execute(
+                "UPDATE videos SET status = 'processed' WHERE id = ?",
+                (video_id,)
+            )
+        
+        conn.commit()
+        conn.close()
+        
+        return True
+    
+    def enqueue_processing(self, video_id, channel_id=None, priority=0):
+        """
+        Add a video to the persistent processing queue.
+        
+        Re-queuing a video keeps its seed and attempt count.
+        
+        Args:
+            video_id: ID of the video
+            channel_id: YouTube channel ID to process for (optional)
+            priority: Queue priority, higher is processed first (default: 0)
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT video_id FROM processing WHERE video_id = ?", (video_id,))
+        existing = cursor.fetchone()
+        
+        if existing:
+            cursor.execute(
+                """
+                UPDATE processing SET 
+                    channel_id = ?,
+                    priority = ?,
+                    status = 'queued',
+                    error_message = NULL,
+                    queued_at = CURRENT_TIMESTAMP,
+                    started_at = NULL,
+                    finished_at = NULL,
+                    dismissed = 0,
+                    cancel_requested = 0
+                WHERE video_id = ?
+                """,
+                (channel_id, priority, video_id)
+            )
+        else:
+            cursor.execute(
+                """
+                INSERT INTO processing (
+                    video_id, channel_id, priority, status, queued_at
+                ) VALUES (?, ?, ?, 'queued', CURRENT_TIMESTAMP)
+                """,
+                (video_id, channel_id, priority)
+            )
+        
+        if channel_id:
+            self._move_tags_to_channel(cursor, video_id, channel_id)
+        
+        conn.commit()
+        conn.close()
+        
+        return True
+    
+    def start_processing(self, video_id, output_path):
+        """
+        Mark a queued video as being processed.
+        
+        The output path is recorded before encoding starts so a partial output
+        can be cleaned up if the application stops mid-encode. Only queued
+        entries are claimed, so two workers sharing a database never start
+        the same job.
+        
+        Args:
+            video_id: ID of the video
+            output_path: Path the processed video is being written to
+        
+        Returns:
+            bool: True if the entry was claimed, False if it wasn't queued
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            """
+            UPDATE processing SET 
+                status = 'processing',
+                processed_filepath = ?,
+                attempts = COALESCE(attempts, 0) + 1,
+                started_at = CURRENT_TIMESTAMP,
+                error_message = NULL,
+                cancel_requested = 0
+            WHERE video_id = ? AND status = 'queued'
+            """,
+            (output_path, video_id)
+        )
+        claimed = cursor.rowcount > 0
+        
+        if claimed:
+            cursor.execute(
+                "UPDATE videos SET status = 'processing' WHERE id = ?",
+                (video_id,)
+            )
+        
+        conn.commit()
+        conn.close()
+        
+        return claimed
+    
+    def set_processing_priority(self, video_id, priority):
+        """
+        Change the priority of a queued video.
+        
+        Args:
+            video_id: ID of the video
+            priority: Queue priority, higher is processed first
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            "UPDATE processing SET priority = ? WHERE video_id = ?",
+            (priority, video_id)
+        )
+        
+        conn.commit()
+        conn.close()
+    
+    def record_processing_failure(self, video_id, error_message):
+        """
+        Record failed video processing.
+        
+        Args:
+            video_id: ID of the video
+            error_message: Error message
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            """
+            UPDATE processing SET 
+                status = 'failed',
+                error_message = ?,
+                processed_filepath = NULL,
+                finished_at = CURRENT_TIMESTAMP
+            WHERE video_id = ?
+            """,
+            (error_message, video_id)
+        )
+        
+        # Update video status
+        cursor.execute(
+            "UPDATE videos SET status = 'failed' WHERE id = ?",
+            (video_id,)
+        )
+        
+        conn.commit()
+        conn.close()
+        
+        return True
+    
+    def request_processing_cancel(self, video_id):
+        """
+        Cancel a queued video, or ask the worker processing it to stop.
+        
+        Args:
+            video_id: ID of the video
+        
+        Returns:
+            str: 'cancelled' if the entry was dequeued, 'requested' if a running
+                 job was asked to stop, or None if there was nothing to cancel
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT status FROM processing WHERE video_id = ?", (video_id,))
+        row = cursor.fetchone()
+        
+        result = None
+        if row and row[0] == 'queued':
+            cursor.execute(
+                "UPDATE processing SET status = 'cancelled', finished_at = CURRENT_TIMESTAMP WHERE video_id = ?",
+                (video_id,)
+            )
+            result = 'cancelled'
+        elif row and row[0] == 'processing':
+            cursor.execute(
+                "UPDATE processing SET cancel_requested = 1 WHERE video_id = ?",
+                (video_id,)
+            )
+            result = 'requested'
+        
+        conn.commit()
+        conn.close()
+        
+        return result
+    
+    def is_processing_cancel_requested(self, video_id):
+        """
+        Check whether a running job was asked to stop.
+        
+        Args:
+            video_id: ID of the video
+        
+        Returns:
+            bool: True if cancellation was requested
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT cancel_requested FROM processing WHERE video_id = ?", (video_id,))
+        row = cursor.fetchone()
+        
+        conn.close()
+        
+        return bool(row and row[0])
+    
+    def record_processing_cancelled(self, video_id):
+        """
+        Record that processing of a video was stopped on request.
+        
+        Args:
+            video_id: ID of the video
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            """
+            UPDATE processing SET 
+                status = 'cancelled',
+                processed_filepath = NULL,
+                cancel_requested = 0,
+                finished_at = CURRENT_TIMESTAMP
+            WHERE video_id = ?
+            """,
+            (video_id,)
+        )
+        
+        cursor.execute(
+            "UPDATE videos SET status = 'downloaded' WHERE id = ?",
+            (video_id,)
+        )
+        
+        conn.commit()
+        conn.close()
+    
+    def requeue_processing(self, video_id):
+        """
+        Put a video that was being processed back into the queue.
+        
+        Args:
+            video_id: ID of the video
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            """
+            UPDATE processing SET 
+                status = 'queued',
+                processed_filepath = NULL,
+                started_at = NULL,
+                cancel_requested = 0
+            WHERE video_id = ? AND status = 'processing'
+            """,
+            (video_id,)
+        )
+        
+        cursor.execute(
+            "UPDATE videos SET status = 'downloaded' WHERE id = ?",
+            (video_id,)
+        )
+        
+        conn.commit()
+        conn.close()
+    
+    def remove_from_processing_queue(self, video_id):
+        """
+        Remove a video from the processing queue.
+        
+        Queued and failed entries are cancelled; completed entries keep their
+        results and are only hidden from the queue.
+        
+        Args:
+            video_id: ID of the video
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            """
+            UPDATE processing SET 
+                status = CASE WHEN status = 'completed' THEN status ELSE 'cancelled' END,
+                dismissed = 1
+            WHERE video_id = ? AND status != 'processing'
+            """,
+            (video_id,)
+        )
+        
+        conn.commit()
+        conn.close()
+    
+    def clear_processing_queue(self):
+        """Remove every entry that isn't currently processing from the processing queue"""
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            """
+            UPDATE processing SET 
+                status = CASE WHEN status = 'completed' THEN status ELSE 'cancelled' END,
+                dismissed = 1
+            WHERE status IN ('queued', 'completed', 'failed')
+            """
+        )
+        
+        conn.commit()
+        conn.close()
+    
+    def get_processing_queue(self):
+        """
+        Get the entries of the processing queue.
+        
+        Returns:
+            list: List of processing entries joined with their video information,
+                  highest priority first, then in the order they were queued
+        """
+        conn = sqlite3.connect(self.db_file)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            """
+            SELECT p.*, v.filepath, v.title, v.filename, v.hashtags
+            FROM processing p
+            JOIN videos v ON v.id = p.video_id
+            WHERE p.status IN ('queued', 'processing', 'completed', 'failed')
+              AND COALESCE(p.dismissed, 0) = 0
+              AND p.queued_at IS NOT NULL
+            ORDER BY p.priority DESC, p.queued_at, p.video_id
+            """
+        )
+        rows = cursor.fetchall()
+        
+        conn.close()
+        
+        return [dict(row) for row in rows]
+    
+    def recover_interrupted_processing(self):
+        """
+        Requeue videos whose processing was interrupted by a crash or restart.
+        
+        Returns:
+            list: Output paths of the interrupted encodes, which may contain
+                  partial files that should be deleted
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            "SELECT video_id, processed_filepath FROM processing WHERE status = 'processing'"
+        )
+        rows = cursor.fetchall()
+        
+        for video_id, _ in rows:
+            cursor.execute(
+                """
+                UPDATE processing SET 
+                    status = 'queued',
+                    processed_filepath = NULL,
+                    started_at = NULL
+                WHERE video_id = ?
+                """,
+                (video_id,)
+            )
+            cursor.execute(
+                "UPDATE videos SET status = 'downloaded' WHERE id = ?",
+                (video_id,)
+            )
+        
+        conn.commit()
+        conn.close()
+        
+        if rows:
+            print(f"Requeued {len(rows)} interrupted processing jobs")
+        
+        return [path for _, path in rows if path]
+    
+    def get_processing_seed(self, video_id):
+        """
+        Get the base seed used to derive a video's randomised processing parameters.
+        
+        The seed is created on first use and stored in the processing table, so
+        every later render of the same video uses the same parameters.
+        
+        Args:
+            video_id: ID of the video
+        
+        Returns:
+            int: Base seed for the video
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT seed FROM processing WHERE video_id = ?", (video_id,))
+        existing = cursor.fetchone()
+        
+        if existing and existing[0] is not None:
+            conn.close()
+            return existing[0]
+        
+        seed = random.getrandbits(63)
+        
+        if existing:
+            cursor.execute(
+                "UPDATE processing SET seed = ? WHERE video_id = ?",
+                (seed, video_id)
+            )
+        else:
+            cursor.execute(
+                "INSERT INTO processing (video_id, seed) VALUES (?, ?)",
+                (video_id, seed)
+            )
+        
+        conn.commit()
+        conn.close()
+        
+        return seed
+    
+    def add_metadata(self, video_id, title, description=None, tags=None, 
+                    thumbnail_path=None, category_id=None, privacy_status='private', update_status=True):
+        """
+        Add or update metadata for a video.
+        
+        Args:
+            video_id: ID of the video
+            title: Video title
+            description: Video description (optional)
+            tags: Comma-separated tags (optional)
+            thumbnail_path: Path to thumbnail image (optional)
+            category_id: YouTube category ID (optional)
+            privacy_status: Privacy status (default: 'private')
+            update_status: Move the video to the 'metadata_ready' status (default: True)
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        # Check if metadata already exists
+        cursor.execute("SELECT video_id FROM metadata WHERE video_id = ?", (video_id,))
+        existing = cursor.fetchone()
+        
+        if existing:
+            # Update existing entry
+            cursor.execute(
+                """
+                UPDATE metadata SET 
+                    title = ?, 
+                    description = ?, 
+                    tags = ?,
+                    thumbnail_path = ?,
+                    category_id = ?,
+                    privacy_status = ?,
+                    last_updated = CURRENT_TIMESTAMP
+                WHERE video_id = ?
+                """,
+                (title, description, tags, thumbnail_path, category_id, privacy_status, video_id)
+            )
+        else:
+            # Insert new entry
+            cursor.execute(
+                """
+                INSERT INTO metadata (
+                    video_id, title, description, tags,
+                    thumbnail_path, category_id, privacy_status
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (video_id, title, description, tags, thumbnail_path, category_id, privacy_status)
+            )
+        
+        # Update video status
+        if update_status:
+            cursor.execute(
+                "UPDATE videos SET status = 'metadata_ready' WHERE id = ?",
+                (video_id,)
+            )
+        
+        conn.commit()
+        conn.close()
+        
+        return True
+    
+    def add_metadata_bulk(self, entries, update_status=True):
+        """
+        Add or update metadata for many videos in a single transaction.
+        
+        Args:
+            entries: Iterable of dictionaries with video_id and title, and
+                     optionally description, tags, thumbnail_path, category_id
+                     and privacy_status; a missing thumbnail keeps the stored one
+            update_status: Move the videos to the 'metadata_ready' status (default: True)
+        
+        Returns:
+            int: Number of videos written
+        """
+        rows = [
+            (
+                entry["video_id"], entry["title"], entry.get("description"), entry.get("tags"),
+                entry.get("thumbnail_path"), entry.get("category_id"), entry.get("privacy_status") or "private"
+            )
+            for entry in entries
+        ]
+        if not rows:
+            return 0
+        
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.executemany(
+            """
+            INSERT INTO metadata (
+                video_id, title, description, tags,
+                thumbnail_path, category_id, privacy_status
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (video_id) DO UPDATE SET
+                title = excluded.title,
+                description = excluded.description,
+                tags = excluded.tags,
+                thumbnail_path = COALESCE(excluded.thumbnail_path, metadata.thumbnail_path),
+                category_id = excluded.category_id,
+                privacy_status = excluded.privacy_status,
+                last_updated = CURRENT_TIMESTAMP
+            """,
+            rows
+        )
+        
+        if update_status:
+            cursor.executemany(
+                "UPDATE videos SET status = 'metadata_ready' WHERE id = ?",
+                [(row[0],) for row in rows]
+            )
+        
+        conn.commit()
+        conn.close()
+        
+        return len(rows)
+    
+    def schedule_upload(self, video_id, scheduled_time=None, youtube_channel_id=None):
+        """
+        Schedule a video for upload.
+        
+        Args:
+            video_id: ID of the video
+            scheduled_time: Scheduled upload time (optional)
+            youtube_channel_id: YouTube channel ID (optional)
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        # Check if upload already scheduled
+        cursor.execute("SELECT video_id FROM uploads WHERE video_id = ?", (video_id,))
+        existing = cursor.fetchone()
+        
+        if existing:
+            # Update existing entry
+            cursor.execute(
+                """
+                UPDATE uploads SET 
+                    scheduled_time = ?,
+                    status = 'scheduled'
+                WHERE video_id = ?
+                """,
+                (scheduled_time, video_id)
+            )
+        else:
+            # Insert new entry
+            cursor.execute(
+                """
+                INSERT INTO uploads (
+                    video_id, scheduled_time, status
+                ) VALUES (?, ?, 'scheduled')
+                """,
+                (video_id, scheduled_time)
+            )
+        
+        # Update video channel if provided
+        if youtube_channel_id:
+            cursor.execute(
+                "UPDATE videos SET channel_id = ? WHERE id = ?",
+                (youtube_channel_id, video_id)
+            )
+            self._move_tags_to_channel(cursor, video_id, youtube_channel_id)
+        
+        # Update video status
+        cursor.execute(
+            "UPDATE videos SET status = 'scheduled' WHERE id = ?",
+            (video_id,)
+        )
+        
+        conn.commit()
+        conn.close()
+        
+        return True
+    
+    def record_upload(self, video_id, youtube_video_id, youtube_url):
+        """
+        Record successful video upload.
+        
+        Args:
+            video_id: ID of the video
+            youtube_video_id: YouTube video ID
+            youtube_url: YouTube video URL
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            """
+            UPDATE uploads SET 
+                youtube_video_id = ?,
+                youtube_url = ?,
+                uploaded_time = CURRENT_TIMESTAMP,
+                status = 'uploaded',
+                session_uri = NULL,
+                bytes_uploaded = upload_size
+            WHERE video_id = ?
+            """,
+            (youtube_video_id, youtube_url, video_id)
+        )
+        
+        # Update video status
+        cursor.execute(
+            "UPDATE videos SET status = 'uploaded' WHERE id = ?",
+            (video_id,)
+        )
+        
+        conn.commit()
+        conn.close()
+        
+        return True
+    
+    def record_upload_failure(self, video_id, error_message):
+        """
+        Record failed video upload.
+        
+        Args:
+            video_id: ID of the video
+            error_message: Error message
+        
+        Returns:
+            bool: True if successful, False otherwise
         """
         conn = sqlite3.connect(self.db_file)
         cursor = conn.cursor()
@@ -488,7 +1683,7 @@ class DatabaseManager:
         cursor.execute(
             """
             SELECT v.*, m.title as meta_title, m.description, m.tags, m.thumbnail_path, 
-                   m.privacy_status, p.processed_filepath
+                   m.category_id, m.privacy_status, m.publish_at, p.processed_filepath
             FROM videos v
             LEFT JOIN metadata m ON v.id = m.video_id
             LEFT JOIN processing p ON v.id = p.video_id
@@ -515,7 +1710,7 @@ class DatabaseManager:
         cursor.execute(
             """
             SELECT v.*, m.title as meta_title, m.description, m.tags, m.thumbnail_path, 
-                   m.privacy_status, p.processed_filepath, u.scheduled_time
+                   m.category_id, m.privacy_status, p.processed_filepath, u.scheduled_time
             FROM videos v
             LEFT JOIN metadata m ON v.id = m.video_id
             LEFT JOIN processing p ON v.id = p.video_id
@@ -529,13 +1724,245 @@ class DatabaseManager:
         
         return [dict(row) for row in rows]
     
+    def get_upload_deadlines(self, video_ids):
+        """
+        Get the scheduled upload times of videos.
+        
+        Args:
+            video_ids: IDs of the videos to look up
+        
+        Returns:
+            dict: Mapping of video ID to scheduled upload time, for videos
+                  that have a pending scheduled upload
+        """
+        video_ids = list(video_ids)
+        if not video_ids:
+            return {}
+        
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        placeholders = ", ".join("?" for _ in video_ids)
+        cursor.execute(
+            f"""
+            SELECT video_id, scheduled_time FROM uploads
+            WHERE video_id IN ({placeholders})
+              AND status = 'scheduled'
+              AND scheduled_time IS NOT NULL
+            """,
+            video_ids
+        )
+        rows = cursor.fetchall()
+        
+        conn.close()
+        
+        return {video_id: scheduled_time for video_id, scheduled_time in rows}
+    
+    def get_video_for_upload(self, filepath):
+        """
+        Get a video with its metadata by its original or processed file path.
+        
+        Args:
+            filepath: Path to the original or processed video file
+        
+        Returns:
+            dict: Video information with the same fields as get_videos_ready_for_upload,
+                  or None if not found
+        """
+        conn = sqlite3.connect(self.db_file)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            """
+            SELECT v.*, m.title as meta_title, m.description, m.tags, m.thumbnail_path, 
+                   m.category_id, m.privacy_status, m.publish_at, p.processed_filepath
+            FROM videos v
+            LEFT JOIN metadata m ON v.id = m.video_id
+            LEFT JOIN processing p ON v.id = p.video_id
+            WHERE p.processed_filepath = ? OR v.filepath = ?
+            ORDER BY p.processed_filepath = ? DESC
+            LIMIT 1
+            """,
+            (filepath, filepath, filepath)
+        )
+        row = cursor.fetchone()
+        
+        conn.close()
+        
+        return dict(row) if row else None
+    
+    def get_upload_session(self, video_id):
+        """
+        Get the resumable upload session of a video.
+        
+        Args:
+            video_id: ID of the video
+        
+        Returns:
+            dict: session_uri, upload_file, upload_size and bytes_uploaded,
+                  or None if the video has no upload entry
+        """
+        conn = sqlite3.connect(self.db_file)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            "SELECT session_uri, upload_file, upload_size, bytes_uploaded FROM uploads WHERE video_id = ?",
+            (video_id,)
+        )
+        row = cursor.fetchone()
+        
+        conn.close()
+        
+        return dict(row) if row else None
+    
+    def save_upload_session(self, video_id, session_uri, upload_file, upload_size):
+        """
+        Store a newly created resumable upload session.
+        
+        Args:
+            video_id: ID of the video
+            session_uri: Upload session URI returned by the API
+            upload_file: Signature of the file being uploaded (path, size and mtime)
+            upload_size: Size of the file in bytes
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            """
+            INSERT INTO uploads (video_id, session_uri, upload_file, upload_size, bytes_uploaded, status)
+            VALUES (?, ?, ?, ?, 0, 'uploading')
+            ON CONFLICT (video_id) DO UPDATE SET
+                session_uri = excluded.session_uri,
+                upload_file = excluded.upload_file,
+                upload_size = excluded.upload_size,
+                bytes_uploaded = 0,
+                status = 'uploading',
+                error_message = NULL
+            """,
+            (video_id, session_uri, upload_file, upload_size)
+        )
+        
+        conn.commit()
+        conn.close()
+    
+    def update_upload_progress(self, video_id, bytes_uploaded):
+        """
+        Record how many bytes of an upload the server has acknowledged.
+        
+        Args:
+            video_id: ID of the video
+            bytes_uploaded: Number of bytes received by the server
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            "UPDATE uploads SET bytes_uploaded = ?, status = 'uploading' WHERE video_id = ?",
+            (bytes_uploaded, video_id)
+        )
+        
+        conn.commit()
+        conn.close()
+    
+    def clear_upload_session(self, video_id):
+        """
+        Forget an upload session that can no longer be resumed.
+        
+        Args:
+            video_id: ID of the video
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            "UPDATE uploads SET session_uri = NULL, upload_file = NULL, bytes_uploaded = 0 WHERE video_id = ?",
+            (video_id,)
+        )
+        
+        conn.commit()
+        conn.close()
+    
+    def get_quota_usage(self, project, quota_day):
+        """
+        Get the API quota used by a project on a day.
+        
+        Args:
+            project: Quota project name
+            quota_day: Quota day as YYYY-MM-DD
+        
+        Returns:
+            dict: units_used and exhausted (bool)
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            "SELECT units_used, exhausted FROM api_quota WHERE project = ? AND quota_day = ?",
+            (project, quota_day)
+        )
+        row = cursor.fetchone()
+        
+        conn.close()
+        
+        if not row:
+            return {"units_used": 0, "exhausted": False}
+        return {"units_used": row[0], "exhausted": bool(row[1])}
+    
+    def add_quota_usage(self, project, quota_day, units):
+        """
+        Count API units used by a project.
+        
+        Args:
+            project: Quota project name
+            quota_day: Quota day as YYYY-MM-DD
+            units: Number of units used
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            """
+            INSERT INTO api_quota (project, quota_day, units_used) VALUES (?, ?, ?)
+            ON CONFLICT (project, quota_day) DO UPDATE SET units_used = units_used + excluded.units_used
+            """,
+            (project, quota_day, units)
+        )
+        
+        conn.commit()
+        conn.close()
+    
+    def mark_quota_exhausted(self, project, quota_day):
+        """
+        Record that the API reported a project's quota as used up for the day.
+        
+        Args:
+            project: Quota project name
+            quota_day: Quota day as YYYY-MM-DD
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            """
+            INSERT INTO api_quota (project, quota_day, exhausted) VALUES (?, ?, 1)
+            ON CONFLICT (project, quota_day) DO UPDATE SET exhausted = 1
+            """,
+            (project, quota_day)
+        )
+        
+        conn.commit()
+        conn.close()
+    
     def delete_video(self, video_id):
         """
         Delete a video and all related information from the database.
         
         Args:
             video_id: ID of the video
-            
+        
         Returns:
             bool: True if successful, False otherwise
         """
@@ -557,4 +1984,130 @@ class DatabaseManager:
             print(f"Error deleting video: {e}")
             conn.rollback()
             conn.close()
-            return False  
+            return False
+    
+    def get_render_cache_entry(self, cache_key):
+        """
+        Get a render cache entry by key.
+        
+        Args:
+            cache_key: Render cache key
+        
+        Returns:
+            dict: Cache entry or None if not found
+        """
+        conn = sqlite3.connect(self.db_file)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT * FROM render_cache WHERE cache_key = ?", (cache_key,))
+        row = cursor.fetchone()
+        
+        conn.close()
+        
+        return dict(row) if row else None
+    
+    def add_render_cache_entry(self, cache_key, filepath, size_bytes):
+        """
+        Add or replace a render cache entry.
+        
+        Args:
+            cache_key: Render cache key
+            filepath: Path to the cached render
+            size_bytes: Size of the cached render in bytes
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            """
+            INSERT OR REPLACE INTO render_cache (
+                cache_key, filepath, size_bytes, last_accessed
+            ) VALUES (?, ?, ?, ?)
+            """,
+            (cache_key, filepath, size_bytes, time.time())
+        )
+        
+        conn.commit()
+        conn.close()
+        
+        return True
+    
+    def touch_render_cache_entry(self, cache_key):
+        """
+        Mark a render cache entry as recently used.
+        
+        Args:
+            cache_key: Render cache key
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            "UPDATE render_cache SET last_accessed = ? WHERE cache_key = ?",
+            (time.time(), cache_key)
+        )
+        
+        conn.commit()
+        conn.close()
+    
+    def get_render_cache_entries(self):
+        """
+        Get all render cache entries, least recently used first.
+        
+        Returns:
+            list: List of cache entry dictionaries
+        """
+        conn = sqlite3.connect(self.db_file)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT * FROM render_cache ORDER BY last_accessed ASC")
+        rows = cursor.fetchall()
+        
+        conn.close()
+        
+        return [dict(row) for row in rows]
+    
+    def delete_render_cache_entry(self, cache_key):
+        """
+        Delete a render cache entry.
+        
+        Args:
+            cache_key: Render cache key
+        """
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        
+        cursor.execute("DELETE FROM render_cache WHERE cache_key = ?", (cache_key,))
+        
+        conn.commit()
+        conn.close()
+
+def _tag_words(hashtags):
+    """Normalise a hashtag string into sorted, unique, lowercase tag words"""
+    words = sorted({word.lower() for word in re.findall(r"#(\w+)", hashtags or "")})
+    return words[:MAX_INDEXED_TAGS]
+
+def _search_terms(query):
+    """
+    Split search text into words.
+    
+    Returns:
+        list: (word, matches as prefix) tuples
+    """
+    matches = list(re.finditer(r"(\w+)(\*?)", query or ""))
+    terms = []
+    typing = not query[-1:].isspace()
+    for number, match in enumerate(matches):
+        is_last = number == len(matches) - 1
+        terms.append((match.group(1), bool(match.group(2)) or (is_last and typing)))
+    return terms
+
+def _directory_range(directory):
+    """Build the file path range of the files inside a directory, usable with the file path index"""
+    prefix = os.path.join(directory, "")
+    return (prefix, prefix + "\U0010ffff")
@@ -7,5 +7,7 @@ including direct URLs and Telegram bot integration.
 
 # Import modules to be exposed at the package level
 # This will be populated as modules are implemented
+from downloader.library import VideoLibrary
+from downloader.folder_watcher import FolderWatcher
 
-__all__ = []
\ No newline at end of file
+__all__ = ['VideoLibrary', 'FolderWatcher']
\ No newline at end of file
@@ -0,0 +1,232 @@
+import os
+import time
+import threading
+
+# watchdog is optional; without it the watcher polls the directory instead
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+class FolderWatcher:
+    """
+    Watches the videos directory and registers new video files as they appear.
+    
+    File system notifications (inotify, FSEvents, ReadDirectoryChangesW) are used
+    through watchdog when it is installed. Otherwise the directory is polled, and
+    it is only listed again when its modification time changes.
+    
+    New files are not ingested straight away: a file is only considered finished
+    once its size and modification time have stayed the same for a settle period,
+    so files still being written by a downloader or a copy are skipped until
+    they are complete. Finished files are registered in one batch per pass and
+    can optionally be queued for processing.
+    """
+    
+    def __init__(self, config, library, on_change=None):
+        """
+        Initialize the folder watcher.
+        
+        Args:
+            config: Application configuration manager
+            library: VideoLibrary that registers files in the database
+            on_change: Callback receiving (added, removed) after each batch, where
+                       added is a list of (video_id, path) tuples and removed a
+                       list of paths. Called from the watcher thread.
+        """
+        self.config = config
+        self.library = library
+        self.on_change = on_change
+        self.mode = None
+        
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._observer = None
+        
+        # Candidate files: path -> ((size, mtime), time the signature was first seen)
+        self._pending = {}
+        self._removed = set()
+        
+        # Directory state for the polling fallback
+        self._directory_mtime = None
+        self._known_names = set()
+    
+    def start(self):
+        """Start watching the videos directory"""
+        if self._thread is not None:
+            return
+        
+        directory = self.library.directory
+        os.makedirs(directory, exist_ok=True)
+        self._stop.clear()
+        
+        self.mode = "polling"
+        if Observer is not None and self.config.get("watcher.use_native", True):
+            try:
+                self._observer = Observer()
+                self._observer.schedule(_EventHandler(self), directory, recursive=False)
+                self._observer.start()
+                self.mode = "native"
+            except Exception as e:
+                print(f"Native folder watching unavailable, polling instead: {e}")
+                self._observer = None
+        
+        if self.mode == "polling":
+            # Files already present are the library sync's job, not new arrivals
+            self._directory_mtime = os.stat(directory).st_mtime_ns
+            self._known_names = self._list_videos(directory)
+        
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        print(f"Watching {directory} for new videos ({self.mode})")
+    
+    def stop(self):
+        """Stop watching"""
+        self._stop.set()
+        
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def file_added(self, path):
+        """Note a created or modified file (thread-safe)"""
+        if not self._is_video(path):
+            return
+        with self._lock:
+            self._removed.discard(path)
+            # Restart the settle period on every change
+            self._pending[path] = (None, time.monotonic())
+    
+    def file_removed(self, path):
+        """Note a deleted file (thread-safe)"""
+        if not self._is_video(path):
+            return
+        with self._lock:
+            self._pending.pop(path, None)
+            self._removed.add(path)
+    
+    def _run(self):
+        """Watcher thread: poll if needed and ingest settled files"""
+        interval = max(float(self.config.get("watcher.poll_interval", 2)), 0.1)
+        
+        while not self._stop.wait(interval):
+            try:
+                if self.mode == "polling":
+                    self._poll()
+                self._flush()
+            except Exception as e:
+                print(f"Error watching videos directory: {e}")
+    
+    def _poll(self):
+        """Detect added and removed files from directory listings"""
+        directory = self.library.directory
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return
+        
+        # Files being appended to don't change the directory's mtime, but
+        # those are already pending and get re-checked by _flush
+        if mtime == self._directory_mtime:
+            return
+        self._directory_mtime = mtime
+        
+        names = self._list_videos(directory)
+        for name in names - self._known_names:
+            self.file_added(os.path.join(directory, name))
+        for name in self._known_names - names:
+            self.file_removed(os.path.join(directory, name))
+        self._known_names = names
+    
+    def _flush(self):
+        """Register files that finished writing and forget removed ones"""
+        settle = float(self.config.get("watcher.settle_seconds", 2))
+        now = time.monotonic()
+        ready = []
+        
+        with self._lock:
+            pending = dict(self._pending)
+            removed = list(self._removed)
+            self._removed.clear()
+        
+        for path, (signature, since) in pending.items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Gone again, e.g. a temporary file that was renamed
+                with self._lock:
+                    if self._pending.get(path) == (signature, since):
+                        del self._pending[path]
+                continue
+            
+            current = (stat.st_size, stat.st_mtime_ns)
+            with self._lock:
+                if self._pending.get(path) != (signature, since):
+                    continue  # Changed while we were looking
+                if current != signature:
+                    self._pending[path] = (current, now)
+                elif stat.st_size > 0 and now - since >= settle:
+                    del self._pending[path]
+                    ready.append(path)
+        
+        if not ready and not removed:
+            return
+        
+        added = self.library.add_files(ready) if ready else []
+        if removed:
+            self.library.remove_files(removed)
+        
+        if added and self.config.get("watcher.auto_enqueue", False):
+            channel_id = self.config.get("watcher.channel_id") or None
+            for video_id, _ in added:
+                self.library.db.enqueue_processing(video_id, channel_id)
+        
+        if added:
+            print(f"Ingested {len(added)} new videos")
+        if self.on_change and (added or removed):
+            self.on_change(added, removed)
+    
+    def _list_videos(self, directory):
+        """Names of the video files in a directory"""
+        with os.scandir(directory) as entries:
+            return {entry.name for entry in entries if self._is_video(entry.name) and entry.is_file()}
+    
+    def _is_video(self, path):
+        """Whether a path looks like a video file"""
+        return path.lower().endswith(self.library.VIDEO_EXTENSIONS)
+
+class _EventHandler(FileSystemEventHandler):
+    """Forwards watchdog events to the folder watcher"""
+    
+    def __init__(self, watcher):
+        super().__init__()
+        self.watcher = watcher
+    
+    def on_created(self, event):
+        if not event.is_directory:
+            self.watcher.file_added(event.src_path)
+    
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.watcher.file_added(event.src_path)
+    
+    def on_closed(self, event):
+        if not event.is_directory:
+            self.watcher.file_added(event.src_path)
+    
+    def on_deleted(self, event):
+        if not event.is_directory:
+            self.watcher.file_removed(event.src_path)
+    
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.watcher.file_removed(event.src_path)
+            self.watcher.file_added(event.dest_path)
@@ -0,0 +1,180 @@
+import os
+import csv
+import threading
+
+class VideoLibrary:
+    """
+    Keeps the videos table in sync with the files in the videos directory.
+    
+    Syncing is incremental: the directory is only listed again when its
+    modification time changes (which happens whenever a file is added, removed
+    or renamed), and ``metadata.csv`` (titles and hashtags captured at download
+    time) is only re-read when it changes. New files are inserted in one batch,
+    and rows for files that disappeared are flagged as missing instead of being
+    deleted.
+    """
+    
+    VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi')
+    
+    def __init__(self, config, db):
+        """
+        Initialize the video library.
+        
+        Args:
+            config: Application configuration manager
+            db: Database manager holding the video records
+        """
+        self.config = config
+        self.db = db
+        self._lock = threading.Lock()
+        
+        # Modification times seen during the last sync, per path
+        self._directory_mtime = {}
+        self._metadata_mtime = {}
+        self._titles = {}
+        self._hashtags = {}
+    
+    @property
+    def directory(self):
+        """The videos directory"""
+        return self.config.get("videos_dir", "./videos")
+    
+    def sync(self, force=False):
+        """
+        Bring the database up to date with the videos directory.
+        
+        Safe to call from a background thread.
+        
+        Args:
+            force: List the directory even if it appears unchanged
+        
+        Returns:
+            bool: True if the library contents changed
+        """
+        with self._lock:
+            directory = self.directory
+            if not os.path.isdir(directory):
+                return False
+            
+            metadata_changed = self._load_metadata(directory)
+            
+            directory_mtime = os.stat(directory).st_mtime_ns
+            if not force and self._directory_mtime.get(directory) == directory_mtime:
+                if metadata_changed:
+                    self._fill_missing(directory)
+                return metadata_changed
+            self._directory_mtime[directory] = directory_mtime
+            
+            # scandir reports file types without a stat call per entry
+            on_disk = set()
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.lower().endswith(self.VIDEO_EXTENSIONS) and entry.is_file():
+                        on_disk.add(os.path.join(directory, entry.name))
+            
+            known = self.db.get_library_filepaths(directory)
+            added = on_disk - known.keys()
+            gone = [path for path, status in known.items() if status == "downloaded" and path not in on_disk]
+            returned = [path for path, status in known.items() if status == "missing" and path in on_disk]
+            
+            self.db.add_videos_bulk(self._new_rows(directory, sorted(added)))
+            self.db.set_videos_missing(gone)
+            self.db.set_videos_missing(returned, missing=False)
+            if metadata_changed:
+                self._fill_missing(directory)
+            
+            return bool(added or gone or returned or metadata_changed)
+    
+    def add_files(self, paths):
+        """
+        Register finished video files found by the folder watcher.
+        
+        Args:
+            paths: Paths of video files in the videos directory
+        
+        Returns:
+            list: (video_id, path) tuples of the files that were new to the library
+        """
+        with self._lock:
+            directory = self.directory
+            if self._load_metadata(directory):
+                self._fill_missing(directory)
+            
+            paths = [os.path.join(directory, os.path.basename(path)) for path in paths]
+            known = self.db.get_video_ids_by_filepaths(paths)
+            new_paths = [path for path in paths if path not in known]
+            
+            self.db.add_videos_bulk(self._new_rows(directory, new_paths))
+            # Files that come back after being flagged missing are visible again
+            self.db.set_videos_missing(known.keys(), missing=False)
+            
+            added = self.db.get_video_ids_by_filepaths(new_paths)
+            return [(added[path], path) for path in new_paths if path in added]
+    
+    def remove_files(self, paths):
+        """
+        Flag video files the folder watcher saw disappear as missing.
+        
+        Args:
+            paths: Paths of removed video files in the videos directory
+        """
+        with self._lock:
+            directory = self.directory
+            self.db.set_videos_missing(
+                os.path.join(directory, os.path.basename(path)) for path in paths
+            )
+    
+    def _load_metadata(self, directory):
+        """
+        Re-read ``metadata.csv`` if it changed since the last sync.
+        
+        Returns:
+            bool: True if the titles and hashtags were reloaded
+        """
+        metadata_path = os.path.join(directory, "metadata.csv")
+        try:
+            mtime = os.stat(metadata_path).st_mtime_ns
+        except OSError:
+            mtime = None
+        
+        if self._metadata_mtime.get(directory, 0) == mtime:
+            return False
+        self._metadata_mtime[directory] = mtime
+        
+        titles = {}
+        hashtags = {}
+        if mtime is not None:
+            try:
+                with open(metadata_path, newline="", encoding="utf-8") as f:
+                    for row in csv.DictReader(f):
+                        if row.get("Video Name") and row.get("Title"):
+                            titles[row["Video Name"]] = row["Title"]
+                        if row.get("Video Name") and row.get("Hashtags"):
+                            hashtags[row["Video Name"]] = row["Hashtags"]
+            except (OSError, csv.Error, UnicodeDecodeError) as e:
+                print(f"Error reading video metadata: {e}")
+        
+        self._titles[directory] = titles
+        self._hashtags[directory] = hashtags
+        return bool(titles or hashtags)
+    
+    def _new_rows(self, directory, paths):
+        """Build add_videos_bulk rows with the titles and hashtags from ``metadata.csv``"""
+        titles = self._titles.get(directory, {})
+        hashtags = self._hashtags.get(directory, {})
+        return [
+            (path, titles.get(os.path.basename(path)), hashtags.get(os.path.basename(path)))
+            for path in paths
+        ]
+    
+    def _fill_missing(self, directory):
+        """Give known videos the titles and hashtags ``metadata.csv`` has for them"""
+        self.db.fill_missing_titles(self._paths_to(directory, self._titles))
+        self.db.fill_missing_hashtags(self._paths_to(directory, self._hashtags))
+    
+    def _paths_to(self, directory, values):
+        """Map full file paths to the values read from ``metadata.csv`` for a directory"""
+        return {
+            os.path.join(directory, name): value
+            for name, value in values.get(directory, {}).items()
+        }
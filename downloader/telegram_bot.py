@@ -4,9 +4,7 @@ import subprocess
 import json
 import csv
 import asyncio
-import pandas as pd
 from datetime import datetime
-from telethon import TelegramClient, events
 from urllib.parse import urlparse
 
 class TelegramDownloader:
@@ -70,27 +68,15 @@ class TelegramDownloader:
             channel: YouTube channel (optional)
         """
         try:
-            # Check if the CSV file exists and is not empty
-            if os.path.exists(self.metadata_csv) and os.path.getsize(self.metadata_csv) > 0:
-                df = pd.read_csv(self.metadata_csv)
-            else:
-                # Create new DataFrame with appropriate columns
-                df = pd.DataFrame(columns=['Video Name', 'Title', 'Hashtags', 'Thumbnail', 'Channel'])
-            
-            # Create a new row as a DataFrame
-            new_row = pd.DataFrame({
-                'Video Name': [video_name],
-                'Title': [title],
-                'Hashtags': [hashtags],
-                'Thumbnail': [thumbnail],
-                'Channel': [channel] if channel else [None]
-            })
-            
-            # Append the new row using pd.concat()
-            df = pd.concat([df, new_row], ignore_index=True)
+            # Write the header if the CSV file doesn't exist or is empty
+            write_header = not os.path.exists(self.metadata_csv) or os.path.getsize(self.metadata_csv) == 0
             
-            # Save back to CSV
-            df.to_csv(self.metadata_csv, index=False)
+            # Append the new row instead of rewriting the whole file
+            with open(self.metadata_csv, 'a', newline='', encoding='utf-8') as csvfile:
+                writer = csv.writer(csvfile)
+                if write_header:
+                    writer.writerow(['Video Name', 'Title', 'Hashtags', 'Thumbnail', 'Channel'])
+                writer.writerow([video_name, title, hashtags, thumbnail, channel or ''])
             print(f"Updated metadata for {video_name}")
             
         except Exception as e:
@@ -251,6 +237,9 @@ class TelegramDownloader:
         # Initialize the metadata file
         self.initialize_metadata_file()
         
+        # Telethon is only needed while the bot runs, so import it here
+        from telethon import TelegramClient, events
+        
         # Initialize the client
         self.client = TelegramClient('tiktok_downloader_bot', api_id=self.api_id, api_hash=self.api_hash)
         
@@ -1,16 +1,23 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QTableWidget, QTableWidgetItem, QComboBox, QLineEdit,
+    QTableView, QAbstractItemView, QComboBox, QLineEdit,
     QFormLayout, QGroupBox, QCheckBox, QSpinBox, QFileDialog, 
     QMessageBox, QProgressBar
 )
-from PySide6.QtCore import Qt, Signal, QUrl
+from PySide6.QtCore import Qt, Signal, QUrl, QTimer
 from PySide6.QtGui import QDesktopServices
 import os
 import subprocess
 import threading
 import time
 
+from database.db_manager import DatabaseManager
+from downloader.library import VideoLibrary
+from downloader.folder_watcher import FolderWatcher
+from gui.event_bus import WorkerEventBus
+from gui.library_model import VideoLibraryModel
+from gui.queue_model import QueueItemDelegate
+
 class DownloadTab(QWidget):
     """
     Tab for managing TikTok video downloads.
@@ -20,20 +27,39 @@ class DownloadTab(QWidget):
     
     # Signals for inter-tab communication
     video_downloaded = Signal(str, str)  # (video_path, title)
+    videos_enqueued = Signal()  # Watched files were queued for processing in the database
     
-    def __init__(self, config):
+    def __init__(self, config, db=None):
         """
         Initialize the download tab.
         
         Args:
             config: Application configuration manager
+            db: Database manager backing the video library (optional)
         """
         super().__init__()
         self.config = config
+        self.db = db or DatabaseManager()
+        self.library = VideoLibrary(config, self.db)
+        self._library_sync_running = False
+        self._library_sync_pending = False
+        
+        # Delivers updates from background threads on the GUI thread
+        self.events = WorkerEventBus(self)
+        self.events.progress.connect(self._on_download_progress)
+        self.events.finished.connect(self._on_download_finished)
+        self.events.failed.connect(self._on_download_failed)
+        
         self.init_ui()
         self.bot_process = None
         self.telegram_monitoring = False
         
+        # React to settings changes instead of re-reading them; callbacks may
+        # come from any thread, so they are handed to the GUI thread
+        config.subscribe("channels", lambda channels: self.events.post_call(self._on_channels_changed))
+        config.subscribe("videos_dir", lambda videos_dir: self.events.post_call(self._on_videos_dir_changed))
+        config.subscribe("watcher", lambda watcher: self.events.post_call(self._restart_folder_watcher))
+    
     def init_ui(self):
         """Set up the user interface for the download tab"""
         # Main layout
@@ -118,8 +144,27 @@ class DownloadTab(QWidget):
         videos_group = QGroupBox("Downloaded Videos")
         videos_layout = QVBoxLayout(videos_group)
         
-        self.videos_table = QTableWidget(0, 4)  # rows, columns
-        self.videos_table.setHorizontalHeaderLabels(["Video", "Title", "Channel", "Actions"])
+        # Search box, applied once typing pauses
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search titles, hashtags, descriptions and tags...")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(lambda: self.library_model.set_search(self.search_input.text()))
+        self.search_input.textChanged.connect(lambda text: self.search_timer.start())
+        videos_layout.addWidget(self.search_input)
+        
+        # Rows are paged in from the database as the table is scrolled
+        self.library_model = VideoLibraryModel(self.db, self.config, self)
+        self.library_delegate = QueueItemDelegate(self)
+        self.library_delegate.action_triggered.connect(self.on_library_action)
+        
+        self.videos_table = QTableView()
+        self.videos_table.setModel(self.library_model)
+        self.videos_table.setItemDelegate(self.library_delegate)
+        self.videos_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.videos_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.videos_table.setColumnWidth(0, 200)  # Filename
         self.videos_table.setColumnWidth(1, 300)  # Title
         self.videos_table.setColumnWidth(2, 150)  # Channel
@@ -141,8 +186,17 @@ class DownloadTab(QWidget):
         
         main_layout.addWidget(videos_group)
         
-        # Load the video list
+        # Show what the database already knows, then pick up filesystem changes
+        self.library_model.reload()
         self.refresh_video_list()
+        
+        # Files dropped into the videos directory by other tools are ingested as they appear
+        self.folder_watcher = FolderWatcher(self.config, self.library, self._on_watched_files_changed)
+        if self.config.get("watcher.enabled", True):
+            try:
+                self.folder_watcher.start()
+            except OSError as e:
+                print(f"Error starting folder watcher: {e}")
     
     def load_channels(self):
         """Load available YouTube channels from config into the combobox"""
@@ -156,6 +210,12 @@ class DownloadTab(QWidget):
         for channel_id, channel_info in channels.items():
             self.channel_combo.addItem(channel_info["name"], channel_id)
     
+    def _on_channels_changed(self):
+        """Reload the channel list, keeping the selection (GUI thread)"""
+        channel_id = self.channel_combo.currentData()
+        self.load_channels()
+        self.channel_combo.setCurrentIndex(max(self.channel_combo.findData(channel_id), 0))
+    
     def save_telegram_settings(self):
         """Save Telegram bot settings to config"""
         try:
@@ -164,16 +224,17 @@ class DownloadTab(QWidget):
             if api_id:
                 api_id = int(api_id)
             
-            # Update configuration
-            self.config.set("telegram.api_id", api_id)
-            self.config.set("telegram.api_hash", self.api_hash_input.text().strip())
-            self.config.set("telegram.bot_token", self.bot_token_input.text().strip())
-            
-            # Parse chat ID (can be negative for groups)
-            chat_id = self.chat_id_input.text().strip()
-            if chat_id:
-                chat_id = int(chat_id)
-            self.config.set("telegram.chat_id", chat_id)
+            # Update configuration; nothing is kept if the chat ID is invalid
+            with self.config.transaction():
+                self.config.set("telegram.api_id", api_id)
+                self.config.set("telegram.api_hash", self.api_hash_input.text().strip())
+                self.config.set("telegram.bot_token", self.bot_token_input.text().strip())
+                
+                # Parse chat ID (can be negative for groups)
+                chat_id = self.chat_id_input.text().strip()
+                if chat_id:
+                    chat_id = int(chat_id)
+                self.config.set("telegram.chat_id", chat_id)
             
             QMessageBox.information(self, "Settings Saved", "Telegram bot settings have been saved.")
         except ValueError:
@@ -265,7 +326,7 @@ class DownloadTab(QWidget):
         """Monitor the bot process and update status"""
         if not self.bot_process:
             return
-            
+        
         # Read output and errors in real time
         while self.bot_process.poll() is None:
             # Process output and errors if needed
@@ -285,9 +346,7 @@ class DownloadTab(QWidget):
                 self.status_label.setText(f"Bot Status: Error (code: {exit_code})")
         
         # Schedule UI update from main thread
-        # This uses QTimer.singleShot for thread safety
-        from PySide6.QtCore import QTimer
-        QTimer.singleShot(0, update_ui)
+        self.events.post_call(update_ui)
     
     def _create_telegram_bot_script(self):
         """Create a temporary script file for the Telegram bot"""
@@ -345,14 +404,8 @@ class DownloadTab(QWidget):
     def _download_tiktok_thread(self, url, channel_id):
         """Background thread for TikTok download"""
         try:
-            # Update progress from main thread
-            from PySide6.QtCore import QTimer
-            
-            def update_progress(value):
-                self.progress_bar.setValue(value)
-            
-            # Simulating progress
-            QTimer.singleShot(0, lambda: update_progress(20))
+            # Progress is delivered to the GUI thread through the event bus
+            self.events.post_progress("download", 20)
             
             # Use yt-dlp to download
             video_dir = self.config.get("videos_dir", "./videos")
@@ -360,7 +413,7 @@ class DownloadTab(QWidget):
             video_filename = f"tiktok_{timestamp}.mp4"
             video_path = os.path.join(video_dir, video_filename)
             
-            QTimer.singleShot(0, lambda: update_progress(50))
+            self.events.post_progress("download", 50)
             
             # This code would actually download the video using yt-dlp
             # For now, we'll just simulate the download
@@ -368,97 +421,139 @@ class DownloadTab(QWidget):
             title = f"TikTok video {timestamp}"
             time.sleep(2)  # Simulate download time
             
-            QTimer.singleShot(0, lambda: update_progress(90))
-            
-            # Update the video list
-            QTimer.singleShot(0, lambda: self.refresh_video_list())
-            
-            # Signal that video is downloaded and ready for processing
-            channel_name = self.channel_combo.currentText()
-            self.video_downloaded.emit(video_path, title)
-            
-            # Finish up
-            QTimer.singleShot(0, lambda: update_progress(100))
-            QTimer.singleShot(1000, lambda: self.progress_bar.setVisible(False))
-            
-            # Show success message
-            QTimer.singleShot(0, lambda: QMessageBox.information(
-                self, 
-                "Download Complete", 
-                f"Video has been downloaded and added to the {channel_name} processing queue."
-            ))
-            
+            self.events.post_progress("download", 90)
+            self.events.post_finished("download", (video_path, title))
+        
         except Exception as e:
-            # Handle errors
-            from PySide6.QtCore import QTimer
-            QTimer.singleShot(0, lambda: QMessageBox.critical(
-                self, 
-                "Download Error", 
-                f"Failed to download video: {str(e)}"
-            ))
-            QTimer.singleShot(0, lambda: self.progress_bar.setVisible(False))
+            self.events.post_failed("download", e)
+    
+    def _on_download_progress(self, key, value):
+        """Update the download progress bar (GUI thread)"""
+        if key == "download":
+            self.progress_bar.setValue(value)
+    
+    def _on_download_finished(self, key, result):
+        """Finish a download on the GUI thread"""
+        if key != "download":
+            return
+        
+        video_path, title = result
+        
+        # Update the video list
+        self.refresh_video_list()
+        
+        # Signal that video is downloaded and ready for processing
+        channel_name = self.channel_combo.currentText()
+        self.video_downloaded.emit(video_path, title)
+        
+        # Finish up
+        self.progress_bar.setValue(100)
+        QTimer.singleShot(1000, lambda: self.progress_bar.setVisible(False))
+        
+        # Show success message
+        QMessageBox.information(
+            self, 
+            "Download Complete", 
+            f"Video has been downloaded and added to the {channel_name} processing queue."
+        )
+    
+    def _on_download_failed(self, key, error):
+        """Report a failed download on the GUI thread"""
+        if key != "download":
+            return
+        
+        self.progress_bar.setVisible(False)
+        QMessageBox.critical(
+            self, 
+            "Download Error", 
+            f"Failed to download video: {error}"
+        )
     
     def refresh_video_list(self):
         """Refresh the list of downloaded videos"""
-        # Clear the table
-        self.videos_table.setRowCount(0)
-        
-        # Get the list of videos
-        videos_dir = self.config.get("videos_dir", "./videos")
-        if not os.path.exists(videos_dir):
+        self._start_library_sync(force=True)
+    
+    def _start_library_sync(self, force=False):
+        """Sync the library with the videos directory in a background thread"""
+        if self._library_sync_running:
+            # Run again once the current sync finishes
+            self._library_sync_pending = self._library_sync_pending or force
             return
         
-        # Filter for video files
-        video_files = [f for f in os.listdir(videos_dir) 
-                      if os.path.isfile(os.path.join(videos_dir, f)) 
-                      and f.endswith(('.mp4', '.mov', '.avi'))]
+        self._library_sync_running = True
+        threading.Thread(
+            target=self._library_sync_thread,
+            args=(force,),
+            daemon=True
+        ).start()
+    
+    def _library_sync_thread(self, force):
+        """Background thread for library syncing"""
+        try:
+            changed = self.library.sync(force)
+        except Exception as e:
+            print(f"Error syncing video library: {e}")
+            changed = False
+        self.events.post_call(self._on_library_synced, changed)
+    
+    def _on_library_synced(self, changed):
+        """Update the library view after a sync (GUI thread)"""
+        self._library_sync_running = False
+        
+        if changed:
+            self.library_model.reload()
+        
+        if self._library_sync_pending:
+            self._library_sync_pending = False
+            self._start_library_sync(force=True)
+    
+    def _on_watched_files_changed(self, added, removed):
+        """Called from the folder watcher thread after files were ingested or removed"""
+        self.events.post_call(self._on_watcher_synced, bool(added))
+    
+    def _on_watcher_synced(self, added):
+        """Show watcher changes in the library view (GUI thread)"""
+        self.library_model.reload()
         
-        # Load metadata file if exists
-        metadata = {}
-        metadata_path = os.path.join(videos_dir, "metadata.csv")
-        if os.path.exists(metadata_path):
+        if added and self.config.get("watcher.auto_enqueue", False):
+            self.videos_enqueued.emit()
+    
+    def _on_videos_dir_changed(self):
+        """Show and watch the newly configured videos directory (GUI thread)"""
+        self.library_model.reload()
+        self._restart_folder_watcher()
+        self._start_library_sync(force=True)
+    
+    def _restart_folder_watcher(self):
+        """Apply the current watcher settings (GUI thread)"""
+        self.folder_watcher.stop()
+        if self.config.get("watcher.enabled", True):
             try:
-                import pandas as pd
-                df = pd.read_csv(metadata_path)
-                for _, row in df.iterrows():
-                    metadata[row['Video Name']] = {
-                        'title': row['Title'],
-                        'hashtags': row['Hashtags']
-                    }
-            except Exception:
-                pass
-        
-        # Add videos to table
-        for i, video_file in enumerate(sorted(video_files, reverse=True)):
-            self.videos_table.insertRow(i)
-            
-            # File name
-            file_item = QTableWidgetItem(video_file)
-            file_item.setData(Qt.UserRole, os.path.join(videos_dir, video_file))
-            self.videos_table.setItem(i, 0, file_item)
-            
-            # Title
-            title = metadata.get(video_file, {}).get('title', '')
-            self.videos_table.setItem(i, 1, QTableWidgetItem(title))
-            
-            # Channel (placeholder for now)
-            self.videos_table.setItem(i, 2, QTableWidgetItem("Not assigned"))
-            
-            # Actions button
-            actions_widget = QWidget()
-            actions_layout = QHBoxLayout(actions_widget)
-            actions_layout.setContentsMargins(0, 0, 0, 0)
-            
-            process_btn = QPushButton("Process")
-            process_btn.clicked.connect(lambda _, path=os.path.join(videos_dir, video_file), 
-                                      title=title: 
-                                      self.video_downloaded.emit(path, title))
-            actions_layout.addWidget(process_btn)
-            
-            self.videos_table.setCellWidget(i, 3, actions_widget)
+                self.folder_watcher.start()
+            except OSError as e:
+                print(f"Error starting folder watcher: {e}")
+    
+    def stop_folder_watcher(self):
+        """Stop watching the videos directory"""
+        self.folder_watcher.stop()
+    
+    def on_library_action(self, row, action):
+        """
+        Handle an action button clicked in the library table.
+        
+        Args:
+            row: Row of the video
+            action: Label of the clicked button
+        """
+        video = self.library_model.video(row)
+        if video is None:
+            return
+        
+        if action == "Process":
+            self.video_downloaded.emit(video["filepath"], video["title"] or "")
     
     def open_videos_folder(self):
         """Open the videos folder in file explorer"""
         videos_dir = self.config.get("videos_dir", "./videos")
         if os.path.exists(videos_dir):
-            QDesktopServices.openUrl(QUrl.fromLocalFile(videos_dir))  
+            QDesktopServices.openUrl(QUrl.fromLocalFile(videos_dir))
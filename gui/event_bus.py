@@ -0,0 +1,113 @@
+from PySide6.QtCore import Qt, QObject, Signal, QTimer
+import threading
+
+class WorkerEventBus(QObject):
+    """
+    Delivers updates from background worker threads to the GUI thread.
+    
+    Workers may call the post_* methods from any thread. Updates are collected
+    under a lock and handed to the GUI thread through a queued signal, then
+    re-emitted from there at most once per frame. Progress updates for the same
+    key are coalesced so only the latest value is delivered, while finished,
+    failed and call events are delivered in the order they were posted.
+    
+    The bus must be created on the GUI thread.
+    """
+    
+    # Public signals, always emitted on the GUI thread
+    progress = Signal(object, int)  # (key, progress)
+    finished = Signal(object, object)  # (key, result)
+    failed = Signal(object, str)  # (key, error message)
+    
+    # Internal signal used to wake the GUI thread
+    _wake = Signal()
+    
+    FRAME_INTERVAL_MS = 16
+    
+    def __init__(self, parent=None):
+        """
+        Initialize the event bus.
+        
+        Args:
+            parent: Parent object (normally the owning widget)
+        """
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._pending_progress = {}
+        self._pending_events = []
+        self._scheduled = False
+        
+        # Flushes pending updates once per frame
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.FRAME_INTERVAL_MS)
+        self._timer.timeout.connect(self._flush)
+        
+        self._wake.connect(self._on_wake, Qt.QueuedConnection)
+    
+    def post_progress(self, key, value):
+        """
+        Report progress for a job (thread-safe, coalesced).
+        
+        Args:
+            key: Identifier of the job
+            value: Progress value (0-100)
+        """
+        with self._lock:
+            self._pending_progress[key] = int(value)
+            wake = self._schedule()
+        if wake:
+            self._wake.emit()
+    
+    def post_finished(self, key, result=None):
+        """Report that a job finished successfully (thread-safe)"""
+        self._post_event(("finished", key, result))
+    
+    def post_failed(self, key, error):
+        """Report that a job failed (thread-safe)"""
+        self._post_event(("failed", key, str(error)))
+    
+    def post_call(self, callback, *args):
+        """Run a callback on the GUI thread (thread-safe)"""
+        self._post_event(("call", callback, args))
+    
+    def _post_event(self, event):
+        """Queue an ordered event for delivery"""
+        with self._lock:
+            self._pending_events.append(event)
+            wake = self._schedule()
+        if wake:
+            self._wake.emit()
+    
+    def _schedule(self):
+        """Mark a flush as scheduled; returns True if the GUI thread must be woken"""
+        if self._scheduled:
+            return False
+        self._scheduled = True
+        return True
+    
+    def _on_wake(self):
+        """Start the frame timer on the GUI thread"""
+        if not self._timer.isActive():
+            self._timer.start()
+    
+    def _flush(self):
+        """Deliver all pending updates on the GUI thread"""
+        with self._lock:
+            progress = self._pending_progress
+            events = self._pending_events
+            self._pending_progress = {}
+            self._pending_events = []
+            self._scheduled = False
+        
+        # Progress first, so a finished event always has the final say
+        for key, value in progress.items():
+            self.progress.emit(key, value)
+        
+        for kind, key, payload in events:
+            if kind == "finished":
+                self.finished.emit(key, payload)
+            elif kind == "failed":
+                self.failed.emit(key, payload)
+            else:
+                key(*payload)
@@ -0,0 +1,147 @@
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+from gui.queue_model import ProcessingQueueModel
+
+class VideoLibraryModel(QAbstractTableModel):
+    """
+    Table model for the downloaded videos library.
+    
+    Rows come from the videos table rather than the filesystem and are loaded a
+    page at a time: the view asks for more rows through canFetchMore/fetchMore
+    as the user scrolls, so only the visible part of a large library is read.
+    
+    With a search set, only matching videos are shown, best match first, paged
+    from the full-text index the same way.
+    """
+    
+    VIDEO_COLUMN = 0
+    TITLE_COLUMN = 1
+    CHANNEL_COLUMN = 2
+    ACTIONS_COLUMN = 3
+    
+    HEADERS = ["Video", "Title", "Channel", "Actions"]
+    
+    # Shares the actions role with the queue so the same delegate can paint buttons
+    ActionsRole = ProcessingQueueModel.ActionsRole
+    
+    PAGE_SIZE = 200
+    
+    def __init__(self, db, config, parent=None):
+        """
+        Initialize the library model.
+        
+        Args:
+            db: Database manager holding the video records
+            config: Application configuration manager
+            parent: Parent object
+        """
+        super().__init__(parent)
+        self.db = db
+        self.config = config
+        self.rows = []
+        self.total = 0
+        self.query = ""
+    
+    def rowCount(self, parent=QModelIndex()):
+        """Number of loaded videos"""
+        return 0 if parent.isValid() else len(self.rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        """Number of table columns"""
+        return 0 if parent.isValid() else len(self.HEADERS)
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        """Column headers"""
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+    
+    def data(self, index, role=Qt.DisplayRole):
+        """Data for a table cell"""
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+        
+        video = self.rows[index.row()]
+        column = index.column()
+        
+        if role == Qt.DisplayRole:
+            if column == self.VIDEO_COLUMN:
+                return video["filename"]
+            if column == self.TITLE_COLUMN:
+                return video["title"] or ""
+            if column == self.CHANNEL_COLUMN:
+                return self._channel_name(video["channel_id"])
+        elif role == Qt.ToolTipRole and column == self.VIDEO_COLUMN:
+            return video["filepath"]
+        elif role == Qt.UserRole:
+            return video["filepath"]
+        elif role == self.ActionsRole and column == self.ACTIONS_COLUMN:
+            return ["Process"]
+        
+        return None
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        """Whether more videos are available than are loaded"""
+        return not parent.isValid() and len(self.rows) < self.total
+    
+    def fetchMore(self, parent=QModelIndex()):
+        """Load the next page of videos"""
+        if parent.isValid():
+            return
+        
+        page = self._page(len(self.rows), self.PAGE_SIZE)
+        if not page:
+            # The library shrank since it was counted
+            self.total = len(self.rows)
+            return
+        
+        first = len(self.rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+        self.rows.extend(page)
+        self.endInsertRows()
+    
+    def reload(self):
+        """Re-read the library, keeping as many rows loaded as before"""
+        loaded = max(len(self.rows), self.PAGE_SIZE)
+        
+        self.beginResetModel()
+        if self.query.strip():
+            self.total = self.db.count_search_results(self.query, self._directory())
+        else:
+            self.total = self.db.count_library_videos(self._directory())
+        self.rows = self._page(0, loaded)
+        self.endResetModel()
+    
+    def set_search(self, query):
+        """
+        Show only the videos matching a search.
+        
+        Args:
+            query: Search text (see DatabaseManager.search_videos), empty to show all videos
+        """
+        if query == self.query:
+            return
+        self.query = query
+        self.rows = []  # Start from the first page of the new results
+        self.reload()
+    
+    def video(self, row):
+        """Get the video at a row, or None if out of range"""
+        if 0 <= row < len(self.rows):
+            return self.rows[row]
+        return None
+    
+    def _page(self, offset, limit):
+        """Read rows of the library or of the search results"""
+        if self.query.strip():
+            return self.db.search_videos(self.query, self._directory(), offset, limit)
+        return self.db.get_library_page(self._directory(), offset, limit)
+    
+    def _directory(self):
+        """The videos directory shown by the library"""
+        return self.config.get("videos_dir", "./videos")
+    
+    def _channel_name(self, channel_id):
+        """Display name of a channel"""
+        channel = self.config.get("channels", {}).get(channel_id) if channel_id else None
+        return channel["name"] if channel else "Not assigned"
@@ -108,10 +108,11 @@ class SettingsDialog(QDialog):
     
     def accept(self):
         """Save settings when dialog is accepted"""
-        # Update config with new values
-        self.config.set("ffmpeg_path", self.ffmpeg_path.text())
-        self.config.set("videos_dir", self.videos_dir.text())
-        self.config.set("output_dir", self.output_dir.text())
+        # Update config with new values, saved together
+        with self.config.transaction():
+            self.config.set("ffmpeg_path", self.ffmpeg_path.text())
+            self.config.set("videos_dir", self.videos_dir.text())
+            self.config.set("output_dir", self.output_dir.text())
         
         # Let parent class handle dialog closure
         super().accept()
@@ -125,12 +126,13 @@ class MainWindow(QMainWindow):
     the UI components and facilitating communication between them.
     """
     
-    def __init__(self, config):
+    def __init__(self, config, db=None):
         """
         Initialize the main window with proper layout and components.
         
         Args:
             config: Application configuration manager
+            db: Database manager (optional, created if omitted)
         """
         super().__init__()
         
@@ -138,7 +140,7 @@ class MainWindow(QMainWindow):
         self.config = config
         
         # Initialize database manager
-        self.db = DatabaseManager()
+        self.db = db or DatabaseManager()
         
         # Set up window properties
         self.setWindowTitle("TikTok to YouTube Shorts Automation")
@@ -179,10 +181,10 @@ class MainWindow(QMainWindow):
         self.main_layout.addWidget(self.tab_widget)
         
         # Create tabs with database access
-        self.download_tab = DownloadTab(self.config)
-        self.process_tab = ProcessTab(self.config)
-        self.metadata_tab = MetadataTab(self.config)
-        self.upload_tab = UploadTab(self.config)
+        self.download_tab = DownloadTab(self.config, self.db)
+        self.process_tab = ProcessTab(self.config, self.db)
+        self.metadata_tab = MetadataTab(self.config, self.db)
+        self.upload_tab = UploadTab(self.config, self.db)
         
         # Add tabs to widget
         self.tab_widget.addTab(self.download_tab, "Download")
@@ -277,6 +279,9 @@ class MainWindow(QMainWindow):
         # Download completion -> Process tab
         self.download_tab.video_downloaded.connect(self.on_video_downloaded)
         
+        # Videos queued by the folder watcher -> Process tab
+        self.download_tab.videos_enqueued.connect(self.process_tab.load_queue_entries)
+        
         # Processing completion -> Metadata tab
         self.process_tab.video_processed.connect(self.on_video_processed)
         
@@ -314,7 +319,7 @@ class MainWindow(QMainWindow):
             # Switch to process tab if auto-navigation is enabled
             if self.config.get("auto_navigate", True):
                 self.tab_widget.setCurrentIndex(1)  # Process tab
-                
+        
         except Exception as e:
             logger.error(f"Error adding video to database: {e}")
             QMessageBox.warning(self, "Database Error", 
@@ -363,7 +368,7 @@ class MainWindow(QMainWindow):
             # Switch to metadata tab if auto-navigation is enabled
             if self.config.get("auto_navigate", True):
                 self.tab_widget.setCurrentIndex(2)  # Metadata tab
-                
+        
         except Exception as e:
             logger.error(f"Error updating processing info: {e}")
     
@@ -429,7 +434,7 @@ class MainWindow(QMainWindow):
                 self.processing_status_label.setText(f"Processing: {len(processing_videos)}")
             else:
                 self.processing_status_label.setText("Processing: None")
-                
+        
         except Exception as e:
             logger.error(f"Error updating status counts: {e}")
     
@@ -472,13 +477,13 @@ class MainWindow(QMainWindow):
             # Let each tab refresh its data
             if hasattr(self.download_tab, 'refresh_video_list'):
                 self.download_tab.refresh_video_list()
-                
+            
             if hasattr(self.process_tab, 'update_queue_display'):
                 self.process_tab.update_queue_display()
-                
+            
             if hasattr(self.metadata_tab, 'update_videos_table'):
                 self.metadata_tab.update_videos_table()
-                
+            
             if hasattr(self.upload_tab, 'update_queue_table'):
                 self.upload_tab.update_queue_table()
             
@@ -487,7 +492,7 @@ class MainWindow(QMainWindow):
             
             # Update status
             self.status_label.setText("Data refreshed")
-            
+        
         except Exception as e:
             logger.error(f"Error refreshing data: {e}")
             QMessageBox.warning(self, "Refresh Error", f"Error refreshing data: {str(e)}")
@@ -539,6 +544,10 @@ class MainWindow(QMainWindow):
         # Clean up resources
         if hasattr(self, 'update_timer'):
             self.update_timer.stop()
+        self.download_tab.stop_folder_watcher()
+        self.metadata_tab.model.flush()
+        self.upload_tab.dispatcher.stop(timeout=1)
+        self.upload_tab.scheduler.stop(timeout=5)
         
         # Accept the close event
-        event.accept()
\ No newline at end of file
+        event.accept()
@@ -0,0 +1,195 @@
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer
+
+from gui.queue_model import ProcessingQueueModel
+
+class MetadataModel(QAbstractTableModel):
+    """
+    Table model for the videos in the metadata editor.
+    
+    Rows are paged in from the database as the view scrolls, like the video
+    library. Edits are written behind: they show in the table right away and
+    are collected for FLUSH_DELAY milliseconds, then saved in one batch with
+    DatabaseManager.add_metadata_bulk. Pages read before a flush show the
+    pending edits rather than the stored values.
+    """
+    
+    VIDEO_COLUMN = 0
+    TITLE_COLUMN = 1
+    CHANNEL_COLUMN = 2
+    ACTIONS_COLUMN = 3
+    
+    HEADERS = ["Video", "Title", "Channel", "Actions"]
+    
+    # Shares the actions role with the queue so the same delegate can paint buttons
+    ActionsRole = ProcessingQueueModel.ActionsRole
+    
+    PAGE_SIZE = 200
+    
+    # Milliseconds edits are collected before they are saved
+    FLUSH_DELAY = 1000
+    
+    # Metadata fields saved for a video
+    FIELDS = ("title", "description", "tags", "category_id", "privacy_status")
+    
+    def __init__(self, db, config, parent=None):
+        """
+        Initialize the metadata model.
+        
+        Args:
+            db: Database manager holding the videos and their metadata
+            config: Application configuration manager
+            parent: Parent object
+        """
+        super().__init__(parent)
+        self.db = db
+        self.config = config
+        self.rows = []
+        self.total = 0
+        
+        # Edits not saved yet, by video ID
+        self._pending = {}
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(self.FLUSH_DELAY)
+        self._flush_timer.timeout.connect(self.flush)
+    
+    def rowCount(self, parent=QModelIndex()):
+        """Number of loaded videos"""
+        return 0 if parent.isValid() else len(self.rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        """Number of table columns"""
+        return 0 if parent.isValid() else len(self.HEADERS)
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        """Column headers"""
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+    
+    def data(self, index, role=Qt.DisplayRole):
+        """Data for a table cell"""
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+        
+        video = self.rows[index.row()]
+        column = index.column()
+        
+        if role == Qt.DisplayRole:
+            if column == self.VIDEO_COLUMN:
+                return video["filename"]
+            if column == self.TITLE_COLUMN:
+                return video["title"] or video["source_title"] or ""
+            if column == self.CHANNEL_COLUMN:
+                return self._channel_name(video["channel_id"])
+        elif role == Qt.ToolTipRole and column == self.VIDEO_COLUMN:
+            return video["processed_filepath"] or video["filepath"]
+        elif role == Qt.UserRole:
+            return video["id"]
+        elif role == self.ActionsRole and column == self.ACTIONS_COLUMN:
+            return ["Edit"]
+        
+        return None
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        """Whether more videos are available than are loaded"""
+        return not parent.isValid() and len(self.rows) < self.total
+    
+    def fetchMore(self, parent=QModelIndex()):
+        """Load the next page of videos"""
+        if parent.isValid():
+            return
+        
+        page = self._page(len(self.rows), self.PAGE_SIZE)
+        if not page:
+            # Videos moved on since they were counted
+            self.total = len(self.rows)
+            return
+        
+        first = len(self.rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+        self.rows.extend(page)
+        self.endInsertRows()
+    
+    def reload(self):
+        """Re-read the videos, keeping as many rows loaded as before"""
+        loaded = max(len(self.rows), self.PAGE_SIZE)
+        
+        self.beginResetModel()
+        self.total = self.db.count_metadata_videos()
+        self.rows = self._page(0, loaded)
+        self.endResetModel()
+    
+    def video(self, row):
+        """Get the video at a row, or None if out of range"""
+        if 0 <= row < len(self.rows):
+            return self.rows[row]
+        return None
+    
+    def row_of(self, video_id):
+        """Get the row of a loaded video, or -1"""
+        for row, video in enumerate(self.rows):
+            if video["id"] == video_id:
+                return row
+        return -1
+    
+    def update_metadata(self, video_id, metadata):
+        """
+        Change the metadata of a video; it is saved with the next flush.
+        
+        Args:
+            video_id: ID of the video
+            metadata: Dictionary with any of the FIELDS
+        """
+        row = self.row_of(video_id)
+        pending = self._pending.get(video_id)
+        if pending is None:
+            # Unchanged fields keep the values the video has now
+            base = self.rows[row] if row >= 0 else {}
+            pending = {field: base.get(field) for field in self.FIELDS}
+            pending["video_id"] = video_id
+            self._pending[video_id] = pending
+        pending.update((field, metadata[field]) for field in self.FIELDS if field in metadata)
+        
+        if row >= 0:
+            self.rows[row].update((field, pending[field]) for field in self.FIELDS)
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
+        
+        self._flush_timer.start()
+    
+    def flush(self):
+        """
+        Save pending edits now.
+        
+        Returns:
+            int: Number of videos saved
+        """
+        self._flush_timer.stop()
+        if not self._pending:
+            return 0
+        
+        entries = list(self._pending.values())
+        self._pending = {}
+        try:
+            return self.db.add_metadata_bulk(entries)
+        except Exception as e:
+            # Keep the edits for the next flush, unless newer ones replaced them
+            for entry in entries:
+                self._pending.setdefault(entry["video_id"], entry)
+            self._flush_timer.start()
+            print(f"Error saving metadata: {e}")
+            return 0
+    
+    def _page(self, offset, limit):
+        """Read rows from the database, with pending edits applied"""
+        page = self.db.get_metadata_page(offset, limit)
+        for video in page:
+            pending = self._pending.get(video["id"])
+            if pending is not None:
+                video.update((field, pending[field]) for field in self.FIELDS)
+        return page
+    
+    def _channel_name(self, channel_id):
+        """Display name of a channel"""
+        channel = self.config.get("channels", {}).get(channel_id) if channel_id else None
+        return channel["name"] if channel else "Not assigned"
@@ -1,31 +1,43 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QTableWidget, QTableWidgetItem, QTextEdit, QLineEdit,
+    QTableView, QAbstractItemView, QTextEdit, QLineEdit,
     QFormLayout, QGroupBox, QCheckBox, QSpinBox, QFileDialog, 
-    QMessageBox, QProgressBar, QComboBox
+    QMessageBox, QProgressBar, QComboBox, QCompleter
 )
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import Qt, Signal, QStringListModel
 import os
 
+from database.db_manager import DatabaseManager
+from gui.metadata_model import MetadataModel
+from gui.queue_model import QueueItemDelegate
+from metadata.generator import MetadataGenerator
+from metadata.tag_index import TagIndex
+
 class MetadataTab(QWidget):
     """
     Tab for generating and editing video metadata for YouTube uploads.
-    Provides interface for AI-assisted metadata creation and optimization.
+    Metadata is generated from the source title and hashtags using the
+    templates and rules in the ``metadata`` settings, then edited by hand.
+    Videos and their metadata live in the database, so edits survive restarts.
     """
     
     # Signals for inter-tab communication
     metadata_ready = Signal(str, str)  # (video_path, title)
     
-    def __init__(self, config):
+    def __init__(self, config, db=None):
         """
         Initialize the metadata tab.
         
         Args:
             config: Application configuration manager
+            db: Database manager holding the videos and their metadata (optional)
         """
         super().__init__()
         self.config = config
-        self.videos = []  # List of videos with metadata
+        self.db = db or DatabaseManager()
+        self.tag_index = TagIndex(self.db)
+        self.generator = MetadataGenerator(config, self.tag_index)
+        self.current_video_id = None  # Video shown in the editor
         self.init_ui()
     
     def init_ui(self):
@@ -35,8 +47,9 @@ class MetadataTab(QWidget):
         
         # Info label
         info_label = QLabel(
-            "This tab will allow you to generate and edit metadata for YouTube uploads.\n"
-            "AI-assisted metadata generation will be implemented in a future version."
+            "Generate and edit metadata for YouTube uploads.\n"
+            "Titles, descriptions and tags are generated from the original TikTok title and hashtags "
+            "using the templates and rules in the metadata settings."
         )
         info_label.setWordWrap(True)
         info_label.setAlignment(Qt.AlignCenter)
@@ -46,14 +59,26 @@ class MetadataTab(QWidget):
         videos_group = QGroupBox("Videos Ready for Metadata")
         videos_layout = QVBoxLayout(videos_group)
         
-        self.videos_table = QTableWidget(0, 4)  # rows, columns
-        self.videos_table.setHorizontalHeaderLabels(["Video", "Title", "Channel", "Actions"])
+        # Rows are paged in from the database, edits are saved in batches
+        self.model = MetadataModel(self.db, self.config, self)
+        self.videos_delegate = QueueItemDelegate(self)
+        self.videos_delegate.action_triggered.connect(self.on_video_action)
+        
+        self.videos_table = QTableView()
+        self.videos_table.setModel(self.model)
+        self.videos_table.setItemDelegate(self.videos_delegate)
+        self.videos_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.videos_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.videos_table.setColumnWidth(0, 250)  # Video
         self.videos_table.setColumnWidth(1, 300)  # Title
         self.videos_table.setColumnWidth(2, 150)  # Channel
         self.videos_table.setColumnWidth(3, 150)  # Actions
         videos_layout.addWidget(self.videos_table)
         
+        self.generate_batch_btn = QPushButton("Generate Missing Metadata")
+        self.generate_batch_btn.clicked.connect(self.generate_for_all)
+        videos_layout.addWidget(self.generate_batch_btn)
+        
         main_layout.addWidget(videos_group)
         
         # Metadata editor
@@ -76,26 +101,34 @@ class MetadataTab(QWidget):
         self.tags_input.setPlaceholderText("Enter tags separated by commas...")
         editor_layout.addRow("Tags:", self.tags_input)
         
-        # AI generation buttons
+        # Suggestions for the tag being typed, ranked by how often it was used
+        self.tag_model = QStringListModel(self)
+        self.tag_completer = QCompleter(self.tag_model, self)
+        self.tag_completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.tag_completer.setWidget(self.tags_input)
+        self.tag_completer.activated[str].connect(self.insert_tag)
+        self.tags_input.textEdited.connect(self.suggest_tags)
+        
+        # Generation buttons
         buttons_layout = QHBoxLayout()
         
         self.generate_title_btn = QPushButton("Generate Title")
-        self.generate_title_btn.setEnabled(False)  # Disabled for now
+        self.generate_title_btn.clicked.connect(lambda: self.generate_fields(["title"]))
         buttons_layout.addWidget(self.generate_title_btn)
         
         self.generate_desc_btn = QPushButton("Generate Description")
-        self.generate_desc_btn.setEnabled(False)  # Disabled for now
+        self.generate_desc_btn.clicked.connect(lambda: self.generate_fields(["description"]))
         buttons_layout.addWidget(self.generate_desc_btn)
         
         self.generate_tags_btn = QPushButton("Generate Tags")
-        self.generate_tags_btn.setEnabled(False)  # Disabled for now
+        self.generate_tags_btn.clicked.connect(lambda: self.generate_fields(["tags"]))
         buttons_layout.addWidget(self.generate_tags_btn)
         
         self.generate_all_btn = QPushButton("Generate All")
-        self.generate_all_btn.setEnabled(False)  # Disabled for now
+        self.generate_all_btn.clicked.connect(lambda: self.generate_fields(["title", "description", "tags"]))
         buttons_layout.addWidget(self.generate_all_btn)
         
-        editor_layout.addRow("AI Generation:", buttons_layout)
+        editor_layout.addRow("Generation:", buttons_layout)
         
         # Save and Next buttons
         actions_layout = QHBoxLayout()
@@ -112,8 +145,8 @@ class MetadataTab(QWidget):
         
         main_layout.addWidget(editor_group)
         
-        # Initialize the videos list
-        self.update_videos_table()
+        # Show what the database already has
+        self.model.reload()
     
     def add_video(self, video_path, title=""):
         """
@@ -124,114 +157,137 @@ class MetadataTab(QWidget):
             video_path: Path to the video file
             title: Video title (optional)
         """
-        # Check if the video exists
-        if not os.path.exists(video_path):
+        video = self.db.get_video_for_upload(video_path)
+        if video is None:
+            print(f"Video not found in database: {video_path}")
             return
         
-        # Check if video is already in the list
-        for video in self.videos:
-            if video["video_path"] == video_path:
-                # Already exists, just update it
-                video["title"] = title
-                self.update_videos_table()
-                return
-        
-        # Add to list
-        self.videos.append({
-            "video_path": video_path,
-            "title": title,
-            "description": "",
-            "tags": "",
-            "channel": "Default", # This would be updated with actual channel info
-            "thumbnail": ""
-        })
+        # New videos change the tag counts
+        self.tag_index.refresh()
+        
+        # Start from generated metadata unless the video has some already
+        if not video["meta_title"]:
+            video["title"] = video["title"] or title
+            generated = self.generator.generate(video)
+            self.model.update_metadata(video["id"], generated)
+        
+        self.model.reload()
+    
+    def on_video_action(self, row, action):
+        """
+        Handle an action button clicked in the videos table.
         
-        # Update the table
-        self.update_videos_table()
+        Args:
+            row: Row of the video
+            action: Label of the clicked button
+        """
+        if action == "Edit":
+            self.edit_metadata(row)
+    
+    def suggest_tags(self, text):
+        """Show the most used tags starting with the tag being typed"""
+        video = self._current_video()
+        suggestions = self.tag_index.complete(text.split(",")[-1], video["channel_id"] if video else None)
+        self.tag_model.setStringList(suggestions)
+        if suggestions:
+            self.tag_completer.complete()
+        else:
+            self.tag_completer.popup().hide()
     
-    def update_videos_table(self):
-        """Update the videos table display"""
-        # Clear the table
-        self.videos_table.setRowCount(0)
-        
-        # Add videos to table
-        for i, video in enumerate(self.videos):
-            self.videos_table.insertRow(i)
-            
-            # Video filename
-            filename = os.path.basename(video["video_path"])
-            self.videos_table.setItem(i, 0, QTableWidgetItem(filename))
-            
-            # Title
-            self.videos_table.setItem(i, 1, QTableWidgetItem(video["title"]))
-            
-            # Channel
-            self.videos_table.setItem(i, 2, QTableWidgetItem(video["channel"]))
-            
-            # Actions button
-            actions_widget = QWidget()
-            actions_layout = QHBoxLayout(actions_widget)
-            actions_layout.setContentsMargins(0, 0, 0, 0)
-            
-            edit_btn = QPushButton("Edit")
-            edit_btn.clicked.connect(lambda _, idx=i: self.edit_metadata(idx))
-            actions_layout.addWidget(edit_btn)
-            
-            self.videos_table.setCellWidget(i, 3, actions_widget)
+    def insert_tag(self, tag):
+        """Replace the tag being typed with a suggestion"""
+        tags = [part.strip() for part in self.tags_input.text().split(",")[:-1] if part.strip()]
+        self.tags_input.setText(",".join(tags + [tag]) + ",")
+    
+    def generate_fields(self, fields):
+        """
+        Generate metadata fields for the video being edited.
+        
+        Args:
+            fields: Names of the fields to fill in ("title", "description", "tags")
+        """
+        video = self._current_video()
+        if video is None:
+            QMessageBox.warning(self, "No Video Selected", "Please select a video first.")
+            return
+        
+        generated = self.generator.generate(dict(video, title=video["source_title"]))
+        
+        if "title" in fields:
+            self.title_input.setText(generated["title"])
+        if "description" in fields:
+            self.description_input.setText(generated["description"])
+        if "tags" in fields:
+            self.tags_input.setText(generated["tags"])
+    
+    def generate_for_all(self):
+        """Generate metadata for every processed video without any and save it in one batch"""
+        # Edits waiting to be saved take precedence over generated metadata
+        self.model.flush()
+        
+        videos = self.db.get_videos_by_status("processed")
+        if not videos:
+            QMessageBox.information(self, "No Videos", "All processed videos already have metadata.")
+            return
+        
+        count = self.db.add_metadata_bulk(self.generator.generate_batch(videos))
+        self.model.reload()
+        self.edit_metadata(self.model.row_of(self.current_video_id))
+        
+        QMessageBox.information(self, "Metadata Generated", f"Generated metadata for {count} videos.")
     
     def edit_metadata(self, index):
         """Edit metadata for a specific video"""
-        if index < 0 or index >= len(self.videos):
+        video = self.model.video(index)
+        if video is None:
             return
-            
-        # Get the video data
-        video = self.videos[index]
         
         # Populate the form
-        self.title_input.setText(video["title"])
-        self.description_input.setText(video["description"])
-        self.tags_input.setText(video["tags"])
+        self.title_input.setText(video["title"] or video["source_title"] or "")
+        self.description_input.setText(video["description"] or "")
+        self.tags_input.setText(video["tags"] or "")
         
-        # Store the index of the video being edited
-        self.current_edit_index = index
+        # Remember which video is being edited; its row can change on reload
+        self.current_video_id = video["id"]
     
     def save_metadata(self):
         """Save the current metadata to the selected video"""
-        if not hasattr(self, 'current_edit_index'):
+        video = self._current_video()
+        if video is None:
             QMessageBox.warning(self, "No Video Selected", "Please select a video first.")
             return
-            
-        if self.current_edit_index < 0 or self.current_edit_index >= len(self.videos):
-            return
-            
-        # Update the video data
-        self.videos[self.current_edit_index]["title"] = self.title_input.text()
-        self.videos[self.current_edit_index]["description"] = self.description_input.toPlainText()
-        self.videos[self.current_edit_index]["tags"] = self.tags_input.text()
         
-        # Update the table
-        self.update_videos_table()
+        # Written to the database with the next batch of edits
+        self.model.update_metadata(video["id"], {
+            "title": self.title_input.text(),
+            "description": self.description_input.toPlainText(),
+            "tags": self.tags_input.text()
+        })
         
         QMessageBox.information(self, "Metadata Saved", "Metadata has been saved.")
     
     def next_step(self):
         """Move to the next step (upload tab)"""
-        if not hasattr(self, 'current_edit_index'):
+        if self._current_video() is None:
             QMessageBox.warning(self, "No Video Selected", "Please select a video first.")
             return
-            
-        if self.current_edit_index < 0 or self.current_edit_index >= len(self.videos):
-            return
-            
-        # Save metadata
+        
+        # Save metadata, now rather than later so the upload tab reads it
         self.save_metadata()
+        self.model.flush()
         
         # Emit signal to move to upload tab
-        video = self.videos[self.current_edit_index]
-        self.metadata_ready.emit(video["video_path"], video["title"])
+        video = self._current_video()
+        self.metadata_ready.emit(video["processed_filepath"] or video["filepath"], video["title"])
         
         QMessageBox.information(
             self,
             "Ready for Upload",
             f"Video \"{video['title']}\" is ready for upload. Switching to Upload tab."
-        )  
+        )
+    
+    def _current_video(self):
+        """The video shown in the editor, or None"""
+        if self.current_video_id is None:
+            return None
+        return self.model.video(self.model.row_of(self.current_video_id))
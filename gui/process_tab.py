@@ -1,8 +1,8 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QTableWidget, QTableWidgetItem, QSlider, QDoubleSpinBox,
+    QTableView, QAbstractItemView, QSlider, QDoubleSpinBox,
     QFormLayout, QGroupBox, QCheckBox, QSpinBox, QFileDialog, 
-    QMessageBox, QProgressBar, QComboBox, QScrollArea
+    QMessageBox, QComboBox, QScrollArea
 )
 from PySide6.QtCore import Qt, Signal, QUrl, QTimer
 from PySide6.QtGui import QDesktopServices
@@ -10,7 +10,11 @@ import os
 import threading
 import time
 
+from database.db_manager import DatabaseManager
 from processor.ffmpeg_handler import FFmpegHandler
+from processor.scheduler import ProcessingScheduler
+from gui.queue_model import ProcessingQueueModel, QueueItemDelegate
+from gui.event_bus import WorkerEventBus
 
 class SliderWithSpinBox(QWidget):
     """
@@ -58,7 +62,7 @@ class SliderWithSpinBox(QWidget):
         else:
             self.spinbox = QSpinBox()
             self.spinbox.setSingleStep(int(step))
-            
+        
         self.spinbox.setMinimum(min_val)
         self.spinbox.setMaximum(max_val)
         self.spinbox.setValue(default_val)
@@ -74,7 +78,7 @@ class SliderWithSpinBox(QWidget):
             value_to_set = value / self.multiplier
         else:
             value_to_set = value
-            
+        
         self.spinbox.blockSignals(True)
         self.spinbox.setValue(value_to_set)
         self.spinbox.blockSignals(False)
@@ -109,19 +113,35 @@ class ProcessTab(QWidget):
     # Signals for inter-tab communication
     video_processed = Signal(str, str)  # (video_path, title)
     
-    def __init__(self, config):
+    # Display names for the statuses stored in the processing table
+    STATUS_NAMES = {
+        "queued": "Queued",
+        "processing": "Processing",
+        "completed": "Completed",
+        "failed": "Failed"
+    }
+    
+    def __init__(self, config, db=None):
         """
         Initialize the process tab.
         
         Args:
             config: Application configuration manager
+            db: Database manager backing the processing queue (optional)
         """
         super().__init__()
         self.config = config
-        self.ffmpeg = FFmpegHandler(config)
+        self.db = db or DatabaseManager()
+        self.ffmpeg = FFmpegHandler(config, self.db)
+        self.scheduler = ProcessingScheduler(config, self.db)
         self.processing_queue = []
         self.currently_processing = False
+        self.events = WorkerEventBus(self)
         self.init_ui()
+        self.restore_queue()
+        
+        # Keep the channel list current when channels are added or removed elsewhere
+        config.subscribe("channels", lambda channels: self.events.post_call(self._on_channels_changed))
     
     def init_ui(self):
         """Set up the user interface for the process tab"""
@@ -305,9 +325,17 @@ class ProcessTab(QWidget):
         queue_group = QGroupBox("Processing Queue")
         queue_layout = QVBoxLayout(queue_group)
         
-        # Queue table
-        self.queue_table = QTableWidget(0, 5)  # rows, columns
-        self.queue_table.setHorizontalHeaderLabels(["Video", "Channel", "Status", "Progress", "Actions"])
+        # Queue table (model/view, so rows are only repainted when they change)
+        self.queue_model = ProcessingQueueModel(self.processing_queue, self)
+        self.queue_delegate = QueueItemDelegate(self)
+        self.queue_delegate.action_triggered.connect(self.on_queue_action)
+        
+        self.queue_table = QTableView()
+        self.queue_table.setModel(self.queue_model)
+        self.queue_table.setItemDelegate(self.queue_delegate)
+        self.queue_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.queue_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.queue_table.setMouseTracking(True)
         self.queue_table.setColumnWidth(0, 250)  # Video
         self.queue_table.setColumnWidth(1, 100)  # Channel
         self.queue_table.setColumnWidth(2, 100)  # Status
@@ -334,10 +362,11 @@ class ProcessTab(QWidget):
         
         main_layout.addWidget(queue_group)
         
-        # Set up processing queue update timer
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.update_queue_display)
-        self.update_timer.start(500)  # Update every half second
+        # Worker threads report back through the event bus, which delivers
+        # coalesced updates on the GUI thread
+        self.events.progress.connect(self._on_progress)
+        self.events.finished.connect(self._on_processing_finished)
+        self.events.failed.connect(self._on_processing_failed)
     
     def load_channels(self):
         """Load available YouTube channels from config into the combobox"""
@@ -351,6 +380,12 @@ class ProcessTab(QWidget):
         for channel_id, channel_info in channels.items():
             self.channel_combo.addItem(channel_info["name"], channel_id)
     
+    def _on_channels_changed(self):
+        """Reload the channel list, keeping the selection (GUI thread)"""
+        channel_id = self.channel_combo.currentData()
+        self.load_channels()
+        self.channel_combo.setCurrentIndex(max(self.channel_combo.findData(channel_id), 0))
+    
     def select_watermark(self):
         """Open file dialog to select a watermark image"""
         channel_id = self.channel_combo.currentData()
@@ -383,11 +418,9 @@ class ProcessTab(QWidget):
                 shutil.copy2(file_path, new_path)
                 
                 # Update the channel's watermark path
-                channels = self.config.get("channels", {})
-                if channel_id in channels:
-                    channels[channel_id]["watermark"] = new_path
-                    self.config.set("channels", channels)
-                    
+                if channel_id in self.config.get("channels", {}):
+                    self.config.set(f"channels.{channel_id}.watermark", new_path)
+                
                 QMessageBox.information(
                     self,
                     "Watermark Set",
@@ -433,11 +466,11 @@ class ProcessTab(QWidget):
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Error inspecting video: {str(e)}")
             return
-            
+        
         # Add the video to the queue
         if not title:
             title = os.path.basename(video_path)
-            
+        
         # Get channel info
         channel_id = self.channel_combo.currentData()
         channel_name = self.channel_combo.currentText()
@@ -451,225 +484,249 @@ class ProcessTab(QWidget):
                     "This video is already in the processing queue."
                 )
                 return
-                
+        
+        # Persist the queue entry so it survives restarts
+        try:
+            video_id = self.db.add_video(video_path, title)
+            self.db.enqueue_processing(video_id, channel_id)
+        except Exception as e:
+            QMessageBox.warning(self, "Database Error", f"Error queuing video: {str(e)}")
+            return
+        
         # Add to queue
         queue_item = {
+            "id": video_id,
             "video_path": video_path,
             "title": title,
             "channel_id": channel_id,
             "channel_name": channel_name,
             "status": "Queued",
             "progress": 0,
-            "output_path": None
+            "output_path": None,
+            "priority": 0
         }
         
-        self.processing_queue.append(queue_item)
-        
-        # Update display
-        self.update_queue_display()
+        self.queue_model.append_item(queue_item)
         
         # Start processing if not already processing
         if not self.currently_processing and len(self.processing_queue) == 1:
             # Auto-start processing if this is the first item
             self.process_next()
     
-    def update_queue_display(self):
-        """Update the processing queue table display"""
-        # Preserve the current selection
-        selected_rows = self.queue_table.selectionModel().selectedRows()
-        selected_item = None
-        if selected_rows:
-            selected_item = self.processing_queue[selected_rows[0].row()] if selected_rows[0].row() < len(self.processing_queue) else None
-        
-        # Clear and update the table
-        self.queue_table.setRowCount(len(self.processing_queue))
-        
-        for i, item in enumerate(self.processing_queue):
-            # Video title/path
-            title_item = QTableWidgetItem(item["title"])
-            title_item.setToolTip(item["video_path"])
-            self.queue_table.setItem(i, 0, title_item)
-            
-            # Channel
-            channel_item = QTableWidgetItem(item["channel_name"])
-            self.queue_table.setItem(i, 1, channel_item)
-            
-            # Status
-            status_item = QTableWidgetItem(item["status"])
-            self.queue_table.setItem(i, 2, status_item)
-            
-            # Progress bar
-            if "progress_bar" not in item:
-                progress_bar = QProgressBar()
-                progress_bar.setMinimum(0)
-                progress_bar.setMaximum(100)
-                progress_bar.setValue(item["progress"])
-                self.queue_table.setCellWidget(i, 3, progress_bar)
-                item["progress_bar"] = progress_bar
-            else:
-                item["progress_bar"].setValue(item["progress"])
-            
-            # Actions button
-            actions_widget = QWidget()
-            actions_layout = QHBoxLayout(actions_widget)
-            actions_layout.setContentsMargins(0, 0, 0, 0)
+    def restore_queue(self):
+        """
+        Load the persistent processing queue from the database.
+        
+        Jobs that were interrupted by a crash or restart are requeued and their
+        partial outputs deleted, then processing resumes automatically.
+        """
+        for output_path in self.db.recover_interrupted_processing():
+            self.ffmpeg.discard_partial_output(output_path)
+        
+        self.load_queue_entries()
+    
+    def load_queue_entries(self):
+        """
+        Add queue entries from the database that aren't shown yet.
+        
+        Picks up videos queued outside this tab, e.g. by the folder watcher,
+        and starts processing if idle.
+        """
+        shown = {item["id"] for item in self.processing_queue}
+        
+        for row in self.db.get_processing_queue():
+            if row["video_id"] in shown:
+                continue
             
-            # Different buttons based on status
-            if item["status"] == "Queued":
-                process_btn = QPushButton("Process")
-                process_btn.clicked.connect(lambda _, idx=i: self.process_item(idx))
-                actions_layout.addWidget(process_btn)
-                
-                remove_btn = QPushButton("Remove")
-                remove_btn.clicked.connect(lambda _, idx=i: self.remove_item(idx))
-                actions_layout.addWidget(remove_btn)
-            elif item["status"] == "Processing":
-                cancel_btn = QPushButton("Cancel")
-                cancel_btn.clicked.connect(lambda _, idx=i: self.cancel_item(idx))
-                actions_layout.addWidget(cancel_btn)
-            elif item["status"] == "Completed":
-                view_btn = QPushButton("View")
-                view_btn.clicked.connect(lambda _, path=item["output_path"]: 
-                                      QDesktopServices.openUrl(QUrl.fromLocalFile(os.path.dirname(path))))
-                actions_layout.addWidget(view_btn)
-                
-                next_btn = QPushButton("Next Step")
-                next_btn.clicked.connect(lambda _, path=item["output_path"], title=item["title"]: 
-                                      self.video_processed.emit(path, title))
-                actions_layout.addWidget(next_btn)
-            elif item["status"] == "Failed":
-                retry_btn = QPushButton("Retry")
-                retry_btn.clicked.connect(lambda _, idx=i: self.retry_item(idx))
-                actions_layout.addWidget(retry_btn)
-                
-                remove_btn = QPushButton("Remove")
-                remove_btn.clicked.connect(lambda _, idx=i: self.remove_item(idx))
-                actions_layout.addWidget(remove_btn)
+            status = self.STATUS_NAMES[row["status"]]
+            channel_index = self.channel_combo.findData(row["channel_id"] or "")
             
-            self.queue_table.setCellWidget(i, 4, actions_widget)
+            queue_item = {
+                "id": row["video_id"],
+                "video_path": row["filepath"],
+                "title": row["title"] or os.path.basename(row["filepath"]),
+                "channel_id": row["channel_id"] or "",
+                "channel_name": self.channel_combo.itemText(max(channel_index, 0)),
+                "status": status,
+                "progress": 100 if status == "Completed" else 0,
+                "output_path": row["processed_filepath"] if status == "Completed" else None,
+                "priority": row["priority"] or 0
+            }
+            if status == "Failed" and row["error_message"]:
+                queue_item["error"] = row["error_message"]
             
-        # Restore selection if possible
-        if selected_item:
-            for i, item in enumerate(self.processing_queue):
-                if item is selected_item:
-                    self.queue_table.selectRow(i)
-                    break
+            self.queue_model.append_item(queue_item)
+        
+        if any(item["status"] == "Queued" for item in self.processing_queue):
+            self.process_next()
+    
+    def update_queue_display(self):
+        """Repaint the queue rows whose status or progress changed"""
+        self.queue_model.refresh()
+    
+    def on_queue_action(self, index, action):
+        """
+        Handle an action button clicked in the queue table.
+        
+        Args:
+            index: Row of the queue item
+            action: Label of the clicked button
+        """
+        item = self.queue_model.item(index)
+        if item is None:
+            return
+        
+        if action == "Process":
+            self.process_item(index)
+        elif action == "Remove":
+            self.remove_item(index)
+        elif action == "Cancel":
+            self.cancel_item(index)
+        elif action == "Retry":
+            self.retry_item(index)
+        elif action == "View":
+            QDesktopServices.openUrl(QUrl.fromLocalFile(os.path.dirname(item["output_path"])))
+        elif action == "Next Step":
+            self.video_processed.emit(item["output_path"], item["title"])
     
     def process_item(self, index):
         """Process a specific queue item by index"""
         if index < 0 or index >= len(self.processing_queue):
             return
-            
-        # If already processing, just move this item to the front
+        
+        # If already processing, make this item the next one to be processed
         if self.currently_processing:
-            # Reorder the queue to process this item next
-            item = self.processing_queue.pop(index)
-            
-            # Find the currently processing item
-            for i, current_item in enumerate(self.processing_queue):
-                if current_item["status"] == "Processing":
-                    # Insert right after the current item
-                    self.processing_queue.insert(i + 1, item)
-                    break
-            else:
-                # If no item is processing (shouldn't happen), put at front
-                self.processing_queue.insert(0, item)
-                
-            self.update_queue_display()
+            # Raising its priority above everything else puts it ahead in the
+            # scheduler, and the new order also survives a restart
+            item = self.processing_queue[index]
+            item["priority"] = max(queued.get("priority", 0) for queued in self.processing_queue) + 1
+            self.db.set_processing_priority(item["id"], item["priority"])
+            return
+        
+        # Record the output path first so a partial file can be cleaned up after a crash
+        item = self.processing_queue[index]
+        output_path = self.ffmpeg.make_output_path(item["video_path"])
+        if not self.db.start_processing(item["id"], output_path):
+            # Cancelled or claimed by another worker (e.g. the daemon) in the meantime
+            self.queue_model.remove_row(index)
+            self.process_next()
             return
         
         # If not processing, start processing this item
         self.currently_processing = True
+        item["output_path"] = output_path
+        self.scheduler.started(item)
         
         # Update status
-        self.processing_queue[index]["status"] = "Processing"
-        self.processing_queue[index]["progress"] = 0
-        self.update_queue_display()
+        item["status"] = "Processing"
+        item["progress"] = 0
+        self.queue_model.item_changed(index)
         
         # Start processing thread
         threading.Thread(
             target=self._process_video_thread,
-            args=(index,),
+            args=(dict(self.processing_queue[index]),),
             daemon=True
         ).start()
     
-    def _process_video_thread(self, index):
-        """Background thread for video processing"""
-        if index < 0 or index >= len(self.processing_queue):
-            self.currently_processing = False
-            return
-            
-        item = self.processing_queue[index]
+    def _process_video_thread(self, item):
+        """
+        Background thread for video processing.
         
+        The thread works on a copy of the queue item and never touches the queue
+        or any widget; results are reported through the event bus instead.
+        """
         try:
             # Process the video using FFmpeg
             output_path = self.ffmpeg.process_video(
                 item["video_path"],
                 item["channel_id"],
-                lambda progress: self._update_progress(index, progress)
+                lambda progress: self.events.post_progress(item["id"], progress),
+                video_id=item["id"],
+                output_path=item["output_path"]
             )
-            
-            # Update status and output path
-            self.processing_queue[index]["status"] = "Completed"
-            self.processing_queue[index]["progress"] = 100
-            self.processing_queue[index]["output_path"] = output_path
-            
-            # Update UI
-            self.update_queue_display()
-            
+            self.events.post_finished(item["id"], output_path)
+        
         except Exception as e:
-            # Update status
-            self.processing_queue[index]["status"] = "Failed"
-            self.processing_queue[index]["progress"] = 0
-            self.processing_queue[index]["error"] = str(e)
-            
-            # Show error message
-            def show_error():
-                QMessageBox.critical(
-                    self,
-                    "Processing Error",
-                    f"Error processing video: {str(e)}"
-                )
-            
-            # Schedule UI update from main thread
-            QTimer.singleShot(0, show_error)
-            
-        finally:
-            # Mark as no longer processing
-            self.currently_processing = False
-            
-            # Process next item if any
-            queued_items = [item for item in self.processing_queue if item["status"] == "Queued"]
-            if queued_items:
-                self.process_next()
+            self.events.post_failed(item["id"], e)
     
-    def _update_progress(self, index, progress):
-        """Update progress for a queue item from processing thread"""
-        if index < 0 or index >= len(self.processing_queue):
+    def _find_item(self, item_id):
+        """Find a queue item and its row by ID, returning (row, item)"""
+        for row, item in enumerate(self.processing_queue):
+            if item["id"] == item_id:
+                return row, item
+        return -1, None
+    
+    def _on_progress(self, item_id, progress):
+        """Update progress for a queue item (GUI thread)"""
+        row, item = self._find_item(item_id)
+        if item is None or item["status"] != "Processing":
             return
-            
-        self.processing_queue[index]["progress"] = progress
         
-        # No need to call update_queue_display() here
-        # as it's called by the timer
+        item["progress"] = progress
+        self.queue_model.item_changed(row)
+    
+    def _on_processing_finished(self, item_id, output_path):
+        """Mark a queue item as completed (GUI thread)"""
+        self.db.add_processing_info(item_id, output_path, self.config.get("processing", {}))
+        
+        row, item = self._find_item(item_id)
+        if item is not None:
+            # Update status and output path
+            item["status"] = "Completed"
+            item["progress"] = 100
+            item["output_path"] = output_path
+            self.queue_model.item_changed(row)
+        
+        self._start_next_after_item()
+    
+    def _on_processing_failed(self, item_id, error):
+        """Mark a queue item as failed and report the error (GUI thread)"""
+        self.db.record_processing_failure(item_id, error)
+        
+        row, item = self._find_item(item_id)
+        if item is not None:
+            # Update status
+            item["status"] = "Failed"
+            item["progress"] = 0
+            item["output_path"] = None
+            item["error"] = error
+            self.queue_model.item_changed(row)
+        
+        self._start_next_after_item()
+        
+        # Show error message
+        QMessageBox.critical(
+            self,
+            "Processing Error",
+            f"Error processing video: {error}"
+        )
+    
+    def _start_next_after_item(self):
+        """Mark processing as idle and start the next queued item, if any"""
+        # Mark as no longer processing
+        self.currently_processing = False
+        
+        # Process next item if any
+        self.process_next()
     
     def process_next(self):
         """Process the next queued item"""
         if self.currently_processing:
             return
-            
-        # Find the next queued item
-        for i, item in enumerate(self.processing_queue):
-            if item["status"] == "Queued":
-                self.process_item(i)
-                break
+        
+        # Let the scheduler pick by priority, upload deadline and channel fair share
+        queued = [item for item in self.processing_queue if item["status"] == "Queued"]
+        item = self.scheduler.next_item(queued)
+        if item is not None:
+            self.process_item(self.queue_model.row_of(item))
     
     def process_all(self):
         """Process all queued items"""
         if not self.processing_queue:
             QMessageBox.information(self, "Empty Queue", "No videos in the processing queue.")
             return
-            
+        
         # Start processing
         self.process_next()
     
@@ -677,28 +734,30 @@ class ProcessTab(QWidget):
         """Remove an item from the queue"""
         if index < 0 or index >= len(self.processing_queue):
             return
-            
+        
         # Can only remove queued or failed items
         if self.processing_queue[index]["status"] not in ["Queued", "Failed", "Completed"]:
             QMessageBox.warning(self, "Cannot Remove", "Cannot remove items that are currently processing.")
             return
-            
+        
         # Remove the item
-        self.processing_queue.pop(index)
-        self.update_queue_display()
+        self.db.remove_from_processing_queue(self.processing_queue[index]["id"])
+        self.queue_model.remove_row(index)
     
     def retry_item(self, index):
         """Retry a failed item"""
         if index < 0 or index >= len(self.processing_queue):
             return
-            
+        
         # Reset status
+        item = self.processing_queue[index]
+        self.db.enqueue_processing(item["id"], item["channel_id"], item.get("priority", 0))
         self.processing_queue[index]["status"] = "Queued"
         self.processing_queue[index]["progress"] = 0
         self.processing_queue[index].pop("error", None)
         
         # Update display
-        self.update_queue_display()
+        self.queue_model.item_changed(index)
         
         # Start processing if not already processing
         if not self.currently_processing:
@@ -734,8 +793,8 @@ class ProcessTab(QWidget):
         
         if reply == QMessageBox.Yes:
             # Clear the queue
-            self.processing_queue = []
-            self.update_queue_display()
+            self.db.clear_processing_queue()
+            self.queue_model.clear()
     
     def open_output_folder(self):
         """Open the output folder in file explorer"""
@@ -747,4 +806,4 @@ class ProcessTab(QWidget):
                 os.makedirs(output_dir, exist_ok=True)
                 QDesktopServices.openUrl(QUrl.fromLocalFile(output_dir))
             except Exception as e:
-                QMessageBox.warning(self, "Error", f"Failed to open output folder: {str(e)}")  
+                QMessageBox.warning(self, "Error", f"Failed to open output folder: {str(e)}")
@@ -0,0 +1,284 @@
+from PySide6.QtWidgets import (
+    QApplication, QStyle, QStyledItemDelegate,
+    QStyleOptionButton, QStyleOptionProgressBar
+)
+from PySide6.QtCore import Qt, Signal, QAbstractTableModel, QModelIndex, QEvent, QRect
+
+class ProcessingQueueModel(QAbstractTableModel):
+    """
+    Table model for the video processing queue.
+    
+    Rows are the queue item dictionaries used by the process tab. Instead of
+    rebuilding the table, the model remembers what each row last displayed and
+    only emits dataChanged for rows whose status or progress actually changed.
+    """
+    
+    VIDEO_COLUMN = 0
+    CHANNEL_COLUMN = 1
+    STATUS_COLUMN = 2
+    PROGRESS_COLUMN = 3
+    ACTIONS_COLUMN = 4
+    
+    HEADERS = ["Video", "Channel", "Status", "Progress", "Actions"]
+    
+    # Custom data roles used by the delegate
+    ProgressRole = Qt.UserRole + 1
+    ActionsRole = Qt.UserRole + 2
+    
+    # Buttons offered for each status
+    ACTIONS = {
+        "Queued": ["Process", "Remove"],
+        "Processing": ["Cancel"],
+        "Completed": ["View", "Next Step"],
+        "Failed": ["Retry", "Remove"]
+    }
+    
+    def __init__(self, items=None, parent=None):
+        """
+        Initialize the queue model.
+        
+        Args:
+            items: List of queue item dictionaries (optional)
+            parent: Parent object
+        """
+        super().__init__(parent)
+        self.items = items if items is not None else []
+        self._rendered = [self._snapshot(item) for item in self.items]
+    
+    def rowCount(self, parent=QModelIndex()):
+        """Number of queue items"""
+        return 0 if parent.isValid() else len(self.items)
+    
+    def columnCount(self, parent=QModelIndex()):
+        """Number of table columns"""
+        return 0 if parent.isValid() else len(self.HEADERS)
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        """Column headers"""
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+    
+    def data(self, index, role=Qt.DisplayRole):
+        """Data for a table cell"""
+        if not index.isValid() or index.row() >= len(self.items):
+            return None
+        
+        item = self.items[index.row()]
+        column = index.column()
+        
+        if role == Qt.DisplayRole:
+            if column == self.VIDEO_COLUMN:
+                return item["title"]
+            if column == self.CHANNEL_COLUMN:
+                return item["channel_name"]
+            if column == self.STATUS_COLUMN:
+                return item["status"]
+        elif role == Qt.ToolTipRole:
+            if column == self.VIDEO_COLUMN:
+                return item["video_path"]
+            if column == self.STATUS_COLUMN and item.get("error"):
+                return item["error"]
+        elif role == self.ProgressRole and column == self.PROGRESS_COLUMN:
+            return item["progress"]
+        elif role == self.ActionsRole and column == self.ACTIONS_COLUMN:
+            return self.ACTIONS.get(item["status"], [])
+        
+        return None
+    
+    def item(self, row):
+        """Get the queue item at a row, or None if out of range"""
+        if 0 <= row < len(self.items):
+            return self.items[row]
+        return None
+    
+    def row_of(self, item):
+        """Get the row of a queue item, or -1 if it is no longer queued"""
+        for row, queued in enumerate(self.items):
+            if queued is item:
+                return row
+        return -1
+    
+    def append_item(self, item):
+        """Add a queue item at the end"""
+        row = len(self.items)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.items.append(item)
+        self._rendered.append(self._snapshot(item))
+        self.endInsertRows()
+    
+    def remove_row(self, row):
+        """Remove the queue item at a row"""
+        if not 0 <= row < len(self.items):
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.items.pop(row)
+        self._rendered.pop(row)
+        self.endRemoveRows()
+    
+    def move_row(self, source, destination):
+        """
+        Move a queue item so it ends up at the destination row.
+        
+        Args:
+            source: Current row of the item
+            destination: Row the item should occupy after the move
+        """
+        if source == destination or not 0 <= source < len(self.items):
+            return
+        destination = max(0, min(destination, len(self.items) - 1))
+        
+        # Qt expects the destination as the row to insert *before*
+        target = destination + 1 if destination > source else destination
+        self.beginMoveRows(QModelIndex(), source, source, QModelIndex(), target)
+        self.items.insert(destination, self.items.pop(source))
+        self._rendered.insert(destination, self._rendered.pop(source))
+        self.endMoveRows()
+    
+    def clear(self):
+        """Remove all queue items"""
+        self.beginResetModel()
+        self.items.clear()
+        self._rendered.clear()
+        self.endResetModel()
+    
+    def item_changed(self, row):
+        """Notify views that a single row changed"""
+        if 0 <= row < len(self.items):
+            self._rendered[row] = self._snapshot(self.items[row])
+            self._emit_rows_changed(row, row)
+    
+    def refresh(self):
+        """Emit dataChanged for the rows that changed since they were last shown"""
+        first = None
+        for row, item in enumerate(self.items):
+            snapshot = self._snapshot(item)
+            if snapshot != self._rendered[row]:
+                self._rendered[row] = snapshot
+                if first is None:
+                    first = row
+                continue
+            
+            # Emit contiguous runs of changed rows together
+            if first is not None:
+                self._emit_rows_changed(first, row - 1)
+                first = None
+        
+        if first is not None:
+            self._emit_rows_changed(first, len(self.items) - 1)
+    
+    def _emit_rows_changed(self, first, last):
+        """Emit dataChanged for a range of rows"""
+        self.dataChanged.emit(
+            self.index(first, 0),
+            self.index(last, self.columnCount() - 1)
+        )
+    
+    @staticmethod
+    def _snapshot(item):
+        """The parts of an item that affect how its row is displayed"""
+        return (item["title"], item["channel_name"], item["status"], item["progress"], item.get("error"))
+
+class QueueItemDelegate(QStyledItemDelegate):
+    """
+    Delegate that paints the progress bar and action buttons of queue rows.
+    
+    Nothing is instantiated per row: progress bars and buttons are drawn with
+    the current style and clicks are mapped back to the button under the cursor.
+    Cells are painted as a progress bar or buttons when the model provides
+    ProgressRole or ActionsRole data for them, so other models can reuse it.
+    """
+    
+    # Emitted when an action button is clicked
+    action_triggered = Signal(int, str)  # (row, action)
+    
+    BUTTON_PADDING = 16
+    BUTTON_SPACING = 4
+    
+    def __init__(self, parent=None):
+        """
+        Initialize the delegate.
+        
+        Args:
+            parent: Parent object (normally the view)
+        """
+        super().__init__(parent)
+        self._pressed = None  # (row, action) of the button being pressed
+    
+    def paint(self, painter, option, index):
+        """Paint progress and action cells, defer other cells to the default delegate"""
+        widget = option.widget
+        style = widget.style() if widget else QApplication.style()
+        
+        progress = index.data(ProcessingQueueModel.ProgressRole)
+        if progress is not None:
+            bar = QStyleOptionProgressBar()
+            bar.rect = option.rect.adjusted(2, 4, -2, -4)
+            bar.minimum = 0
+            bar.maximum = 100
+            bar.progress = progress
+            bar.text = f"{progress}%"
+            bar.textVisible = True
+            bar.state = option.state | QStyle.State_Horizontal
+            style.drawControl(QStyle.CE_ProgressBar, bar, painter, widget)
+            return
+        
+        if index.data(ProcessingQueueModel.ActionsRole) is not None:
+            # Draw the row background (selection, hover) before the buttons
+            style.drawPrimitive(QStyle.PE_PanelItemViewItem, option, painter, widget)
+            
+            for action, rect in self._button_rects(option, index):
+                button = QStyleOptionButton()
+                button.rect = rect
+                button.text = action
+                button.state = QStyle.State_Enabled
+                if self._pressed == (index.row(), action):
+                    button.state |= QStyle.State_Sunken
+                else:
+                    button.state |= QStyle.State_Raised
+                style.drawControl(QStyle.CE_PushButton, button, painter, widget)
+            return
+        
+        super().paint(painter, option, index)
+    
+    def editorEvent(self, event, model, option, index):
+        """Translate mouse clicks on the actions column into action_triggered"""
+        if index.data(ProcessingQueueModel.ActionsRole) is None:
+            return super().editorEvent(event, model, option, index)
+        
+        if event.type() not in (QEvent.MouseButtonPress, QEvent.MouseButtonRelease):
+            return False
+        if event.button() != Qt.LeftButton:
+            return False
+        
+        position = event.position().toPoint()
+        clicked = None
+        for action, rect in self._button_rects(option, index):
+            if rect.contains(position):
+                clicked = action
+                break
+        
+        if event.type() == QEvent.MouseButtonPress:
+            self._pressed = (index.row(), clicked) if clicked else None
+            return clicked is not None
+        
+        # Only trigger if the button under the cursor is the one that was pressed
+        pressed, self._pressed = self._pressed, None
+        if clicked and pressed == (index.row(), clicked):
+            self.action_triggered.emit(index.row(), clicked)
+            return True
+        return False
+    
+    def _button_rects(self, option, index):
+        """Lay out the action buttons of a cell from left to right"""
+        actions = index.data(ProcessingQueueModel.ActionsRole) or []
+        metrics = option.fontMetrics
+        rect = option.rect.adjusted(2, 2, -2, -2)
+        
+        x = rect.left()
+        buttons = []
+        for action in actions:
+            width = metrics.horizontalAdvance(action) + self.BUTTON_PADDING
+            buttons.append((action, QRect(x, rect.top(), width, rect.height())))
+            x += width + self.BUTTON_SPACING
+        return buttons
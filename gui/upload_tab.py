@@ -4,9 +4,19 @@ from PySide6.QtWidgets import (
     QFormLayout, QGroupBox, QCheckBox, QComboBox, QMessageBox, 
     QProgressBar, QCalendarWidget, QDialog, QListWidget, QInputDialog
 )
-from PySide6.QtCore import Qt, QDateTime, Signal
+from PySide6.QtCore import Qt, QDateTime, Signal, QUrl
+from PySide6.QtGui import QDesktopServices
 import os
 import time
+import itertools
+from datetime import datetime
+
+from database.db_manager import DatabaseManager
+from uploader.youtube_uploader import UploadCancelled
+from uploader.scheduler import UploadScheduler
+from uploader.dispatcher import PublishDispatcher
+from processor.scheduler import parse_time
+from gui.event_bus import WorkerEventBus
 
 class ScheduleDialog(QDialog):
     """Dialog for scheduling uploads"""
@@ -91,7 +101,7 @@ class ChannelDialog(QDialog):
         selected_items = self.channel_list.selectedItems()
         if not selected_items:
             return None, None
-            
+        
         channel_name = selected_items[0].text()
         channel_id = selected_items[0].data(Qt.UserRole)
         
@@ -103,16 +113,51 @@ class UploadTab(QWidget):
     Provides interface for scheduling and monitoring uploads.
     """
     
-    def __init__(self, config):
+    def __init__(self, config, db=None):
         """
         Initialize the upload tab.
         
         Args:
             config: Application configuration manager
+            db: Database manager holding videos and upload sessions (optional)
         """
         super().__init__()
         self.config = config
+        self.db = db or DatabaseManager()
         self.upload_queue = []
+        self._item_ids = itertools.count(1)
+        
+        # Delivers upload progress from the upload threads on the GUI thread
+        self.events = WorkerEventBus(self)
+        self.events.progress.connect(self._on_upload_progress)
+        self.events.finished.connect(self._on_upload_finished)
+        self.events.failed.connect(self._on_upload_failed)
+        
+        # Runs uploads in the background within channel, bandwidth and quota limits
+        self.scheduler = UploadScheduler(
+            config,
+            self.db,
+            on_progress=lambda key, sent, total: self.events.post_progress(key, sent * 100 // max(total, 1)),
+            on_finished=lambda key, result: self.events.post_finished(key, f"https://youtube.com/shorts/{result['id']}"),
+            on_failed=lambda key, error: self.events.post_failed(
+                key, "Cancelled" if isinstance(error, UploadCancelled) else error
+            ),
+            on_deferred=lambda key, retry_at, reason: self.events.post_call(
+                self._on_upload_deferred, key, retry_at, reason
+            )
+        )
+        self.scheduler.start()
+        
+        # Starts uploads scheduled from this tab ahead of their publish times;
+        # schedules stored by the daemon are left to the daemon
+        self.dispatcher = PublishDispatcher(
+            config,
+            self.db,
+            self.scheduler,
+            on_staged=lambda key: self.events.post_call(self._on_upload_staged, key)
+        )
+        self.dispatcher.start(load_pending=False)
+        
         self.init_ui()
     
     def init_ui(self):
@@ -122,8 +167,8 @@ class UploadTab(QWidget):
         
         # Info label
         info_label = QLabel(
-            "This tab will allow you to manage YouTube uploads.\n"
-            "YouTube API integration will be implemented in a future version."
+            "Uploads run in the background, several at a time within each channel's limit\n"
+            "and the daily API quota. Interrupted uploads resume where they stopped."
         )
         info_label.setWordWrap(True)
         info_label.setAlignment(Qt.AlignCenter)
@@ -234,11 +279,11 @@ class UploadTab(QWidget):
                 "Please add YouTube channels before uploading videos."
             )
             return
-            
+        
         dialog = ChannelDialog(channels, self)
         if dialog.exec() != QDialog.Accepted:
             return
-            
+        
         channel_id, channel_name = dialog.get_selected_channel()
         if not channel_id:
             return
@@ -253,6 +298,7 @@ class UploadTab(QWidget):
         
         # Add to queue
         self.upload_queue.append({
+            "id": next(self._item_ids),
             "video_path": video_path,
             "title": title,
             "channel_id": channel_id,
@@ -306,7 +352,7 @@ class UploadTab(QWidget):
                 remove_btn = QPushButton("Remove")
                 remove_btn.clicked.connect(lambda _, idx=i: self.remove_item(idx))
                 actions_layout.addWidget(remove_btn)
-            elif item["status"] == "Uploading":
+            elif item["status"] in ("Scheduled", "Waiting", "Uploading", "Deferred"):
                 cancel_btn = QPushButton("Cancel")
                 cancel_btn.clicked.connect(lambda _, idx=i: self.cancel_upload(idx))
                 actions_layout.addWidget(cancel_btn)
@@ -372,7 +418,7 @@ class UploadTab(QWidget):
         if not selected_items:
             QMessageBox.warning(self, "No Selection", "Please select a channel to remove.")
             return
-            
+        
         channel_name = selected_items[0].text()
         
         # Find channel ID
@@ -381,7 +427,7 @@ class UploadTab(QWidget):
             if info["name"] == channel_name:
                 channel_id = cid
                 break
-                
+        
         if not channel_id:
             return
         
@@ -410,25 +456,111 @@ class UploadTab(QWidget):
         )
     
     def upload_item(self, index):
-        """Upload a specific queue item"""
+        """Upload a specific queue item in the background"""
         if index < 0 or index >= len(self.upload_queue):
             return
-            
-        # Simulate upload process
+        
         item = self.upload_queue[index]
-        item["status"] = "Simulating Upload"
+        if item["status"] not in ("Queued", "Failed"):
+            return
+        
+        video = self.db.get_video_for_upload(item["video_path"])
+        if video:
+            metadata = self.scheduler.uploader.video_metadata(video)
+        else:
+            metadata = {"title": os.path.splitext(os.path.basename(item["video_path"]))[0]}
+        if item["title"]:
+            metadata["title"] = item["title"]
+        
+        publish_time = parse_time(item["schedule"]) if item["schedule"] != "Now" else None
+        if publish_time is not None:
+            # Uploaded ahead of time as private, YouTube publishes it on schedule
+            item["status"] = "Scheduled"
+            self.update_queue_table()
+            self.dispatcher.schedule(
+                item["id"],
+                item["video_path"],
+                metadata,
+                publish_time,
+                video_id=video["id"] if video else None,
+                channel_id=item["channel_id"]
+            )
+            return
+        
+        item["status"] = "Waiting"
         self.update_queue_table()
         
-        # In a real implementation, this would use the YouTube API
-        QMessageBox.information(
-            self,
-            "Upload Simulation",
-            f"Upload simulation for \"{item['title']}\" to channel {item['channel_name']}.\n\n"
-            f"In the final implementation, this will use the YouTube API to upload the video."
+        self.scheduler.submit(
+            item["id"],
+            item["video_path"],
+            metadata,
+            video_id=video["id"] if video else None,
+            channel_id=item["channel_id"]
         )
+    
+    def _on_upload_staged(self, item_id):
+        """Show that a scheduled upload has started waiting for a worker (GUI thread)"""
+        row, item = self._find_item(item_id)
+        if item is not None and item["status"] == "Scheduled":
+            item["status"] = "Waiting"
+            self.update_queue_table()
+    
+    def _find_item(self, item_id):
+        """Get the row and queue item with an ID, or (None, None)"""
+        for row, item in enumerate(self.upload_queue):
+            if item["id"] == item_id:
+                return row, item
+        return None, None
+    
+    def _on_upload_progress(self, item_id, progress):
+        """Show upload progress (GUI thread)"""
+        row, item = self._find_item(item_id)
+        if item is None or item["status"] not in ("Waiting", "Uploading", "Deferred"):
+            return
+        
+        if item["status"] != "Uploading":
+            item["status"] = "Uploading"
+            self.update_queue_table()
+        
+        status_cell = self.queue_table.item(row, 2)
+        if status_cell:
+            status_cell.setText(f"Uploading {progress}%")
+    
+    def _on_upload_deferred(self, item_id, retry_at, reason):
+        """Show that an upload was put off until later (GUI thread)"""
+        row, item = self._find_item(item_id)
+        if item is None:
+            return
+        
+        item["status"] = "Deferred"
+        self.update_queue_table()
+        
+        status_cell = self.queue_table.item(row, 2)
+        if status_cell:
+            status_cell.setText(f"Retry at {datetime.fromtimestamp(retry_at):%H:%M}")
+            status_cell.setToolTip(reason)
+    
+    def _on_upload_finished(self, item_id, youtube_url):
+        """Mark an upload as completed (GUI thread)"""
+        row, item = self._find_item(item_id)
+        if item is None:
+            return
         
-        # Update status
         item["status"] = "Completed"
+        item["youtube_url"] = youtube_url
+        self.update_queue_table()
+    
+    def _on_upload_failed(self, item_id, error):
+        """Mark an upload as failed or cancelled (GUI thread)"""
+        row, item = self._find_item(item_id)
+        if item is None:
+            return
+        
+        if error == "Cancelled":
+            item["status"] = "Queued"
+        else:
+            item["status"] = "Failed"
+            QMessageBox.warning(self, "Upload Failed", f"Failed to upload \"{item['title']}\":\n\n{error}")
         self.update_queue_table()
     
     def upload_all(self):
@@ -437,7 +569,7 @@ class UploadTab(QWidget):
         if not queued_items:
             QMessageBox.information(self, "No Videos", "No videos in the upload queue.")
             return
-            
+        
         # Confirm upload
         reply = QMessageBox.question(
             self,
@@ -448,7 +580,7 @@ class UploadTab(QWidget):
         )
         
         if reply == QMessageBox.Yes:
-            # Upload each item
+            # Hand every item to the scheduler, which runs them concurrently
             for i, item in enumerate(self.upload_queue):
                 if item["status"] == "Queued":
                     self.upload_item(i)
@@ -457,24 +589,29 @@ class UploadTab(QWidget):
         """Remove an item from the queue"""
         if index < 0 or index >= len(self.upload_queue):
             return
-            
+        
         # Remove the item
         self.upload_queue.pop(index)
         self.update_queue_table()
     
     def cancel_upload(self, index):
-        """Cancel an ongoing upload"""
-        QMessageBox.information(
-            self,
-            "Not Implemented",
-            "Upload cancellation will be implemented in a future version."
-        )
+        """Cancel a waiting or ongoing upload; uploading it again resumes from where it stopped"""
+        if index < 0 or index >= len(self.upload_queue):
+            return
+        
+        item = self.upload_queue[index]
+        if self.dispatcher.cancel(item["id"]):
+            item["status"] = "Queued"
+            self.update_queue_table()
+            return
+        
+        self.scheduler.cancel(item["id"])
     
     def retry_upload(self, index):
         """Retry a failed upload"""
         if index < 0 or index >= len(self.upload_queue):
             return
-            
+        
         # Reset status
         self.upload_queue[index]["status"] = "Queued"
         self.update_queue_table()
@@ -484,11 +621,12 @@ class UploadTab(QWidget):
     
     def view_online(self, index):
         """View an uploaded video online"""
-        QMessageBox.information(
-            self,
-            "Not Implemented",
-            "Viewing videos online will be implemented in a future version."
-        )
+        if index < 0 or index >= len(self.upload_queue):
+            return
+        
+        youtube_url = self.upload_queue[index].get("youtube_url")
+        if youtube_url:
+            QDesktopServices.openUrl(QUrl(youtube_url))
     
     def clear_completed(self):
         """Clear completed uploads from the queue"""
@@ -496,4 +634,4 @@ class UploadTab(QWidget):
         self.upload_queue = [item for item in self.upload_queue if item["status"] != "Completed"]
         self.update_queue_table()
         
-        QMessageBox.information(self, "Queue Cleared", "Completed uploads have been cleared from the queue.")  
+        QMessageBox.information(self, "Queue Cleared", "Completed uploads have been cleared from the queue.")
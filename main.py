@@ -11,10 +11,14 @@ sets up logging, and launches the main GUI window.
 
 import sys
 import os
-import subprocess
+import time
 import logging
+import threading
 from pathlib import Path
 
+# Reference point for the startup timing logs
+STARTUP_STARTED = time.perf_counter()
+
 # PySide6 imports - correctly separated by module
 from PySide6.QtWidgets import QApplication, QSplashScreen, QMessageBox
 from PySide6.QtGui import QPixmap  # QPixmap is in QtGui, not QtWidgets
@@ -24,6 +28,7 @@ from PySide6.QtCore import Qt, QTimer
 from config import Config
 from database.db_manager import DatabaseManager
 from gui.main_window import MainWindow
+from processor.toolchain import Toolchain
 
 # Set up logging configuration
 logging.basicConfig(
@@ -57,12 +62,20 @@ def setup_directories():
         os.makedirs(directory, exist_ok=True)
         logger.info(f"Ensured directory exists: {directory}")
 
-def check_dependencies():
+def elapsed_ms():
+    """Milliseconds since the application process started loading"""
+    return (time.perf_counter() - STARTUP_STARTED) * 1000
+
+def check_dependencies(config):
     """
     Check if all required external dependencies are installed and available.
     
     The application requires external tools like FFmpeg and yt-dlp to function.
-    This function verifies they are properly installed and can be executed.
+    Their capabilities are probed once per installed binary and cached, so on
+    later launches this only reads the toolchain cache.
+    
+    Args:
+        config: Application configuration manager
     
     Returns:
         bool: True if all dependencies are available, False otherwise
@@ -72,30 +85,15 @@ def check_dependencies():
         "yt-dlp": "yt-dlp for TikTok video downloading"
     }
     
-    missing = []
+    found = Toolchain(config).probe_all()
     
+    missing = []
     for cmd, desc in dependencies.items():
-        try:
-            # Try to run the command with a simple check option
-            if cmd == "ffmpeg":
-                test_arg = "-version"
-            else:
-                test_arg = "--version"
-                
-            result = subprocess.run(
-                [cmd, test_arg], 
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.PIPE,
-                text=True,
-                check=False  # Don't raise an exception on non-zero return code
-            )
-            
-            if result.returncode != 0:
-                missing.append(f"{cmd} ({desc})")
-                logger.warning(f"Dependency check for {cmd} failed with return code {result.returncode}")
-        except FileNotFoundError:
+        if found[cmd]:
+            logger.info(f"Found {cmd}: {found[cmd]['version']}")
+        else:
+            logger.warning(f"Dependency {cmd} not found or not working")
             missing.append(f"{cmd} ({desc})")
-            logger.warning(f"Dependency {cmd} not found in PATH")
     
     if missing:
         logger.error(f"Missing dependencies: {', '.join(missing)}")
@@ -115,7 +113,7 @@ def main():
     setup_directories()
     
     # Load configuration from file
-    logger.info("Loading application configuration")
+    logger.info(f"Loading application configuration ({elapsed_ms():.0f} ms)")
     config = Config()
     
     # Create Qt application instance
@@ -133,29 +131,38 @@ def main():
     app.processEvents()  # Process events to ensure splash screen is displayed
     
     # Initialize database manager
-    logger.info("Initializing database")
+    logger.info(f"Initializing database ({elapsed_ms():.0f} ms)")
     db = DatabaseManager()
     
     # Create main window
-    logger.info("Creating main application window")
-    window = MainWindow(config)
+    logger.info(f"Creating main application window ({elapsed_ms():.0f} ms)")
+    window = MainWindow(config, db)
     
-    # Close splash screen and show main window after a short delay
-    QTimer.singleShot(1500, splash.close)
-    QTimer.singleShot(1500, window.show)
+    # Show the main window as soon as it is ready
+    window.show()
+    splash.finish(window)
+    
+    # Check external tools in the background; missing ones only disable features
+    threading.Thread(target=check_dependencies_in_background, args=(config,), daemon=True).start()
+    
+    logger.info(f"Application startup complete in {elapsed_ms():.0f} ms")
+    
+    # Used by benchmark_startup.py to measure cold start
+    if os.environ.get("T2Y_EXIT_AFTER_STARTUP"):
+        QTimer.singleShot(0, app.quit)
     
     # Execute application event loop
-    logger.info("Application startup complete")
     return app.exec()
 
+def check_dependencies_in_background(config):
+    """Run the dependency checks off the GUI thread and log the outcome"""
+    if not check_dependencies(config):
+        # We still allow the app to start even if dependencies are missing,
+        # but log a warning
+        logger.warning("Starting application with missing dependencies - some features may not work")
+
 if __name__ == "__main__":
     try:
-        # Check dependencies before starting
-        if not check_dependencies():
-            # We still allow the app to start even if dependencies are missing,
-            # but log a warning
-            logger.warning("Starting application with missing dependencies - some features may not work")
-        
         # Start the application and get the exit code
         exit_code = main()
         sys.exit(exit_code)
@@ -5,7 +5,7 @@ This package handles generation and optimization of metadata for YouTube uploads
 including titles, descriptions, tags, and thumbnails.
 """
 
-# Import modules to be exposed at the package level
-# This will be populated as modules are implemented
+from metadata.generator import MetadataGenerator, extract_hashtags
+from metadata.tag_index import TagIndex
 
-__all__ = []  
+__all__ = ['MetadataGenerator', 'extract_hashtags', 'TagIndex']
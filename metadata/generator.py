@@ -0,0 +1,255 @@
+import os
+import re
+from datetime import date
+
+HASHTAG_PATTERN = re.compile(r"#(\w+)", re.UNICODE)
+MENTION_PATTERN = re.compile(r"@[\w.]+", re.UNICODE)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# Filenames given by the downloaders, which make meaningless titles
+GENERATED_FILENAME_PATTERN = re.compile(r"^(tiktok|video)_\d+$", re.IGNORECASE)
+
+def extract_hashtags(text):
+    """
+    Get the hashtags in a text, in order and without duplicates.
+    
+    Args:
+        text: Text containing hashtags such as "#funny #cats"
+    
+    Returns:
+        list: Hashtag words without the leading '#'
+    """
+    seen = set()
+    words = []
+    for word in HASHTAG_PATTERN.findall(text or ""):
+        if word.lower() not in seen:
+            seen.add(word.lower())
+            words.append(word)
+    return words
+
+class _Fields(dict):
+    """Template fields; unknown placeholders become empty instead of failing"""
+    
+    def __missing__(self, key):
+        return ""
+
+class MetadataGenerator:
+    """
+    Builds YouTube titles, descriptions and tags from what the source video came with.
+    
+    The input is the title and hashtags captured when the TikTok was
+    downloaded. Titles are cleaned of hashtags and mentions, then every field
+    is rendered from a template, with placeholders such as ``{title}``,
+    ``{hashtags}``, ``{tags}``, ``{channel}`` and ``{date}``.
+    
+    Rules add tags, hashtags or a category to videos whose title or hashtags
+    match a regular expression. Templates, rules, default tags and category
+    come from the ``metadata`` settings, and a channel's own ``metadata``
+    settings override them (its rules are added to the global ones).
+    
+    With a TagIndex, the ``metadata.related_tags`` tags most specific to
+    videos sharing the video's hashtags are added as well.
+    
+    Templates and rules are compiled once per settings change, so generating
+    metadata for hundreds of videos takes milliseconds.
+    """
+    
+    DEFAULT_TEMPLATES = {
+        "title": "{title}",
+        "description": "{title}\n\n{hashtags} #Shorts",
+        "fallback_title": "{hashtag_title}"
+    }
+    
+    # YouTube limits
+    TITLE_LIMIT = 100
+    DESCRIPTION_LIMIT = 5000
+    TAGS_LIMIT = 500
+    
+    # More hashtags than this make YouTube ignore all of them
+    MAX_HASHTAGS = 15
+    
+    def __init__(self, config, tag_index=None):
+        """
+        Initialize the generator.
+        
+        Args:
+            config: Application configuration manager
+            tag_index: TagIndex to suggest related tags from (optional)
+        """
+        self.config = config
+        self.tag_index = tag_index
+        
+        # Compiled settings per channel, rebuilt when the settings change
+        self._profiles = {}
+    
+    def generate(self, video, channel_id=None):
+        """
+        Generate metadata for one video.
+        
+        Args:
+            video: Dictionary with the video's ``title``, ``hashtags`` and
+                   ``filename`` (a videos table row works)
+            channel_id: YouTube channel ID for channel templates (defaults to
+                        the video's ``channel_id``)
+        
+        Returns:
+            dict: title, description, tags (comma-separated), hashtags
+                  (space-separated) and category_id
+        """
+        channel_id = channel_id or video.get("channel_id")
+        profile = self._profile(channel_id)
+        
+        source_title = video.get("title") or ""
+        source_hashtags = extract_hashtags(video.get("hashtags")) + extract_hashtags(source_title)
+        title = self._clean_title(source_title)
+        
+        # Rules see the original title and every hashtag
+        match_text = f"{source_title} {' '.join('#' + tag for tag in source_hashtags)}"
+        hashtags = list(source_hashtags)
+        tags = []
+        category_id = profile["category_id"]
+        for pattern, rule in profile["rules"]:
+            if pattern.search(match_text):
+                hashtags.extend(tag.lstrip("#") for tag in rule.get("hashtags", []))
+                tags.extend(rule.get("tags", []))
+                category_id = rule.get("category_id", category_id)
+        
+        hashtags = _unique(hashtags)[:self.MAX_HASHTAGS]
+        if self.tag_index is not None and source_hashtags:
+            tags.extend(self.tag_index.related(
+                source_hashtags, channel_id, int(self.config.get("metadata.related_tags", 3))
+            ))
+        tags = self._fit_tags(_unique(hashtags + tags + profile["default_tags"]))
+        
+        fields = _Fields(
+            title=title,
+            original_title=source_title,
+            hashtags=" ".join(f"#{tag}" for tag in hashtags),
+            hashtag_title=" ".join(tag[:1].upper() + tag[1:] for tag in hashtags[:3]),
+            tags=", ".join(tags),
+            channel=profile["channel_name"],
+            filename=os.path.splitext(video.get("filename") or "")[0],
+            date=date.today().isoformat()
+        )
+        if not title:
+            fields["title"] = self._render(profile, "fallback_title", fields) or self._filename_title(fields["filename"])
+        
+        return {
+            "title": self._limit(self._render(profile, "title", fields) or fields["title"], self.TITLE_LIMIT),
+            "description": self._limit(self._render(profile, "description", fields), self.DESCRIPTION_LIMIT, lines=True),
+            "tags": ",".join(tags),
+            "hashtags": fields["hashtags"],
+            "category_id": category_id
+        }
+    
+    def generate_batch(self, videos, privacy_status="private"):
+        """
+        Generate metadata for many videos.
+        
+        Args:
+            videos: Video dictionaries with ``id`` (see generate)
+            privacy_status: Privacy status to give the videos
+        
+        Returns:
+            list: Entries for DatabaseManager.add_metadata_bulk
+        """
+        entries = []
+        for video in videos:
+            entry = self.generate(video)
+            entry["video_id"] = video["id"]
+            entry["privacy_status"] = privacy_status
+            entries.append(entry)
+        return entries
+    
+    def _profile(self, channel_id):
+        """Get the compiled templates and rules for a channel"""
+        settings = self.config.get("metadata", {})
+        channel = self.config.get("channels", {}).get(channel_id) if channel_id else None
+        
+        # Settings sections are replaced rather than modified, so identity
+        # shows whether the compiled profile is still current
+        cached = self._profiles.get(channel_id)
+        if cached and cached["sources"][0] is settings and cached["sources"][1] is channel:
+            return cached
+        
+        overrides = (channel or {}).get("metadata") or {}
+        templates = dict(self.DEFAULT_TEMPLATES)
+        templates.update(settings.get("templates") or {})
+        templates.update(overrides.get("templates") or {})
+        
+        rules = []
+        for rule in list(settings.get("rules") or []) + list(overrides.get("rules") or []):
+            try:
+                rules.append((re.compile(rule["match"], re.IGNORECASE), rule))
+            except (KeyError, TypeError, re.error) as e:
+                print(f"Skipping invalid metadata rule {rule!r}: {e}")
+        
+        profile = {
+            "sources": (settings, channel),
+            "templates": templates,
+            "rules": rules,
+            "default_tags": list(overrides.get("default_tags", settings.get("default_tags", []))),
+            "category_id": overrides.get("category_id", settings.get("category_id")),
+            "channel_name": (channel or {}).get("name", "")
+        }
+        self._profiles[channel_id] = profile
+        return profile
+    
+    def _render(self, profile, name, fields):
+        """Fill in a template, falling back to the default one if it is malformed"""
+        try:
+            text = profile["templates"][name].format_map(fields)
+        except (ValueError, IndexError, AttributeError) as e:
+            print(f"Invalid {name} template, using the default: {e}")
+            text = self.DEFAULT_TEMPLATES[name].format_map(fields)
+        
+        # YouTube rejects angle brackets in titles and descriptions
+        text = text.replace("<", "").replace(">", "")
+        return "\n".join(WHITESPACE_PATTERN.sub(" ", line).strip() for line in text.strip().split("\n"))
+    
+    def _clean_title(self, title):
+        """Remove hashtags, mentions and surplus whitespace from a source title"""
+        title = HASHTAG_PATTERN.sub("", title)
+        title = MENTION_PATTERN.sub("", title)
+        return WHITESPACE_PATTERN.sub(" ", title).strip(" -|:,")
+    
+    def _filename_title(self, filename):
+        """Turn a filename into a title, unless it was generated by a downloader"""
+        if not filename or GENERATED_FILENAME_PATTERN.match(filename):
+            return "TikTok Video"
+        return WHITESPACE_PATTERN.sub(" ", filename.replace("_", " ").replace("-", " ")).strip()
+    
+    def _fit_tags(self, tags):
+        """Keep tags in order while they fit in YouTube's total tag length"""
+        fitted = []
+        length = 0
+        for tag in tags:
+            tag = tag.replace(",", " ").replace("<", "").replace(">", "").strip()
+            if not tag:
+                continue
+            # Tags with spaces count their quotes, and tags are separated by commas
+            size = len(tag) + (2 if " " in tag else 0) + (1 if fitted else 0)
+            if length + size > self.TAGS_LIMIT:
+                break
+            fitted.append(tag)
+            length += size
+        return fitted
+    
+    def _limit(self, text, limit, lines=False):
+        """Shorten text to a limit, at a word (or line) boundary where possible"""
+        if len(text) <= limit:
+            return text
+        cut = text[:limit]
+        boundary = cut.rfind("\n" if lines else " ")
+        return (cut[:boundary] if boundary > limit // 2 else cut).rstrip()
+
+def _unique(words):
+    """Remove case-insensitive duplicates, keeping the first spelling"""
+    seen = set()
+    result = []
+    for word in words:
+        key = word.lower()
+        if word and key not in seen:
+            seen.add(key)
+            result.append(word)
+    return result
@@ -0,0 +1,86 @@
+import threading
+
+class TagIndex:
+    """
+    Suggests hashtags from the tag counts kept in the database.
+    
+    Completions come from a prefix table built when a channel's tags are
+    loaded: every prefix of every tag maps to its most used tags, already
+    ranked, so a lookup per keystroke is a single dictionary access no
+    matter how many tags there are. Related tags are looked up in the tag
+    pair counts, which are indexed by tag.
+    
+    Tables are built on first use for each channel and rebuilt by refresh().
+    """
+    
+    # Completions kept per prefix
+    COMPLETIONS = 10
+    
+    def __init__(self, db):
+        """
+        Initialize the tag index.
+        
+        Args:
+            db: Database manager holding the tag counts
+        """
+        self.db = db
+        self._lock = threading.Lock()
+        self._prefixes = {}
+    
+    def complete(self, prefix, channel_id=None, limit=None):
+        """
+        Get the most used tags starting with a prefix.
+        
+        Args:
+            prefix: Text typed so far (a leading '#' is ignored)
+            channel_id: YouTube channel ID, or None for all videos
+            limit: Maximum number of tags (default: COMPLETIONS)
+        
+        Returns:
+            list: Tags without '#', most used first
+        """
+        prefix = prefix.strip().lstrip("#").lower()
+        if not prefix:
+            return []
+        return self._table(channel_id).get(prefix, [])[:limit or self.COMPLETIONS]
+    
+    def related(self, tags, channel_id=None, limit=5):
+        """
+        Get the tags most specific to videos using some other tags.
+        
+        Args:
+            tags: Hashtags to find related tags for (with or without '#')
+            channel_id: YouTube channel ID, or None for all videos
+            limit: Maximum number of tags (default: 5)
+        
+        Returns:
+            list: Tags without '#', most related first
+        """
+        if limit <= 0:
+            return []
+        return [tag for tag, _, _ in self.db.get_related_tags(tags, channel_id, limit)]
+    
+    def refresh(self):
+        """Drop the prefix tables so they are rebuilt with the current counts"""
+        with self._lock:
+            self._prefixes.clear()
+    
+    def _table(self, channel_id):
+        """Get the prefix table for a channel, building it if needed"""
+        key = channel_id or ""
+        with self._lock:
+            table = self._prefixes.get(key)
+        if table is not None:
+            return table
+        
+        table = {}
+        # Tags come most used first, so each prefix list fills up in rank order
+        for tag, _ in self.db.get_top_tags(channel_id):
+            for end in range(1, len(tag) + 1):
+                completions = table.setdefault(tag[:end], [])
+                if len(completions) < self.COMPLETIONS:
+                    completions.append(tag)
+        
+        with self._lock:
+            self._prefixes[key] = table
+        return table
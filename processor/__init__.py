@@ -6,5 +6,9 @@ providing a range of effects and optimizations for YouTube Shorts.
 """
 
 from processor.ffmpeg_handler import FFmpegHandler
+from processor.process_runner import ProcessRunner, ProcessingCancelled
+from processor.scheduler import ProcessingScheduler
+from processor.thumbnail_picker import ThumbnailPicker
+from processor.toolchain import Toolchain
 
-__all__ = ['FFmpegHandler']  
+__all__ = ['FFmpegHandler', 'ProcessRunner', 'ProcessingCancelled', 'ProcessingScheduler', 'ThumbnailPicker', 'Toolchain']
@@ -2,9 +2,21 @@ import os
 import subprocess
 import json
 import random
+import hashlib
+import csv
 import time
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+from database.db_manager import DatabaseManager
+from processor.process_runner import ProcessRunner, ProcessingCancelled
+from processor.render_cache import RenderCache
+from processor.thumbnail_picker import ThumbnailPicker
+from processor.toolchain import Toolchain
+
 class FFmpegHandler:
     """
     Handles video processing using FFmpeg with a wide range of effects and filters.
@@ -13,12 +25,54 @@ class FFmpegHandler:
     content protection measures, and output customization as specified in the project requirements.
     """
     
-    def __init__(self, config):
+    # Defaults for every processing setting that affects the rendered output
+    DEFAULT_PROCESSING = {
+        "color_saturation": 1.2,
+        "brightness": 1.1,
+        "zoom_pulse": 1.05,
+        "denoise_strength": 3,
+        "sharpness": 1.5,
+        "watermark_opacity": 0.8,
+        "speed_randomization": 0.05,
+        "zoom_factor": 1.02,
+        "pixel_shift": 1,
+        "audio_normalization": True,
+        "crf": 23,
+        "bitrate": "2M",
+        "threads": 4,
+        "video_encoder": "auto"
+    }
+    
+    # Quality options per H.264 encoder, built from the crf setting
+    ENCODER_QUALITY_OPTIONS = {
+        "libx264": lambda crf: ["-preset", "medium", "-crf", crf],
+        "h264_nvenc": lambda crf: ["-preset", "p4", "-rc", "vbr", "-cq", crf],
+        "h264_qsv": lambda crf: ["-preset", "medium", "-global_quality", crf],
+        "h264_amf": lambda crf: ["-quality", "balanced", "-rc", "cqp", "-qp_i", crf, "-qp_p", crf],
+        "h264_videotoolbox": lambda crf: []  # Bitrate controlled only
+    }
+    
+    # MP4 layouts: faststart moves the index to the front once encoding ends,
+    # which rewrites the file; fragmented output is only ever appended to, so
+    # it can be uploaded while it is being written
+    FASTSTART_MOVFLAGS = "+faststart"
+    FRAGMENTED_MOVFLAGS = "+frag_keyframe+empty_moov+default_base_moof"
+    
+    # Filters the effects need, with the setting that turns each effect off
+    # when the FFmpeg build lacks the filter
+    OPTIONAL_FILTERS = {
+        "hqdn3d": ("denoise_strength", 0),
+        "unsharp": ("sharpness", 1.0),
+        "loudnorm": ("audio_normalization", False)
+    }
+    
+    def __init__(self, config, db=None):
         """
         Initialize the FFmpeg handler.
         
         Args:
             config: Application configuration manager containing FFmpeg settings
+            db: Database manager used for the render cache index (optional)
         """
         self.config = config
         self.ffmpeg_path = config.get("ffmpeg_path", "ffmpeg")
@@ -28,172 +82,219 @@ class FFmpegHandler:
         # Ensure output directory exists
         os.makedirs(self.output_dir, exist_ok=True)
         
+        # Follow path changes made in the settings while the handler is alive
+        config.subscribe("ffmpeg_path", self._on_ffmpeg_path_changed)
+        config.subscribe("output_dir", self._on_output_dir_changed)
+        config.subscribe("watermarks_dir", self._on_watermarks_dir_changed)
+        
+        # Cache of completed renders, keyed by input content and settings
+        self.render_cache = RenderCache(config, db or DatabaseManager())
+        
+        # Cached capabilities of the FFmpeg build, probed on first use
+        self.toolchain = Toolchain(config)
+        
+        # Chooses thumbnail frames by scoring candidates
+        self.thumbnail_picker = ThumbnailPicker(config)
+        
         # Verify FFmpeg is available
         self._verify_ffmpeg()
     
     def _verify_ffmpeg(self):
-        """Verify FFmpeg is available and get version information"""
-        try:
-            result = subprocess.run(
-                [self.ffmpeg_path, "-version"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            version_info = result.stdout.split('\n')[0]
-            print(f"Using FFmpeg: {version_info}")
-        except (subprocess.SubprocessError, FileNotFoundError) as e:
-            print(f"Error verifying FFmpeg: {e}")
+        """
+        Verify FFmpeg is available.
+        
+        Only looks the binary up instead of running ``ffmpeg -version``, so creating
+        a handler doesn't cost a process launch; the version is logged by the
+        startup dependency check.
+        """
+        resolved = shutil.which(self.ffmpeg_path)
+        if not resolved:
+            print(f"Error verifying FFmpeg: {self.ffmpeg_path} not found")
             print("Please ensure FFmpeg is installed and correctly configured in settings.")
             raise RuntimeError("FFmpeg not available")
+        print(f"Using FFmpeg: {resolved}")
+    
+    def _on_ffmpeg_path_changed(self, ffmpeg_path):
+        """Use a newly configured FFmpeg binary"""
+        self.ffmpeg_path = ffmpeg_path or "ffmpeg"
+    
+    def _on_output_dir_changed(self, output_dir):
+        """Write future outputs to a newly configured directory"""
+        self.output_dir = output_dir or "./output"
+        os.makedirs(self.output_dir, exist_ok=True)
     
-    def process_video(self, input_path, channel_id=None, progress_callback=None):
+    def _on_watermarks_dir_changed(self, watermarks_dir):
+        """Use a newly configured watermarks directory"""
+        self.watermarks_dir = watermarks_dir or "./watermarks"
+    
+    def make_output_path(self, input_path):
+        """
+        Build a fresh output path for processing a video.
+        
+        Args:
+            input_path: Path to the input video file
+        
+        Returns:
+            str: Path in the output directory the processed video should be written to
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        base_name = os.path.splitext(os.path.basename(input_path))[0]
+        return os.path.join(self.output_dir, f"{base_name}_processed_{timestamp}.mp4")
+    
+    def discard_partial_output(self, output_path):
+        """
+        Delete what an interrupted encode left behind.
+        
+        Removes the partial output, its thumbnail and any segment work
+        directories. Only call this while nothing is being processed.
+        
+        Args:
+            output_path: Output path of the interrupted encode (optional)
+        """
+        paths = []
+        if output_path:
+            paths = [output_path, os.path.splitext(output_path)[0] + ".jpg"]
+        
+        for path in paths:
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                    print(f"Removed partial output: {path}")
+                except OSError as e:
+                    print(f"Error removing partial output: {e}")
+        
+        # Segment work directories are only left behind by a crash mid-encode
+        if os.path.isdir(self.output_dir):
+            for name in os.listdir(self.output_dir):
+                if name.startswith(".segments_"):
+                    shutil.rmtree(os.path.join(self.output_dir, name), ignore_errors=True)
+    
+    def process_video(self, input_path, channel_id=None, progress_callback=None, video_id=None, output_path=None,
+                      cancel_event=None, fragmented=False):
         """
         Process a video with all enhancements and effects.
         
+        If an identical render (same input content, effective settings, watermark
+        and randomised parameters) is already in the render cache, the cached
+        output is reused instead of encoding again.
+        
         Args:
             input_path: Path to the input video file
             channel_id: YouTube channel ID for channel-specific settings
             progress_callback: Callback function to report progress (0-100)
-            
+            video_id: Database ID of the video, looked up by path if omitted
+            output_path: Where to write the processed video, generated if omitted
+            cancel_event: threading.Event that aborts processing when set, raising
+                          ProcessingCancelled (optional)
+            fragmented: Write fragmented MP4, which grows append-only and can be
+                        read while it is written, instead of a faststart MP4
+        
         Returns:
             output_path: Path to the processed video file
         """
         if not os.path.exists(input_path):
             raise FileNotFoundError(f"Input video not found: {input_path}")
         
-        # Get settings
-        processing = self.config.get("processing", {})
+        # Resolve every setting that affects the output
+        settings = self._effective_settings(channel_id)
+        watermark_path = settings["watermark_path"]
+        if fragmented:
+            # Part of the settings so the render cache keeps the layouts apart
+            settings["movflags"] = self.FRAGMENTED_MOVFLAGS
         
-        # Channel-specific settings
-        channel_settings = {}
-        if channel_id:
-            channels = self.config.get("channels", {})
-            if channel_id in channels:
-                channel_settings = channels[channel_id]
-        
-        # Get watermark path
-        watermark_path = None
-        if channel_settings.get("watermark"):
-            watermark_path = channel_settings["watermark"]
+        # Randomised content protection parameters come from a per-video,
+        # per-channel seed so retries are identical and can hit the cache
+        seed = self._render_seed(input_path, channel_id, video_id)
+        params = self._protection_params(settings, seed)
         
         # Generate output filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = os.path.basename(input_path)
-        base_name = os.path.splitext(filename)[0]
-        output_filename = f"{base_name}_processed_{timestamp}.mp4"
-        output_path = os.path.join(self.output_dir, output_filename)
+        if not output_path:
+            output_path = self.make_output_path(input_path)
         
         # Report progress
         if progress_callback:
             progress_callback(5)  # Starting
         
-        # Build FFmpeg complex filter string with all effects
-        filter_chains = []
-        
-        # Start with input
-        filter_chains.append("[0:v]")
+        # Reuse a previous render of the same input with the same settings
+        cache_key = None
+        if self.render_cache.enabled:
+            cache_key = self.render_cache.make_key(input_path, settings, watermark_path, params)
+            if self.render_cache.fetch(cache_key, output_path):
+                print(f"Render cache hit for {filename}")
+                self._generate_thumbnail(output_path)
+                if progress_callback:
+                    progress_callback(100)  # Complete
+                return output_path
         
         # Report progress
         if progress_callback:
             progress_callback(10)  # Filter preparation
         
-        # 1. Format standardization to 9:16 aspect ratio (1080x1920px)
-        # First crop to remove any unwanted areas if needed
-        # Then scale to the correct dimension
-        filter_chains.append(f"scale=1080:1920:force_original_aspect_ratio=decrease")
-        filter_chains.append(f"pad=1080:1920:(ow-iw)/2:(oh-ih)/2:color=black")
-        last_output = "v1"
-        filter_chains.append(f"[{last_output}]")
-        
-        # 2. Apply visual enhancements
-        # Color saturation adjustment
-        color_saturation = processing.get("color_saturation", 1.2)
-        filter_chains.append(f"[{last_output}]eq=saturation={color_saturation}")
-        last_output = "v2"
-        filter_chains.append(f"[{last_output}]")
-        
-        # Brightness correction
-        brightness = processing.get("brightness", 1.1)
-        filter_chains.append(f"[{last_output}]eq=brightness={brightness-1}")
-        last_output = "v3"
-        filter_chains.append(f"[{last_output}]")
+        # Expected duration lets progress be reported as a real percentage
+        # and decides whether the segment-parallel mode is worthwhile
+        video_info = self.get_video_info(input_path)
+        duration = video_info["duration"] if video_info else None
         
         # Report progress
         if progress_callback:
-            progress_callback(20)  # Basic enhancements applied
-        
-        # Opening zoom pulse effect
-        zoom_pulse = processing.get("zoom_pulse", 1.05)
-        filter_chains.append(f"[{last_output}]zoompan=z='min(zoom+0.0015,{zoom_pulse})':d=125:s=1080x1920")
-        last_output = "v4"
-        filter_chains.append(f"[{last_output}]")
+            progress_callback(50)  # Source inspected
         
-        # Temporal denoising
-        denoise_strength = processing.get("denoise_strength", 3)
-        if denoise_strength > 0:
-            filter_chains.append(f"[{last_output}]hqdn3d={denoise_strength}")
-            last_output = "v5"
-            filter_chains.append(f"[{last_output}]")
-        
-        # Sharpening filters
-        sharpness = processing.get("sharpness", 1.5)
-        if sharpness > 1.0:
-            filter_chains.append(f"[{last_output}]unsharp=3:3:{sharpness}:3:3:{sharpness}")
-            last_output = "v6"
-            filter_chains.append(f"[{last_output}]")
+        def on_progress(update):
+            # Map encoder progress onto the 60-90% range
+            if progress_callback and update["fraction"] is not None:
+                progress_callback(int(60 + update["fraction"] * 30))
         
         # Report progress
         if progress_callback:
-            progress_callback(30)  # Visual enhancements applied
-        
-        # 3. Add branding elements (watermark)
-        if watermark_path and os.path.exists(watermark_path):
-            watermark_opacity = processing.get("watermark_opacity", 0.8)
-            # Add watermark overlay
-            filter_chains.append(f"[{last_output}][1:v]overlay=W-w-10:H-h-10:format=auto:alpha={watermark_opacity}")
-            last_output = "v7"
-            filter_chains.append(f"[{last_output}]")
+            progress_callback(60)  # Starting FFmpeg process
         
+        # Execute FFmpeg
+        try:
+            if self._can_stream_copy(settings, params, video_info):
+                # Nothing visual changes, so only the container and audio need work
+                print(f"Source already matches the output format, remuxing {filename}")
+                self._remux(input_path, output_path, settings, duration, on_progress, cancel_event)
+            elif self._use_segmented_encoding(duration):
+                self._encode_segmented(input_path, output_path, settings, params, video_info, on_progress, cancel_event)
+            else:
+                self._encode_single(input_path, output_path, settings, params, duration, on_progress, cancel_event)
+            
+            # Keep a copy of the render for future retries
+            if cache_key:
+                self.render_cache.store(cache_key, output_path)
+            
+            # Generate a thumbnail for the processed video
+            self._generate_thumbnail(output_path)
+            
             # Report progress
             if progress_callback:
-                progress_callback(40)  # Watermark applied
-        
-        # Add subscribe arrow animation (placeholder for now)
-        # This would be more complex and require an overlay image and animation timing
-        # For now, we'll skip this feature
-        
-        # 4. Content protection measures
-        # Speed randomization at video end
-        speed_randomization = processing.get("speed_randomization", 0.05)
-        if speed_randomization > 0:
-            random_speed = 1.0 + (random.random() * speed_randomization)
-            filter_chains.append(f"[{last_output}]setpts={1/random_speed}*PTS")
-            last_output = "v8"
-            filter_chains.append(f"[{last_output}]")
-        
-        # Subtle zoom factors
-        zoom_factor = processing.get("zoom_factor", 1.02)
-        if zoom_factor > 1.0:
-            filter_chains.append(f"[{last_output}]scale=iw*{zoom_factor}:ih*{zoom_factor}")
-            last_output = "v9"
-            filter_chains.append(f"[{last_output}]")
+                progress_callback(100)  # Complete
+            
+            return output_path
         
-        # Pixel shifting (slight position offset)
-        pixel_shift = processing.get("pixel_shift", 1)
-        if pixel_shift > 0:
-            shift_x = random.randint(-pixel_shift, pixel_shift)
-            shift_y = random.randint(-pixel_shift, pixel_shift)
-            filter_chains.append(f"[{last_output}]crop=iw:ih:{shift_x}:{shift_y}")
-            last_output = "v10"
-            filter_chains.append(f"[{last_output}]")
+        except Exception as e:
+            print(f"Error processing video with FFmpeg: {e}")
+            if os.path.exists(output_path):
+                try:
+                    os.remove(output_path)
+                except:
+                    pass
+            raise
+    
+    def _encode_single(self, input_path, output_path, settings, params, duration, on_progress, cancel_event=None):
+        """
+        Encode the whole video with a single FFmpeg process.
         
-        # Report progress
-        if progress_callback:
-            progress_callback(50)  # Protection measures applied
-            
-        # 5. Final output (remove the last label)
-        filter_complex = "".join(filter_chains[:-1])
+        Args:
+            input_path: Path to the input video file
+            output_path: Path to write the processed video to
+            settings: Effective processing settings
+            params: Randomised content protection parameters
+            duration: Input duration in seconds (optional)
+            on_progress: Callback receiving structured progress updates
+        """
+        filter_complex = self._build_filter_complex(settings, params)
         
         # Build FFmpeg command
         command = [
@@ -203,107 +304,500 @@ class FFmpegHandler:
         ]
         
         # Add watermark input if needed
-        if watermark_path and os.path.exists(watermark_path):
-            command.extend(["-i", watermark_path])
+        if settings["watermark_path"]:
+            command.extend(["-i", settings["watermark_path"]])
         
-        # Add filter complex
+        # Add filter complex and map its output alongside the source audio
         command.extend([
-            "-filter_complex", filter_complex
+            "-filter_complex", filter_complex,
+            "-map", "[vout]",
+            "-map", "0:a?"
         ])
         
         # Add audio options (normalize audio)
-        if processing.get("audio_normalization", True):
-            command.extend([
-                "-af", "loudnorm=I=-16:LRA=11:TP=-1.5"
-            ])
+        command.extend(self._audio_options(settings))
         
         # Add output options
-        crf = processing.get("crf", 23)
-        bitrate = processing.get("bitrate", "2M")
-        threads = processing.get("threads", 4)
-        
+        command.extend(self._video_options(settings, settings["threads"]))
         command.extend([
-            "-c:v", "libx264",  # Video codec
-            "-preset", "medium",  # Encoding speed/compression ratio
-            "-crf", str(crf),  # Quality
-            "-b:v", bitrate,  # Bitrate
             "-c:a", "aac",  # Audio codec
             "-b:a", "192k",  # Audio bitrate
-            "-threads", str(threads),  # Threading
-            "-movflags", "+faststart",  # Web optimization
+            "-movflags", settings.get("movflags", self.FASTSTART_MOVFLAGS),  # Web optimization
             output_path  # Output file
         ])
         
-        # Report progress
-        if progress_callback:
-            progress_callback(60)  # Starting FFmpeg process
+        print(f"Running FFmpeg with command:\n{' '.join(command)}")
+        self._run(command, duration, on_progress, cancel_event)
+    
+    def _can_stream_copy(self, settings, params, video_info):
+        """
+        Check whether the video stream can be copied instead of re-encoded.
+        
+        This is the case when every visual effect is disabled and the source is
+        already 1080x1920 H.264 in a pixel format YouTube accepts as-is.
+        
+        Args:
+            settings: Effective processing settings
+            params: Randomised content protection parameters
+            video_info: Source information from get_video_info
+        
+        Returns:
+            bool: True if the video stream can be copied
+        """
+        if not video_info:
+            return False
+        
+        source_matches = (
+            video_info["width"] == 1080
+            and video_info["height"] == 1920
+            and video_info["codec"] == "h264"
+            and video_info.get("pix_fmt") in ("yuv420p", "yuvj420p")
+        )
+        
+        no_visual_changes = (
+            settings["color_saturation"] == 1.0
+            and settings["brightness"] == 1.0
+            and settings["zoom_pulse"] <= 1.0
+            and settings["denoise_strength"] <= 0
+            and settings["sharpness"] <= 1.0
+            and not settings["watermark_path"]
+            and params["speed"] == 1.0
+            and settings["zoom_factor"] <= 1.0
+            and settings["pixel_shift"] <= 0
+        )
+        
+        return source_matches and no_visual_changes
+    
+    def _remux(self, input_path, output_path, settings, duration, on_progress, cancel_event=None):
+        """
+        Copy the video stream into a web-optimised MP4, processing only the audio.
+        
+        Args:
+            input_path: Path to the input video file
+            output_path: Path to write the processed video to
+            settings: Effective processing settings
+            duration: Input duration in seconds (optional)
+            on_progress: Callback receiving structured progress updates
+        """
+        command = [
+            self.ffmpeg_path,
+            "-y",
+            "-i", input_path,
+            "-map", "0:v:0",
+            "-map", "0:a?",
+            "-c:v", "copy"
+        ]
+        
+        # Audio is only re-encoded when it is being normalised
+        audio_options = self._audio_options(settings)
+        if audio_options:
+            command.extend(audio_options)
+            command.extend(["-c:a", "aac", "-b:a", "192k"])
+        else:
+            command.extend(["-c:a", "copy"])
+        
+        command.extend(["-movflags", settings.get("movflags", self.FASTSTART_MOVFLAGS), output_path])
+        self._run(command, duration, on_progress, cancel_event)
+    
+    def _use_segmented_encoding(self, duration):
+        """Check whether a video is long enough for segment-parallel encoding"""
+        if not self.config.get("processing.segment_parallel", False) or not duration:
+            return False
+        
+        min_duration = self.config.get("processing.segment_min_duration", 120)
+        return duration >= min_duration
+    
+    def _encode_segmented(self, input_path, output_path, settings, params, video_info, on_progress, cancel_event=None):
+        """
+        Encode a video by splitting it, encoding the pieces in parallel and joining them.
+        
+        The video stream is split at keyframes without re-encoding, every segment is
+        encoded by its own FFmpeg process, and the results are concatenated losslessly
+        together with the separately processed audio. Time-dependent filters receive
+        each segment's starting frame so they continue where the previous one ended.
+        
+        Args:
+            input_path: Path to the input video file
+            output_path: Path to write the processed video to
+            settings: Effective processing settings
+            params: Randomised content protection parameters
+            video_info: Source information from get_video_info
+            on_progress: Callback receiving structured progress updates
+        """
+        duration = video_info["duration"]
+        fps = video_info["fps"] or 30
+        segment_time = self.config.get("processing.segment_duration", 30)
+        work_dir = tempfile.mkdtemp(prefix=".segments_", dir=self.output_dir)
         
-        # Execute FFmpeg command
         try:
-            print(f"Running FFmpeg with command:\n{' '.join(command)}")
+            # 1. Split the video stream at keyframes (stream copy, no decoding)
+            segment_list = os.path.join(work_dir, "segments.csv")
+            self._run([
+                self.ffmpeg_path, "-y",
+                "-i", input_path,
+                "-map", "0:v:0",
+                "-c", "copy",
+                "-f", "segment",
+                "-segment_time", str(segment_time),
+                "-reset_timestamps", "1",
+                "-segment_list", segment_list,
+                "-segment_list_type", "csv",
+                os.path.join(work_dir, "source_%04d.mkv")
+            ], cancel_event=cancel_event)
             
-            # Start process
-            process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True
-            )
+            segments = []
+            with open(segment_list, newline="") as f:
+                for row in csv.reader(f):
+                    if len(row) >= 3:
+                        segments.append((os.path.join(work_dir, row[0]), float(row[1]), float(row[2])))
             
-            # Monitor progress by parsing FFmpeg output
-            for line in process.stderr:
-                if "time=" in line:
-                    # Parse the time information to estimate progress
-                    time_parts = line.split("time=")[1].split()[0].split(":")
-                    hours = int(time_parts[0])
-                    minutes = int(time_parts[1])
-                    seconds = float(time_parts[2])
-                    
-                    # Calculate total seconds
-                    total_seconds = hours * 3600 + minutes * 60 + seconds
-                    
-                    # We'll need to know the duration of the video to calculate accurate progress
-                    # For now, let's just report a simple estimate (60-90%)
-                    progress = 60 + (total_seconds / 100)  # Simple estimate
-                    progress = min(90, progress)  # Cap at 90%
-                    
-                    if progress_callback:
-                        progress_callback(int(progress))
+            if not segments:
+                raise RuntimeError("FFmpeg produced no segments to encode")
             
-            # Wait for process to complete
-            process.wait()
+            cpu_count = os.cpu_count() or 1
+            workers = self.config.get("processing.segment_workers", 0) or min(len(segments), cpu_count)
+            threads = max(1, cpu_count // workers)
             
-            # Check if successful
-            if process.returncode != 0:
-                error_output = process.stderr.read()
-                raise RuntimeError(f"FFmpeg processing failed with error: {error_output}")
+            # Encoded seconds per job, summed for overall progress
+            done = {}
+            lock = threading.Lock()
             
-            # Generate a thumbnail for the processed video
-            self._generate_thumbnail(output_path)
+            def job_progress(job, update):
+                if update["out_time"] is None:
+                    return
+                with lock:
+                    done[job] = update["out_time"]
+                    fraction = min(1.0, sum(done.values()) / duration)
+                on_progress(dict(update, fraction=fraction))
             
-            # Report progress
-            if progress_callback:
-                progress_callback(100)  # Complete
+            # 2. Build the encode jobs: one per video segment, plus the audio track
+            jobs = []
+            encoded = []
+            for index, (segment_path, start, end) in enumerate(segments):
+                segment_output = os.path.join(work_dir, f"encoded_{index:04d}.mkv")
+                encoded.append(segment_output)
+                
+                filter_complex = self._build_filter_complex(
+                    settings, params, frame_offset=int(round(start * fps))
+                )
+                command = [self.ffmpeg_path, "-y", "-i", segment_path]
+                if settings["watermark_path"]:
+                    command.extend(["-i", settings["watermark_path"]])
+                command.extend(["-filter_complex", filter_complex, "-map", "[vout]", "-an"])
+                command.extend(self._video_options(settings, threads))
+                command.append(segment_output)
+                jobs.append((f"video_{index}", command, end - start))
             
-            return output_path
+            audio_output = None
+            if video_info["has_audio"]:
+                # Audio is processed as one piece so loudness normalisation sees the whole clip
+                audio_output = os.path.join(work_dir, "audio.m4a")
+                command = [self.ffmpeg_path, "-y", "-i", input_path, "-map", "0:a:0", "-vn"]
+                command.extend(self._audio_options(settings))
+                command.extend(["-c:a", "aac", "-b:a", "192k", audio_output])
+                jobs.append(("audio", command, duration))
             
-        except Exception as e:
-            print(f"Error processing video with FFmpeg: {e}")
-            if os.path.exists(output_path):
+            print(f"Encoding {len(segments)} segments with {workers} parallel FFmpeg processes")
+            
+            # 3. Encode everything in parallel worker processes
+            runners = []
+            
+            def run_job(job):
+                name, command, job_duration = job
+                runner = ProcessRunner(
+                    command,
+                    duration=job_duration,
+                    progress_callback=(lambda update: job_progress(name, update)) if name != "audio" else None,
+                    cancel_event=cancel_event
+                )
+                with lock:
+                    runners.append(runner)
+                if runner.run() != 0:
+                    if runner.cancelled:
+                        raise ProcessingCancelled("Processing was cancelled")
+                    raise RuntimeError(
+                        f"FFmpeg segment encode failed with exit code {runner.returncode}:\n{runner.error_output()}"
+                    )
+            
+            with ThreadPoolExecutor(max_workers=workers + (1 if audio_output else 0)) as executor:
+                futures = [executor.submit(run_job, job) for job in jobs]
                 try:
-                    os.remove(output_path)
-                except:
-                    pass
-            raise
+                    for future in as_completed(futures):
+                        future.result()
+                except Exception:
+                    # Stop the remaining encodes before reporting the failure
+                    for future in futures:
+                        future.cancel()
+                    with lock:
+                        for runner in runners:
+                            runner.terminate()
+                    raise
+            
+            # 4. Join the encoded segments and the audio without re-encoding
+            concat_list = os.path.join(work_dir, "concat.txt")
+            with open(concat_list, "w", encoding="utf-8") as f:
+                for segment_output in encoded:
+                    escaped = os.path.abspath(segment_output).replace("\\", "/").replace("'", "'\\''")
+                    f.write(f"file '{escaped}'\n")
+            
+            command = [self.ffmpeg_path, "-y", "-f", "concat", "-safe", "0", "-i", concat_list]
+            if audio_output:
+                command.extend(["-i", audio_output, "-map", "0:v", "-map", "1:a"])
+            command.extend(["-c", "copy", "-movflags", settings.get("movflags", self.FASTSTART_MOVFLAGS), output_path])
+            self._run(command, cancel_event=cancel_event)
+        
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    def _run(self, command, duration=None, on_progress=None, cancel_event=None):
+        """
+        Run an FFmpeg command, raising RuntimeError with its error output on failure.
+        
+        Args:
+            command: FFmpeg command as a list of arguments
+            duration: Expected output duration in seconds (optional)
+            on_progress: Callback receiving structured progress updates (optional)
+            cancel_event: threading.Event that stops the command when set (optional)
+        """
+        if cancel_event is not None and cancel_event.is_set():
+            raise ProcessingCancelled("Processing was cancelled")
+        
+        # Both output pipes are drained concurrently, so the encode can't
+        # stall on a full pipe, and the tail of stderr is kept for errors
+        runner = ProcessRunner(command, duration=duration, progress_callback=on_progress, cancel_event=cancel_event)
+        returncode = runner.run()
+        
+        if runner.cancelled:
+            raise ProcessingCancelled("Processing was cancelled")
+        
+        # Check if successful
+        if returncode != 0:
+            raise RuntimeError(
+                f"FFmpeg processing failed with exit code {returncode}:\n{runner.error_output()}"
+            )
+    
+    def _video_options(self, settings, threads):
+        """Build the video encoder options"""
+        encoder = settings["video_encoder"]
+        quality = self.ENCODER_QUALITY_OPTIONS.get(encoder, lambda crf: [])
+        
+        options = ["-c:v", encoder]  # Video codec
+        options.extend(quality(str(settings["crf"])))  # Speed/quality trade-off
+        options.extend([
+            "-b:v", settings["bitrate"],  # Bitrate
+            "-pix_fmt", "yuv420p",  # Hardware encoders need a format they accept
+            "-threads", str(threads),  # Threading
+        ])
+        return options
+    
+    def _audio_options(self, settings):
+        """Build the audio filter options (normalize audio)"""
+        if settings["audio_normalization"]:
+            return ["-af", "loudnorm=I=-16:LRA=11:TP=-1.5"]
+        return []
+    
+    def _effective_settings(self, channel_id=None):
+        """
+        Resolve the settings that determine the rendered output.
+        
+        Missing config values are filled with their defaults so the result can be
+        compared between renders (and used as part of the render cache key).
+        
+        Args:
+            channel_id: YouTube channel ID for channel-specific settings
+        
+        Returns:
+            dict: Processing settings plus the resolved watermark path
+        """
+        # Validated and merged with the defaults once per settings change
+        processing = self.config.processing_settings()
+        
+        settings = {
+            key: processing.get(key, default)
+            for key, default in self.DEFAULT_PROCESSING.items()
+        }
+        
+        # Channel-specific settings
+        channel_settings = {}
+        if channel_id:
+            channels = self.config.get("channels", {})
+            if channel_id in channels:
+                channel_settings = channels[channel_id]
+        
+        # Use the fastest encoder that works on this machine unless one is configured
+        settings["video_encoder"] = self.toolchain.video_encoder(settings["video_encoder"])
+        
+        # Turn off effects whose filters this FFmpeg build doesn't have
+        capabilities = self.toolchain.ffmpeg()
+        if capabilities:
+            for filter_name, (key, disabled) in self.OPTIONAL_FILTERS.items():
+                if filter_name not in capabilities["filters"] and settings[key] != disabled:
+                    print(f"FFmpeg has no {filter_name} filter, skipping {key}")
+                    settings[key] = disabled
+        
+        # Get watermark path (only used if the file actually exists)
+        watermark_path = channel_settings.get("watermark")
+        if not (watermark_path and os.path.exists(watermark_path)):
+            watermark_path = None
+        settings["watermark_path"] = watermark_path
+        
+        return settings
+    
+    def _render_seed(self, input_path, channel_id=None, video_id=None):
+        """
+        Derive the seed for a render's randomised parameters.
+        
+        The base seed is stored per video in the processing table and mixed with
+        the channel ID, so retries of the same video are reproducible while each
+        channel still gets different protection parameters. Videos that aren't in
+        the database fall back to a seed derived from their content.
+        
+        Args:
+            input_path: Path to the input video file
+            channel_id: YouTube channel ID
+            video_id: Database ID of the video (optional)
+        
+        Returns:
+            int: Seed for this video and channel
+        """
+        db = self.render_cache.db
+        
+        if video_id is None:
+            video = db.get_video_by_filepath(input_path)
+            video_id = video["id"] if video else None
+        
+        if video_id is not None:
+            base_seed = str(db.get_processing_seed(video_id))
+        else:
+            base_seed = self.render_cache.file_hash(input_path)
+        
+        digest = hashlib.sha256(f"{base_seed}:{channel_id or ''}".encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big")
+    
+    def _protection_params(self, settings, seed):
+        """
+        Pick the randomised content protection parameters for a render.
+        
+        Args:
+            settings: Effective processing settings
+            seed: Seed for this video and channel
+        
+        Returns:
+            dict: Seed, speed factor and pixel shift offsets
+        """
+        rng = random.Random(seed)
+        params = {"seed": seed, "speed": 1.0, "shift_x": 0, "shift_y": 0}
+        
+        # Speed randomization at video end
+        speed_randomization = settings["speed_randomization"]
+        if speed_randomization > 0:
+            params["speed"] = 1.0 + (rng.random() * speed_randomization)
+        
+        # Pixel shifting (slight position offset)
+        pixel_shift = settings["pixel_shift"]
+        if pixel_shift > 0:
+            params["shift_x"] = rng.randint(-pixel_shift, pixel_shift)
+            params["shift_y"] = rng.randint(-pixel_shift, pixel_shift)
+        
+        return params
+    
+    def _build_filter_complex(self, settings, params, frame_offset=0):
+        """
+        Build the FFmpeg filter graph with all video effects.
+        
+        Args:
+            settings: Effective processing settings
+            params: Randomised content protection parameters
+            frame_offset: Index of the first input frame within the whole video,
+                          so time-dependent effects continue across segments
+        
+        Returns:
+            str: Filter graph whose final video output is labelled [vout]
+        """
+        # 1. Format standardization to 9:16 aspect ratio (1080x1920px)
+        # Scale to fit, then pad to the exact dimensions
+        filters = [
+            "scale=1080:1920:force_original_aspect_ratio=decrease",
+            "pad=1080:1920:(ow-iw)/2:(oh-ih)/2:color=black"
+        ]
+        
+        # 2. Apply visual enhancements
+        # Color saturation adjustment
+        filters.append(f"eq=saturation={settings['color_saturation']}")
+        
+        # Brightness correction
+        filters.append(f"eq=brightness={settings['brightness'] - 1}")
+        
+        # Opening zoom pulse effect
+        # The zoom grows by 0.0015 per input frame until it reaches zoom_pulse. It is
+        # written in closed form from the absolute frame number rather than from the
+        # previous zoom, so an encode starting mid-video picks up the same curve.
+        filters.append(
+            f"zoompan=z='min(1+0.0015*(in+{frame_offset + 1}),{settings['zoom_pulse']})':d=125:s=1080x1920"
+        )
+        
+        # Temporal denoising
+        denoise_strength = settings["denoise_strength"]
+        if denoise_strength > 0:
+            filters.append(f"hqdn3d={denoise_strength}")
+        
+        # Sharpening filters
+        sharpness = settings["sharpness"]
+        if sharpness > 1.0:
+            filters.append(f"unsharp=3:3:{sharpness}:3:3:{sharpness}")
+        
+        graph = ["[0:v]" + ",".join(filters) + "[enhanced]"]
+        last_output = "enhanced"
+        
+        # 3. Add branding elements (watermark)
+        if settings["watermark_path"]:
+            watermark_opacity = settings["watermark_opacity"]
+            graph.append(f"[1:v]format=rgba,colorchannelmixer=aa={watermark_opacity}[wm]")
+            graph.append(f"[{last_output}][wm]overlay=W-w-10:H-h-10:format=auto[branded]")
+            last_output = "branded"
+        
+        # Add subscribe arrow animation (placeholder for now)
+        # This would be more complex and require an overlay image and animation timing
+        # For now, we'll skip this feature
+        
+        # 4. Content protection measures
+        filters = []
+        
+        # Speed randomization at video end
+        # A constant PTS scale, so applying it per segment gives the same timing
+        if params["speed"] != 1.0:
+            filters.append(f"setpts={1 / params['speed']}*PTS")
+        
+        # Subtle zoom factors
+        zoom_factor = settings["zoom_factor"]
+        if zoom_factor > 1.0:
+            filters.append(f"scale=iw*{zoom_factor}:ih*{zoom_factor}")
+        
+        # Pixel shifting (slight position offset)
+        if settings["pixel_shift"] > 0:
+            filters.append(f"crop=iw:ih:{params['shift_x']}:{params['shift_y']}")
+        
+        # 5. Final output
+        if not filters:
+            filters.append("null")
+        graph.append(f"[{last_output}]" + ",".join(filters) + "[vout]")
+        
+        return ";".join(graph)
     
     def _generate_thumbnail(self, video_path):
         """Generate a thumbnail for the processed video"""
         if not os.path.exists(video_path):
             return None
-            
+        
         thumbnail_path = os.path.splitext(video_path)[0] + ".jpg"
         
-        # Extract a frame at 10% into the video
+        # Prefer the best scoring frame, falling back to a fixed time
+        try:
+            if self.thumbnail_picker.pick(self.ffmpeg_path, video_path, thumbnail_path) is not None:
+                return thumbnail_path
+        except Exception as e:
+            print(f"Error picking thumbnail frame: {e}")
+        
         try:
             command = [
                 self.ffmpeg_path,
@@ -326,13 +820,13 @@ class FFmpegHandler:
         
         Args:
             video_path: Path to the video file
-            
+        
         Returns:
             Dictionary with video information
         """
         if not os.path.exists(video_path):
             raise FileNotFoundError(f"Video not found: {video_path}")
-            
+        
         try:
             ffprobe_path = self.ffmpeg_path.replace("ffmpeg", "ffprobe")
             
@@ -356,7 +850,7 @@ class FFmpegHandler:
             
             if not video_streams:
                 raise ValueError("No video stream found")
-                
+            
             # Get video info
             video_info = video_streams[0]
             format_info = info.get("format", {})
@@ -368,10 +862,11 @@ class FFmpegHandler:
                 "width": int(video_info.get("width", 0)),
                 "height": int(video_info.get("height", 0)),
                 "codec": video_info.get("codec_name", ""),
+                "pix_fmt": video_info.get("pix_fmt", ""),
                 "fps": eval(video_info.get("r_frame_rate", "0/0")),
                 "has_audio": len(audio_streams) > 0
             }
-            
+        
         except Exception as e:
             print(f"Error getting video info: {e}")
-            return None  
+            return None
@@ -0,0 +1,201 @@
+import subprocess
+import threading
+from collections import deque
+
+class ProcessingCancelled(Exception):
+    """Raised when an FFmpeg run is stopped through its cancel event"""
+
+class RingBuffer:
+    """
+    Thread-safe byte buffer that only keeps the most recent data.
+    
+    Used to hold the tail of a child process' output so error reports can
+    include the last few kilobytes without memory growing with verbose logs.
+    """
+    
+    def __init__(self, max_bytes=64 * 1024):
+        """
+        Initialize the ring buffer.
+        
+        Args:
+            max_bytes: Maximum number of bytes to retain
+        """
+        self.max_bytes = max_bytes
+        self._chunks = deque()
+        self._size = 0
+        self._lock = threading.Lock()
+    
+    def write(self, data):
+        """Append bytes, discarding the oldest data once over budget"""
+        if not data:
+            return
+        
+        with self._lock:
+            self._chunks.append(data)
+            self._size += len(data)
+            
+            # Drop whole chunks from the front, then trim the first one
+            while self._size - len(self._chunks[0]) >= self.max_bytes:
+                self._size -= len(self._chunks.popleft())
+            if self._size > self.max_bytes:
+                excess = self._size - self.max_bytes
+                self._chunks[0] = self._chunks[0][excess:]
+                self._size -= excess
+    
+    def getvalue(self):
+        """Return the buffered data decoded as text"""
+        with self._lock:
+            data = b"".join(self._chunks)
+        return data.decode("utf-8", errors="replace")
+
+class ProcessRunner:
+    """
+    Runs an FFmpeg command without risking pipe backpressure deadlocks.
+    
+    Both stdout and stderr are drained concurrently by reader threads. Stderr is
+    kept in a bounded ring buffer for error reports, and FFmpeg's machine-readable
+    progress (``-progress pipe:1``) on stdout is parsed into structured updates.
+    """
+    
+    # Seconds between checks of the cancel event
+    CANCEL_POLL_INTERVAL = 0.5
+    
+    def __init__(self, command, duration=None, progress_callback=None, tail_bytes=64 * 1024, cancel_event=None):
+        """
+        Initialize the process runner.
+        
+        Args:
+            command: FFmpeg command as a list of arguments (ffmpeg binary first)
+            duration: Expected output duration in seconds, used to compute percentages
+            progress_callback: Callback receiving a progress dict for every update
+            tail_bytes: Number of bytes of stderr/stdout output to keep for error reports
+            cancel_event: threading.Event that stops the process when set (optional)
+        """
+        # Ask FFmpeg for structured progress on stdout and keep stdin closed
+        self.command = [command[0], "-nostdin", "-nostats", "-progress", "pipe:1"] + list(command[1:])
+        self.duration = duration
+        self.progress_callback = progress_callback
+        self.stderr_tail = RingBuffer(tail_bytes)
+        self.stdout_tail = RingBuffer(tail_bytes)
+        self.progress = {}
+        self.cancel_event = cancel_event
+        self.cancelled = False
+        self.returncode = None
+        self.process = None
+    
+    def run(self):
+        """
+        Run the command to completion.
+        
+        Returns:
+            int: Process return code
+        """
+        self.process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        
+        readers = [
+            threading.Thread(target=self._read_progress, args=(self.process.stdout,), daemon=True),
+            threading.Thread(target=self._drain, args=(self.process.stderr, self.stderr_tail), daemon=True)
+        ]
+        for reader in readers:
+            reader.start()
+        
+        if self.cancel_event is None:
+            self.returncode = self.process.wait()
+        else:
+            while self.returncode is None:
+                try:
+                    self.returncode = self.process.wait(timeout=self.CANCEL_POLL_INTERVAL)
+                except subprocess.TimeoutExpired:
+                    if self.cancel_event.is_set() and not self.cancelled:
+                        self.cancelled = True
+                        self.terminate()
+        
+        # Streams hit EOF once the process exits, so the readers finish promptly
+        for reader in readers:
+            reader.join()
+        
+        return self.returncode
+    
+    def terminate(self):
+        """Stop the running process, if any"""
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+    
+    def error_output(self):
+        """Return the retained tail of the process output for error reports"""
+        return self.stderr_tail.getvalue().strip() or self.stdout_tail.getvalue().strip()
+    
+    def _drain(self, stream, buffer):
+        """Read a stream until EOF into a ring buffer"""
+        try:
+            while True:
+                chunk = stream.read1(65536)
+                if not chunk:
+                    break
+                buffer.write(chunk)
+        finally:
+            stream.close()
+    
+    def _read_progress(self, stream):
+        """Parse FFmpeg ``-progress`` key=value blocks from stdout"""
+        block = {}
+        try:
+            for raw_line in iter(stream.readline, b""):
+                self.stdout_tail.write(raw_line)
+                line = raw_line.decode("utf-8", errors="replace").strip()
+                if "=" not in line:
+                    continue
+                
+                key, value = line.split("=", 1)
+                block[key] = value
+                
+                # Each block ends with a progress=continue|end line
+                if key == "progress":
+                    self._publish(block)
+                    block = {}
+        finally:
+            stream.close()
+    
+    def _publish(self, block):
+        """Convert a raw progress block to a structured update and report it"""
+        out_time = None
+        # out_time_us is authoritative; out_time_ms is also in microseconds in FFmpeg
+        for key in ("out_time_us", "out_time_ms"):
+            try:
+                out_time = int(block[key]) / 1_000_000
+                break
+            except (KeyError, ValueError):
+                continue
+        
+        speed = block.get("speed", "").rstrip("x").strip()
+        
+        progress = {
+            "frame": _to_number(block.get("frame"), int),
+            "fps": _to_number(block.get("fps"), float),
+            "out_time": out_time,
+            "speed": _to_number(speed, float),
+            "total_size": _to_number(block.get("total_size"), int),
+            "finished": block.get("progress") == "end",
+            "fraction": None
+        }
+        
+        if self.duration and out_time is not None:
+            progress["fraction"] = max(0.0, min(1.0, out_time / self.duration))
+        elif progress["finished"]:
+            progress["fraction"] = 1.0
+        
+        self.progress = progress
+        if self.progress_callback:
+            self.progress_callback(progress)
+
+def _to_number(value, cast):
+    """Convert an FFmpeg progress value, returning None for N/A or missing values"""
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return None
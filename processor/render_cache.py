@@ -0,0 +1,168 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+
+class RenderCache:
+    """
+    Cache of completed renders, keyed by everything that determines the output.
+    
+    A cache key combines the input content hash, the effective processing settings,
+    the watermark content hash and the randomised protection parameters. Cached
+    renders live in their own directory and are tracked in the database so the
+    least recently used ones can be evicted once the cache exceeds its disk budget.
+    """
+    
+    # Bump when the filter graph changes so stale renders are no longer reused
+    KEY_VERSION = 2
+    
+    def __init__(self, config, db):
+        """
+        Initialize the render cache.
+        
+        Args:
+            config: Application configuration manager
+            db: Database manager holding the cache index
+        """
+        self.db = db
+        self.enabled = config.get("render_cache.enabled", True)
+        output_dir = config.get("output_dir", "./output")
+        self.cache_dir = config.get("render_cache.directory") or os.path.join(output_dir, ".render_cache")
+        self.max_bytes = int(config.get("render_cache.max_size_mb", 5120)) * 1024 * 1024
+        
+        # Content hashes memoised by (path, size, mtime) so retries don't re-read the file
+        self._hash_memo = {}
+        self._lock = threading.Lock()
+    
+    def file_hash(self, path):
+        """
+        Get the SHA-256 hash of a file's contents.
+        
+        Args:
+            path: Path to the file
+        
+        Returns:
+            str: Hex digest, or None if the file doesn't exist
+        """
+        if not path or not os.path.exists(path):
+            return None
+        
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if memo_key in self._hash_memo:
+                return self._hash_memo[memo_key]
+        
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        
+        with self._lock:
+            self._hash_memo[memo_key] = digest.hexdigest()
+        return digest.hexdigest()
+    
+    def make_key(self, input_path, settings, watermark_path=None, params=None):
+        """
+        Build the cache key for a render.
+        
+        Args:
+            input_path: Path to the input video
+            settings: Effective processing settings
+            watermark_path: Path to the watermark image (optional)
+            params: Randomised protection parameters (optional)
+        
+        Returns:
+            str: Cache key
+        """
+        # The watermark is identified by content, not by where it is stored
+        settings = {k: v for k, v in settings.items() if k != "watermark_path"}
+        
+        key_data = {
+            "version": self.KEY_VERSION,
+            "input": self.file_hash(input_path),
+            "settings": settings,
+            "watermark": self.file_hash(watermark_path),
+            "params": params or {}
+        }
+        encoded = json.dumps(key_data, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+    
+    def fetch(self, key, output_path):
+        """
+        Materialise a cached render at the requested output path.
+        
+        Args:
+            key: Cache key
+            output_path: Where the processed video should be placed
+        
+        Returns:
+            bool: True on a cache hit, False otherwise
+        """
+        entry = self.db.get_render_cache_entry(key)
+        if not entry:
+            return False
+        
+        cached_path = entry["filepath"]
+        if not os.path.exists(cached_path):
+            # The file was removed behind our back, forget about it
+            self.db.delete_render_cache_entry(key)
+            return False
+        
+        try:
+            _link_or_copy(cached_path, output_path)
+        except OSError as e:
+            print(f"Error reusing cached render: {e}")
+            return False
+        
+        self.db.touch_render_cache_entry(key)
+        return True
+    
+    def store(self, key, output_path):
+        """
+        Add a completed render to the cache and enforce the disk budget.
+        
+        Args:
+            key: Cache key
+            output_path: Path to the completed render
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            cached_path = os.path.join(self.cache_dir, f"{key}.mp4")
+            if not os.path.exists(cached_path):
+                _link_or_copy(output_path, cached_path)
+            self.db.add_render_cache_entry(key, cached_path, os.path.getsize(cached_path))
+        except OSError as e:
+            print(f"Error caching render: {e}")
+            return
+        
+        self.evict()
+    
+    def evict(self):
+        """Remove least recently used renders until the cache fits its budget"""
+        entries = self.db.get_render_cache_entries()  # Least recently used first
+        total = sum(entry["size_bytes"] or 0 for entry in entries)
+        
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            
+            try:
+                if os.path.exists(entry["filepath"]):
+                    os.remove(entry["filepath"])
+            except OSError as e:
+                print(f"Error evicting cached render: {e}")
+                continue
+            
+            self.db.delete_render_cache_entry(entry["cache_key"])
+            total -= entry["size_bytes"] or 0
+
+def _link_or_copy(src, dst):
+    """Hard-link a file, falling back to a copy across filesystems"""
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
@@ -0,0 +1,204 @@
+from datetime import datetime, timedelta
+
+class ProcessingScheduler:
+    """
+    Decides which queued video is processed next.
+    
+    Selection happens in three tiers:
+    
+    1. Priority: only items with the highest queue priority are considered, so
+       an operator can always push a clip to the front.
+    2. Deadlines: items whose upload is due within the deadline window are
+       rendered earliest-deadline-first. A deadline is the scheduled time in the
+       uploads table or, failing that, the channel's next free ``upload_schedule``
+       slot from the configuration.
+    3. Fair share: otherwise channels take turns using stride scheduling, a
+       weighted fair queuing scheme where each channel advances its virtual time
+       by ``1 / weight`` per started job. A channel that queues hundreds of clips
+       only gets its weighted share, and every channel keeps making progress.
+    
+    Queue items are the dictionaries used by the process tab and must provide
+    ``id`` (the video ID), ``channel_id`` and ``priority``.
+    """
+    
+    WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+    
+    def __init__(self, config, db):
+        """
+        Initialize the scheduler.
+        
+        Args:
+            config: Application configuration manager
+            db: Database manager used to look up scheduled uploads
+        """
+        self.config = config
+        self.db = db
+        
+        # Virtual time of each channel and of the scheduler as a whole
+        self._channel_pass = {}
+        self._virtual_time = 0.0
+    
+    def next_item(self, items, now=None):
+        """
+        Choose the next item to process.
+        
+        Args:
+            items: Queued items to choose from, in the order they were queued
+            now: Current time (defaults to datetime.now())
+        
+        Returns:
+            dict: The item to process next, or None if there is nothing to do
+        """
+        if not items:
+            return None
+        now = now or datetime.now()
+        
+        # Tier 1: highest priority only
+        top_priority = max(item.get("priority", 0) for item in items)
+        candidates = [item for item in items if item.get("priority", 0) == top_priority]
+        
+        deadlines = self.deadlines(candidates, now)
+        
+        # Tier 2: earliest deadline first for anything due within the window
+        horizon = now + timedelta(minutes=self.config.get("scheduler.deadline_window_minutes", 180))
+        urgent = [item for item in candidates if deadlines.get(item["id"]) and deadlines[item["id"]] <= horizon]
+        if urgent:
+            return min(urgent, key=lambda item: deadlines[item["id"]])
+        
+        # Tier 3: weighted fair share between channels
+        by_channel = {}
+        for position, item in enumerate(candidates):
+            by_channel.setdefault(item.get("channel_id") or "", []).append((position, item))
+        
+        # Channels that were idle rejoin at the current virtual time instead of
+        # cashing in the turns they missed
+        for channel_id in by_channel:
+            self._channel_pass[channel_id] = max(self._channel_pass.get(channel_id, 0.0), self._virtual_time)
+        
+        channel_id = min(
+            by_channel,
+            key=lambda channel: (self._channel_pass[channel], by_channel[channel][0][0])
+        )
+        
+        # Within a channel, clips due sooner go first, then queue order
+        return min(
+            by_channel[channel_id],
+            key=lambda entry: (deadlines.get(entry[1]["id"]) or datetime.max, entry[0])
+        )[1]
+    
+    def started(self, item):
+        """
+        Charge a started job to its channel's fair share.
+        
+        Args:
+            item: Queue item that started processing
+        """
+        channel_id = item.get("channel_id") or ""
+        start = max(self._channel_pass.get(channel_id, 0.0), self._virtual_time)
+        
+        self._virtual_time = start
+        self._channel_pass[channel_id] = start + 1.0 / self.channel_weight(channel_id)
+    
+    def channel_weight(self, channel_id):
+        """
+        Get the fair-share weight of a channel.
+        
+        Args:
+            channel_id: YouTube channel ID ("" for generic videos)
+        
+        Returns:
+            float: Positive weight, higher gets a larger share
+        """
+        default = self.config.get("scheduler.default_weight", 1)
+        channel = self.config.get("channels", {}).get(channel_id) if channel_id else None
+        weight = channel.get("weight", default) if channel else default
+        
+        try:
+            return max(float(weight), 0.01)
+        except (TypeError, ValueError):
+            return 1.0
+    
+    def deadlines(self, items, now=None):
+        """
+        Work out when each item is due for upload.
+        
+        Explicitly scheduled uploads win. Remaining items of a channel with an
+        enabled upload schedule are assigned that channel's upcoming slots in
+        queue order.
+        
+        Args:
+            items: Queue items
+            now: Current time (defaults to datetime.now())
+        
+        Returns:
+            dict: Mapping of video ID to deadline (datetime), for items that have one
+        """
+        now = now or datetime.now()
+        deadlines = {}
+        
+        scheduled = self.db.get_upload_deadlines(item["id"] for item in items)
+        for video_id, scheduled_time in scheduled.items():
+            deadline = parse_time(scheduled_time)
+            if deadline:
+                deadlines[video_id] = deadline
+        
+        # Items without an explicit upload time, grouped by channel
+        unscheduled = {}
+        for item in items:
+            if item["id"] not in deadlines and item.get("channel_id"):
+                unscheduled.setdefault(item["channel_id"], []).append(item)
+        
+        channels = self.config.get("channels", {})
+        for channel_id, channel_items in unscheduled.items():
+            schedule = channels.get(channel_id, {}).get("upload_schedule") or {}
+            if not schedule.get("enabled"):
+                continue
+            
+            slots = self.upcoming_slots(schedule, now, len(channel_items))
+            for item, slot in zip(channel_items, slots):
+                deadlines[item["id"]] = slot
+        
+        return deadlines
+    
+    def upcoming_slots(self, schedule, now, count, taken=()):
+        """
+        List the next upload slots of a channel's weekly schedule.
+        
+        Args:
+            schedule: Channel ``upload_schedule`` settings
+            now: Current time
+            count: Number of slots needed
+            taken: Slots already in use, which are skipped (optional)
+        
+        Returns:
+            list: Up to ``count`` datetimes in ascending order
+        """
+        days = {self.WEEKDAYS.index(day) for day in schedule.get("days", []) if day in self.WEEKDAYS}
+        if not days:
+            return []
+        
+        try:
+            hour, minute = (int(part) for part in schedule.get("time", "12:00").split(":"))
+            day = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        except ValueError:
+            return []
+        
+        slots = []
+        while len(slots) < count:
+            if day.weekday() in days and day > now and day not in taken:
+                slots.append(day)
+            day += timedelta(days=1)
+        return slots
+
+def parse_time(value):
+    """Parse a timestamp stored in the database, returning None if it isn't one"""
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+    
+    # Compare everything as naive local time
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value
@@ -0,0 +1,176 @@
+import re
+import subprocess
+
+# NumPy is optional; without it thumbnails are taken at a fixed time instead
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PTS_TIME_PATTERN = re.compile(r"\bn:\s*\d+\s.*?\bpts_time:\s*(-?[\d.]+)")
+
+class ThumbnailPicker:
+    """
+    Picks the best looking frame of a video as its thumbnail.
+    
+    Candidate frames are read in a single decode pass at low resolution: by
+    default only keyframes are decoded, which is fast and lands on scene
+    changes, since encoders start a new keyframe at every cut. With
+    ``thumbnail.sample_fps`` set, every frame is decoded and candidates are
+    taken at that rate instead. FFmpeg pipes the candidates as raw grayscale
+    frames and reports their timestamps through the showinfo filter.
+    
+    Candidates are scored together with NumPy on sharpness (variance of the
+    Laplacian), contrast and brightness. Frames that are nearly black, white
+    or flat are never picked. The winning moment is then extracted at full
+    resolution.
+    """
+    
+    # Size candidates are scored at (portrait, like the videos)
+    WIDTH = 72
+    HEIGHT = 128
+    
+    # Weights of the normalised scores
+    SHARPNESS_WEIGHT = 0.5
+    CONTRAST_WEIGHT = 0.3
+    BRIGHTNESS_WEIGHT = 0.2
+    
+    # Candidates outside these limits are rejected (0-255 levels)
+    MIN_BRIGHTNESS = 20
+    MAX_BRIGHTNESS = 235
+    MIN_CONTRAST = 12
+    
+    # Seconds allowed for the decode pass
+    TIMEOUT = 60
+    
+    def __init__(self, config):
+        """
+        Initialize the thumbnail picker.
+        
+        Args:
+            config: Application configuration manager
+        """
+        self.config = config
+    
+    @property
+    def available(self):
+        """Whether smart selection is enabled and NumPy is installed"""
+        return np is not None and self.config.get("thumbnail.smart_selection", True)
+    
+    def pick(self, ffmpeg_path, video_path, thumbnail_path):
+        """
+        Write the best frame of a video as a JPEG.
+        
+        Args:
+            ffmpeg_path: Path to the FFmpeg binary
+            video_path: Path to the video file
+            thumbnail_path: Where to write the thumbnail
+        
+        Returns:
+            float: Time of the chosen frame in seconds, or None if no frame was
+                   suitable or selection isn't available
+        """
+        if not self.available:
+            return None
+        
+        frames, times = self._read_candidates(ffmpeg_path, video_path)
+        if frames is None:
+            return None
+        
+        best = self.best_frame(frames)
+        if best is None:
+            return None
+        
+        command = [
+            ffmpeg_path,
+            "-y",
+            "-v", "error",
+            "-ss", f"{times[best]:.3f}",
+            "-i", video_path,
+            "-frames:v", "1",
+            "-q:v", "2",
+            thumbnail_path
+        ]
+        subprocess.run(command, check=True, capture_output=True, timeout=self.TIMEOUT)
+        return times[best]
+    
+    def best_frame(self, frames):
+        """
+        Score candidate frames.
+        
+        Args:
+            frames: Array of grayscale frames, shaped (count, height, width)
+        
+        Returns:
+            int: Index of the best frame, or None if every frame was rejected
+        """
+        frames = frames.astype(np.float32)
+        brightness = frames.mean(axis=(1, 2))
+        contrast = frames.std(axis=(1, 2))
+        
+        # Variance of the Laplacian: high for crisp edges, low for blur
+        laplacian = (
+            4 * frames[:, 1:-1, 1:-1]
+            - frames[:, :-2, 1:-1] - frames[:, 2:, 1:-1]
+            - frames[:, 1:-1, :-2] - frames[:, 1:-1, 2:]
+        )
+        sharpness = laplacian.var(axis=(1, 2))
+        
+        usable = (
+            (brightness >= self.MIN_BRIGHTNESS)
+            & (brightness <= self.MAX_BRIGHTNESS)
+            & (contrast >= self.MIN_CONTRAST)
+        )
+        if not usable.any():
+            return None
+        
+        # Sharpness is relative to the sharpest usable candidate
+        score = (
+            self.SHARPNESS_WEIGHT * sharpness / max(float(sharpness[usable].max()), 1e-6)
+            + self.CONTRAST_WEIGHT * np.minimum(contrast / 64, 1)
+            + self.BRIGHTNESS_WEIGHT * (1 - np.abs(brightness - 128) / 128)
+        )
+        return int(np.argmax(np.where(usable, score, -1)))
+    
+    def _read_candidates(self, ffmpeg_path, video_path):
+        """
+        Decode candidate frames in one pass.
+        
+        Returns:
+            tuple: (frames array, list of times in seconds), or (None, None)
+        """
+        sample_fps = float(self.config.get("thumbnail.sample_fps", 0))
+        filters = f"scale={self.WIDTH}:{self.HEIGHT}:flags=fast_bilinear,format=gray,showinfo"
+        
+        command = [ffmpeg_path, "-nostdin", "-hide_banner", "-loglevel", "info", "-threads", "0"]
+        if sample_fps > 0:
+            filters = f"fps={sample_fps}," + filters
+        else:
+            command += ["-skip_frame", "nokey"]
+        command += [
+            "-i", video_path,
+            "-an", "-sn",
+            "-vf", filters,
+            "-vsync", "0",
+            "-f", "rawvideo",
+            "-pix_fmt", "gray",
+            "-"
+        ]
+        
+        try:
+            result = subprocess.run(command, capture_output=True, timeout=self.TIMEOUT)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"Error reading thumbnail candidates: {e}")
+            return None, None
+        if result.returncode != 0:
+            print(f"Error reading thumbnail candidates: {result.stderr.decode(errors='replace')[-500:]}")
+            return None, None
+        
+        frame_size = self.WIDTH * self.HEIGHT
+        times = [float(t) for t in PTS_TIME_PATTERN.findall(result.stderr.decode(errors="replace"))]
+        count = min(len(result.stdout) // frame_size, len(times))
+        if count == 0:
+            return None, None
+        
+        frames = np.frombuffer(result.stdout, dtype=np.uint8, count=count * frame_size)
+        return frames.reshape(count, self.HEIGHT, self.WIDTH), times[:count]
@@ -0,0 +1,285 @@
+import os
+import re
+import json
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class Toolchain:
+    """
+    Detects what the installed FFmpeg and yt-dlp builds can do.
+    
+    Probing FFmpeg records its version, the encoders and filters it was built
+    with and the hardware acceleration methods it supports. Results are stored
+    in a JSON cache keyed by the resolved binary path plus its size and
+    modification time, so launches after the first read the cache instead of
+    starting processes, and upgrading a binary invalidates its entry.
+    
+    Hardware encoders are only used after a tiny test encode succeeds, since
+    FFmpeg lists them whether or not a matching GPU and driver are present. The
+    test result is cached with the rest of the capabilities.
+    """
+    
+    # Bump when the cached data changes shape
+    CACHE_VERSION = 1
+    
+    # H.264 encoders in the order they are preferred by "auto"; libx264 is the fallback
+    FAST_H264_ENCODERS = ["h264_nvenc", "h264_qsv", "h264_videotoolbox", "h264_amf"]
+    FALLBACK_ENCODER = "libx264"
+    
+    # Seconds before a probe or test encode is given up
+    PROBE_TIMEOUT = 20
+    
+    # Cache contents shared by every instance, per cache file
+    _memo = {}
+    _lock = threading.RLock()
+    
+    def __init__(self, config):
+        """
+        Initialize the toolchain.
+        
+        Args:
+            config: Application configuration manager
+        """
+        self.config = config
+        self.ytdlp_path = "yt-dlp"
+        self.cache_file = config.get("toolchain.cache_file", "./toolchain_cache.json")
+    
+    @property
+    def ffmpeg_path(self):
+        """The configured FFmpeg binary"""
+        return self.config.get("ffmpeg_path", "ffmpeg")
+    
+    def ffmpeg(self):
+        """
+        Get the capabilities of the configured FFmpeg.
+        
+        Returns:
+            dict: Binary path, version, encoders, filters and hwaccels, or None if
+                  FFmpeg isn't available
+        """
+        return self._capabilities(self.ffmpeg_path, self._probe_ffmpeg)
+    
+    def ytdlp(self):
+        """
+        Get the capabilities of the configured yt-dlp.
+        
+        Returns:
+            dict: Binary path and version, or None if yt-dlp isn't available
+        """
+        return self._capabilities(self.ytdlp_path, self._probe_ytdlp)
+    
+    def probe_all(self):
+        """
+        Probe every tool, in parallel where the cache can't answer.
+        
+        Returns:
+            dict: Mapping of tool name to its capabilities (None if unavailable)
+        """
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            ffmpeg = executor.submit(self.ffmpeg)
+            ytdlp = executor.submit(self.ytdlp)
+            return {"ffmpeg": ffmpeg.result(), "yt-dlp": ytdlp.result()}
+    
+    def has_encoder(self, name):
+        """Check whether FFmpeg was built with an encoder"""
+        capabilities = self.ffmpeg()
+        return bool(capabilities) and name in capabilities["encoders"]
+    
+    def has_filter(self, name):
+        """Check whether FFmpeg was built with a filter"""
+        capabilities = self.ffmpeg()
+        return bool(capabilities) and name in capabilities["filters"]
+    
+    def video_encoder(self, preference="auto"):
+        """
+        Choose the H.264 encoder to render with.
+        
+        Args:
+            preference: Encoder name, or "auto" for the fastest one that works
+        
+        Returns:
+            str: FFmpeg encoder name
+        """
+        if preference and preference != "auto":
+            return preference
+        
+        for encoder in self.FAST_H264_ENCODERS:
+            if self.has_encoder(encoder) and self.encoder_works(encoder):
+                return encoder
+        return self.FALLBACK_ENCODER
+    
+    def encoder_works(self, encoder):
+        """
+        Check that an encoder can actually encode on this machine.
+        
+        Args:
+            encoder: FFmpeg encoder name
+        
+        Returns:
+            bool: True if a short test encode succeeded
+        """
+        capabilities = self.ffmpeg()
+        if not capabilities:
+            return False
+        
+        with self._lock:
+            tested = capabilities.setdefault("working_encoders", {})
+            if encoder not in tested:
+                tested[encoder] = self._test_encode(capabilities["path"], encoder)
+                print(f"Test encode with {encoder}: {'ok' if tested[encoder] else 'unavailable'}")
+                self._save_cache()
+            return tested[encoder]
+    
+    def _capabilities(self, binary, probe):
+        """
+        Get a binary's capabilities from the cache, probing it on a miss.
+        
+        Args:
+            binary: Configured binary name or path
+            probe: Function taking the resolved path and returning its capabilities
+        
+        Returns:
+            dict: Capabilities, or None if the binary isn't available
+        """
+        resolved = shutil.which(binary)
+        if not resolved:
+            return None
+        resolved = os.path.realpath(resolved)
+        
+        try:
+            stat = os.stat(resolved)
+        except OSError:
+            return None
+        signature = [stat.st_size, stat.st_mtime_ns]
+        
+        with self._lock:
+            entry = self._load_cache().get(resolved)
+            if entry and entry.get("signature") == signature:
+                return entry
+        
+        # Probe outside the lock so both tools can be probed at once
+        try:
+            entry = probe(resolved)
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"Error probing {binary}: {e}")
+            return None
+        if entry is None:
+            return None
+        entry.update(path=resolved, signature=signature)
+        
+        with self._lock:
+            self._load_cache()[resolved] = entry
+            self._save_cache()
+        return entry
+    
+    def _probe_ffmpeg(self, path):
+        """Run FFmpeg's listing options and parse what it supports"""
+        options = ["-version", "-encoders", "-filters", "-hwaccels"]
+        with ThreadPoolExecutor(max_workers=len(options)) as executor:
+            outputs = dict(zip(options, executor.map(lambda option: self._run(path, "-hide_banner", option), options)))
+        
+        if outputs["-version"] is None:
+            return None
+        
+        return {
+            "version": outputs["-version"].split("\n")[0].strip(),
+            "encoders": _parse_listing(outputs["-encoders"] or "", r"[VAS][A-Z.]{5}"),
+            "filters": _parse_listing(outputs["-filters"] or "", r"[TSC.]{2,3}"),
+            "hwaccels": [
+                line.strip() for line in (outputs["-hwaccels"] or "").splitlines()[1:] if line.strip()
+            ],
+            "working_encoders": {}
+        }
+    
+    def _probe_ytdlp(self, path):
+        """Get yt-dlp's version"""
+        output = self._run(path, "--version")
+        if output is None:
+            return None
+        return {"version": output.strip().split("\n")[0]}
+    
+    def _run(self, path, *args):
+        """Run a tool and return its output, or None if it failed"""
+        result = subprocess.run(
+            [path, *args],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            timeout=self.PROBE_TIMEOUT,
+            check=False
+        )
+        return result.stdout if result.returncode == 0 else None
+    
+    def _test_encode(self, path, encoder):
+        """Encode a few generated frames with an encoder, discarding the output"""
+        try:
+            result = subprocess.run(
+                [
+                    path, "-hide_banner", "-loglevel", "error",
+                    "-f", "lavfi", "-i", "color=c=black:s=256x256:r=30",
+                    "-frames:v", "5",
+                    "-c:v", encoder,
+                    "-pix_fmt", "yuv420p",
+                    "-f", "null", "-"
+                ],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=self.PROBE_TIMEOUT,
+                check=False
+            )
+        except (OSError, subprocess.SubprocessError):
+            return False
+        return result.returncode == 0
+    
+    def _load_cache(self):
+        """Get the cache contents, reading the file once per process (call with the lock held)"""
+        if self.cache_file not in self._memo:
+            entries = {}
+            try:
+                with open(self.cache_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == self.CACHE_VERSION:
+                    entries = data.get("binaries", {})
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, AttributeError) as e:
+                print(f"Ignoring unreadable toolchain cache: {e}")
+            self._memo[self.cache_file] = entries
+        return self._memo[self.cache_file]
+    
+    def _save_cache(self):
+        """Write the cache file atomically (call with the lock held)"""
+        data = {"version": self.CACHE_VERSION, "binaries": self._load_cache()}
+        temp_path = f"{self.cache_file}.tmp"
+        try:
+            directory = os.path.dirname(os.path.abspath(self.cache_file))
+            os.makedirs(directory, exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(temp_path, self.cache_file)
+        except OSError as e:
+            print(f"Error saving toolchain cache: {e}")
+
+def _parse_listing(output, flags_pattern):
+    """
+    Parse the names out of ``ffmpeg -encoders`` or ``ffmpeg -filters`` output.
+    
+    Entries look like `` V....D libx264   description``; legend lines such as
+    `` V..... = Video`` are skipped.
+    
+    Args:
+        output: Listing output
+        flags_pattern: Regular expression matching the flags column
+    
+    Returns:
+        list: Sorted entry names
+    """
+    flags = re.compile(flags_pattern + "$")
+    names = set()
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) >= 2 and parts[1] != "=" and flags.match(parts[0]):
+            names.add(parts[1])
+    return sorted(names)
@@ -5,7 +5,10 @@ This package handles YouTube API integration for uploading and managing videos,
 including authentication, scheduling, and status tracking.
 """
 
-# Import modules to be exposed at the package level
-# This will be populated as modules are implemented
+from uploader.youtube_uploader import YouTubeUploader, UploadError, UploadCancelled, QuotaExceeded
+from uploader.scheduler import UploadScheduler, BandwidthLimiter
+from uploader.dispatcher import PublishDispatcher
+from uploader.streaming import StreamingUpload
 
-__all__ = []  
+__all__ = ['YouTubeUploader', 'UploadError', 'UploadCancelled', 'QuotaExceeded',
+           'UploadScheduler', 'BandwidthLimiter', 'PublishDispatcher', 'StreamingUpload']
@@ -0,0 +1,238 @@
+import heapq
+import itertools
+import threading
+from datetime import datetime, timedelta, timezone
+
+from processor.scheduler import ProcessingScheduler, parse_time
+
+class PublishDispatcher:
+    """
+    Starts scheduled uploads ahead of their publish times.
+    
+    Pending scheduled uploads are read from the database once, when the
+    dispatcher starts, and kept in a heap ordered by the moment each one should
+    be staged: ``upload.prestage_minutes`` before its publish time. The
+    dispatcher thread sleeps until exactly that moment, or until an earlier
+    upload is scheduled, instead of polling the database.
+    
+    Staging hands the upload to the UploadScheduler with a ``publish_at`` time,
+    so the video is uploaded as private and YouTube makes it public on schedule
+    no matter how long the upload queue was. Uploads whose publish time has
+    already passed are uploaded as public right away.
+    
+    Rescheduled and cancelled uploads are removed lazily: the heap keeps their
+    old entries, which are skipped when they come up.
+    """
+    
+    # Upper bound on a single sleep, so a changed system clock is noticed
+    MAX_SLEEP = 3600
+    
+    def __init__(self, config, db, scheduler, on_staged=None):
+        """
+        Initialize the dispatcher.
+        
+        Args:
+            config: Application configuration manager
+            db: Database manager holding the scheduled uploads
+            scheduler: UploadScheduler that performs the uploads
+            on_staged: Callback receiving the key of each upload handed to the
+                       scheduler, called on the dispatcher thread (optional)
+        """
+        self.config = config
+        self.db = db
+        self.scheduler = scheduler
+        self.on_staged = on_staged
+        self.slots = ProcessingScheduler(config, db)
+        
+        self._condition = threading.Condition()
+        self._heap = []
+        self._entries = {}
+        self._sequence = itertools.count()
+        self._thread = None
+        self._stopping = False
+    
+    @property
+    def lead_time(self):
+        """How long before its publish time an upload is started"""
+        return timedelta(minutes=float(self.config.get("upload.prestage_minutes", 180)))
+    
+    def start(self, load_pending=True):
+        """
+        Start the dispatcher thread.
+        
+        Args:
+            load_pending: Read the scheduled uploads stored in the database first
+        """
+        if load_pending:
+            for video in self.db.get_scheduled_uploads():
+                publish_time = parse_time(video["scheduled_time"])
+                if publish_time is None:
+                    continue
+                self._add(
+                    video["id"],
+                    video["processed_filepath"] or video["filepath"],
+                    self.scheduler.uploader.video_metadata(video),
+                    publish_time,
+                    video["id"],
+                    video["channel_id"]
+                )
+        
+        with self._condition:
+            self._stopping = False
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="publish-dispatcher", daemon=True)
+                self._thread.start()
+    
+    def stop(self, timeout=None):
+        """
+        Stop the dispatcher thread.
+        
+        Args:
+            timeout: Seconds to wait for the thread (optional)
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+            thread, self._thread = self._thread, None
+        
+        if thread is not None:
+            thread.join(timeout)
+    
+    def schedule(self, key, filepath, metadata, publish_time, video_id=None, channel_id=None):
+        """
+        Schedule an upload to go public at a given time.
+        
+        Scheduling a key again replaces its earlier publish time.
+        
+        Args:
+            key: Identifier passed to the UploadScheduler
+            filepath: Path to the video file
+            metadata: Upload metadata (see YouTubeUploader.video_metadata)
+            publish_time: When the video should go public (datetime, local time)
+            video_id: Database ID of the video, to store the schedule (optional)
+            channel_id: YouTube channel ID to upload to (optional)
+        """
+        if video_id is not None:
+            self.db.schedule_upload(video_id, publish_time.strftime("%Y-%m-%d %H:%M:%S"), channel_id)
+        self._add(key, filepath, metadata, publish_time, video_id, channel_id)
+    
+    def schedule_next_slot(self, video):
+        """
+        Schedule a video in its channel's next free ``upload_schedule`` slot.
+        
+        Args:
+            video: Row from get_videos_ready_for_upload
+        
+        Returns:
+            datetime: The publish time, or None if the channel has no enabled schedule
+        """
+        channel = self.config.get("channels", {}).get(video["channel_id"]) if video["channel_id"] else None
+        schedule = (channel or {}).get("upload_schedule") or {}
+        if not schedule.get("enabled"):
+            return None
+        
+        with self._condition:
+            taken = {
+                entry["publish_time"] for entry in self._entries.values()
+                if entry["channel_id"] == video["channel_id"]
+            }
+        slots = self.slots.upcoming_slots(schedule, datetime.now(), 1, taken)
+        if not slots:
+            return None
+        
+        self.schedule(
+            video["id"],
+            video["processed_filepath"] or video["filepath"],
+            self.scheduler.uploader.video_metadata(video),
+            slots[0],
+            video["id"],
+            video["channel_id"]
+        )
+        return slots[0]
+    
+    def cancel(self, key):
+        """
+        Remove a scheduled upload that hasn't been staged yet.
+        
+        Args:
+            key: Identifier the upload was scheduled with
+        
+        Returns:
+            bool: True if the upload was waiting to be staged
+        """
+        with self._condition:
+            return self._entries.pop(key, None) is not None
+    
+    def is_scheduled(self, key):
+        """Check whether an upload is waiting to be staged"""
+        with self._condition:
+            return key in self._entries
+    
+    def _add(self, key, filepath, metadata, publish_time, video_id, channel_id):
+        """Put an upload on the heap, waking the thread if it is now the first one due"""
+        entry = {
+            "key": key,
+            "filepath": filepath,
+            "metadata": metadata,
+            "publish_time": publish_time,
+            "video_id": video_id,
+            "channel_id": channel_id
+        }
+        stage_at = (publish_time - self.lead_time).timestamp()
+        
+        with self._condition:
+            self._entries[key] = entry
+            heapq.heappush(self._heap, (stage_at, next(self._sequence), entry))
+            if self._heap[0][2] is entry:
+                self._condition.notify()
+    
+    def _run(self):
+        """Dispatcher thread: stage each upload when it becomes due"""
+        while True:
+            with self._condition:
+                entry = None
+                while not self._stopping:
+                    # Drop entries that were rescheduled or cancelled
+                    while self._heap and self._entries.get(self._heap[0][2]["key"]) is not self._heap[0][2]:
+                        heapq.heappop(self._heap)
+                    
+                    if not self._heap:
+                        self._condition.wait()
+                        continue
+                    
+                    delay = self._heap[0][0] - datetime.now().timestamp()
+                    if delay <= 0:
+                        entry = heapq.heappop(self._heap)[2]
+                        del self._entries[entry["key"]]
+                        break
+                    self._condition.wait(min(delay, self.MAX_SLEEP))
+                
+                if entry is None:
+                    return
+            
+            self._stage(entry)
+    
+    def _stage(self, entry):
+        """Hand an upload to the scheduler"""
+        metadata = dict(entry["metadata"])
+        if entry["publish_time"] > datetime.now():
+            metadata["publish_at"] = entry["publish_time"].astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        else:
+            print(f"Publish time of upload {entry['key']} has passed, publishing right away")
+            metadata["publish_at"] = None
+            metadata["privacy_status"] = "public"
+        
+        print(f"Staging upload {entry['key']} for {entry['publish_time']:%Y-%m-%d %H:%M}")
+        self.scheduler.submit(
+            entry["key"],
+            entry["filepath"],
+            metadata,
+            video_id=entry["video_id"],
+            channel_id=entry["channel_id"]
+        )
+        
+        if self.on_staged is not None:
+            try:
+                self.on_staged(entry["key"])
+            except Exception as e:
+                print(f"Error in publish dispatcher callback: {e}")
@@ -0,0 +1,384 @@
+import time
+import threading
+from collections import deque
+
+from uploader.youtube_uploader import YouTubeUploader, UploadError, UploadCancelled, QuotaExceeded
+
+# YouTube API quota days start at midnight Pacific time, approximated as 08:00 UTC
+QUOTA_DAY_OFFSET = 8 * 3600
+
+def quota_day(now=None):
+    """
+    Get the API quota day a moment falls in.
+    
+    Args:
+        now: Unix time (defaults to the current time)
+    
+    Returns:
+        str: Date of the quota day as YYYY-MM-DD
+    """
+    now = time.time() if now is None else now
+    return time.strftime("%Y-%m-%d", time.gmtime(now - QUOTA_DAY_OFFSET))
+
+def next_quota_reset(now=None):
+    """
+    Get the moment the API quota is reset next.
+    
+    Args:
+        now: Unix time (defaults to the current time)
+    
+    Returns:
+        float: Unix time of the next reset
+    """
+    now = time.time() if now is None else now
+    return ((now - QUOTA_DAY_OFFSET) // 86400 + 1) * 86400 + QUOTA_DAY_OFFSET
+
+def quota_project(config, channel_id):
+    """
+    Get the API project whose quota a channel's uploads use.
+    
+    Args:
+        config: Application configuration manager
+        channel_id: YouTube channel ID (optional)
+    
+    Returns:
+        str: The channel's ``quota_project`` setting, or "default"
+    """
+    channel = config.get("channels", {}).get(channel_id) if channel_id else None
+    return (channel or {}).get("quota_project") or "default"
+
+class BandwidthLimiter:
+    """
+    Token bucket shared by all upload threads to cap the total upload rate.
+    
+    Each chunk takes its size in tokens before it is sent. The bucket may go
+    into debt for a chunk larger than what it holds, and the sender then waits
+    until the debt is paid off, so the long-term rate matches the limit while
+    a single chunk is never split.
+    """
+    
+    def __init__(self, config):
+        """
+        Initialize the limiter.
+        
+        Args:
+            config: Application configuration manager (reads upload.max_bandwidth_mbps)
+        """
+        self.config = config
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+    
+    @property
+    def rate(self):
+        """Allowed bytes per second, or 0 for no limit"""
+        return float(self.config.get("upload.max_bandwidth_mbps", 0)) * 1000 * 1000 / 8
+    
+    def consume(self, nbytes, cancel_event=None):
+        """
+        Wait until a number of bytes may be sent.
+        
+        Args:
+            nbytes: Size of the data about to be sent
+            cancel_event: threading.Event that ends the wait early (optional)
+        """
+        rate = self.rate
+        if rate <= 0:
+            return
+        
+        with self._lock:
+            now = time.monotonic()
+            # Allow bursts of up to one second's worth of data
+            self._tokens = min(rate, self._tokens + (now - self._updated) * rate)
+            self._updated = now
+            self._tokens -= nbytes
+            delay = -self._tokens / rate if self._tokens < 0 else 0
+        
+        if delay > 0:
+            if cancel_event is not None:
+                cancel_event.wait(delay)
+            else:
+                time.sleep(delay)
+
+class UploadScheduler:
+    """
+    Runs uploads on a pool of background threads.
+    
+    Jobs are started in the order they were submitted, subject to three limits:
+    
+    1. Concurrency: at most ``upload.workers`` uploads run at once, and at most
+       ``upload.per_channel`` of them for the same channel.
+    2. Bandwidth: all uploads share one BandwidthLimiter.
+    3. Quota: every new upload session costs ``upload.quota_cost`` API units,
+       counted per quota project and day in the database. Jobs whose project
+       can't afford another upload wait until the quota resets, and so do jobs
+       whose upload was refused with a quota error.
+    
+    Failed uploads are retried with exponential backoff up to
+    ``upload.max_attempts`` times before they are reported as failed.
+    Successful and failed uploads of known videos are recorded in the database.
+    
+    Callbacks run on the worker threads:
+    
+    - ``on_progress(key, bytes_uploaded, total_bytes)``
+    - ``on_finished(key, video_resource)``
+    - ``on_failed(key, error)``, where error is an exception (UploadCancelled
+      when the job was cancelled)
+    - ``on_deferred(key, retry_at, reason)``, where retry_at is a Unix time
+    """
+    
+    def __init__(self, config, db, uploader=None, on_progress=None, on_finished=None,
+                 on_failed=None, on_deferred=None):
+        """
+        Initialize the scheduler.
+        
+        Args:
+            config: Application configuration manager
+            db: Database manager storing upload sessions and quota usage
+            uploader: YouTubeUploader to use (optional, created with the shared limiter)
+            on_progress: Progress callback (optional)
+            on_finished: Completion callback (optional)
+            on_failed: Failure callback (optional)
+            on_deferred: Callback for jobs put off until later (optional)
+        """
+        self.config = config
+        self.db = db
+        self.limiter = BandwidthLimiter(config)
+        self.uploader = uploader or YouTubeUploader(config, db, throttle=self.limiter.consume)
+        
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.on_failed = on_failed
+        self.on_deferred = on_deferred
+        
+        self._condition = threading.Condition()
+        self._pending = deque()
+        self._running = {}
+        self._threads = []
+        self._stopping = False
+    
+    def start(self):
+        """Start the worker threads"""
+        with self._condition:
+            if self._threads:
+                return
+            self._stopping = False
+            workers = max(int(self.config.get("upload.workers", 3)), 1)
+            for number in range(workers):
+                thread = threading.Thread(target=self._worker, name=f"upload-{number + 1}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+    
+    def stop(self, timeout=None):
+        """
+        Stop the worker threads, interrupting running uploads.
+        
+        Interrupted uploads keep their sessions and resume when submitted again.
+        
+        Args:
+            timeout: Seconds to wait for each thread (optional)
+        """
+        with self._condition:
+            self._stopping = True
+            for job in self._running.values():
+                job["cancel_event"].set()
+            self._condition.notify_all()
+            threads, self._threads = self._threads, []
+        
+        for thread in threads:
+            thread.join(timeout)
+    
+    def submit(self, key, filepath, metadata, video_id=None, channel_id=None):
+        """
+        Queue an upload.
+        
+        Args:
+            key: Identifier passed to the callbacks; must be unique among queued jobs
+            filepath: Path to the video file
+            metadata: Upload metadata (see YouTubeUploader.video_metadata)
+            video_id: Database ID of the video (optional)
+            channel_id: YouTube channel ID to upload to (optional)
+        """
+        job = {
+            "key": key,
+            "filepath": filepath,
+            "metadata": metadata,
+            "video_id": video_id,
+            "channel_id": channel_id,
+            "attempts": 0,
+            "retry_at": 0,
+            "cancel_event": threading.Event()
+        }
+        with self._condition:
+            self._pending.append(job)
+            self._condition.notify()
+    
+    def cancel(self, key):
+        """
+        Cancel a queued or running upload.
+        
+        Args:
+            key: Identifier the job was submitted with
+        
+        Returns:
+            bool: True if the job was found
+        """
+        with self._condition:
+            if key in self._running:
+                self._running[key]["cancel_event"].set()
+                return True
+            
+            for job in self._pending:
+                if job["key"] == key:
+                    self._pending.remove(job)
+                    break
+            else:
+                return False
+        
+        self._call(self.on_failed, key, UploadCancelled("Upload was cancelled"))
+        return True
+    
+    def has_job(self, key):
+        """Check whether a job is queued or running"""
+        with self._condition:
+            return key in self._running or any(job["key"] == key for job in self._pending)
+    
+    def quota_remaining(self, channel_id=None, now=None):
+        """
+        Get the API units left today for a channel's quota project.
+        
+        Args:
+            channel_id: YouTube channel ID (optional)
+            now: Unix time (defaults to the current time)
+        
+        Returns:
+            int: Units left, 0 if the quota was reported exhausted
+        """
+        usage = self.db.get_quota_usage(quota_project(self.config, channel_id), quota_day(now))
+        if usage["exhausted"]:
+            return 0
+        return max(int(self.config.get("upload.daily_quota", 10000)) - usage["units_used"], 0)
+    
+    def _worker(self):
+        """Worker thread: run jobs until stopped"""
+        while True:
+            with self._condition:
+                job = None
+                while not self._stopping:
+                    job, wake_at = self._next_job(time.time())
+                    if job is not None:
+                        break
+                    self._condition.wait(None if wake_at is None else max(wake_at - time.time(), 0))
+                if job is None:
+                    return
+                
+                self._pending.remove(job)
+                self._running[job["key"]] = job
+            
+            try:
+                self._run(job)
+            finally:
+                with self._condition:
+                    self._running.pop(job["key"], None)
+                    # A channel slot is free again
+                    self._condition.notify_all()
+    
+    def _next_job(self, now):
+        """
+        Find the first queued job allowed to start (call with the lock held).
+        
+        Returns:
+            tuple: (job or None, Unix time when a waiting job may become ready or None)
+        """
+        per_channel = max(int(self.config.get("upload.per_channel", 1)), 1)
+        cost = int(self.config.get("upload.quota_cost", 1600))
+        
+        running_per_channel = {}
+        for job in self._running.values():
+            running_per_channel[job["channel_id"]] = running_per_channel.get(job["channel_id"], 0) + 1
+        
+        affordable = {}
+        wake_at = None
+        for job in self._pending:
+            if job["retry_at"] > now:
+                wake_at = job["retry_at"] if wake_at is None else min(wake_at, job["retry_at"])
+                continue
+            if running_per_channel.get(job["channel_id"], 0) >= per_channel:
+                continue
+            
+            project = quota_project(self.config, job["channel_id"])
+            if project not in affordable:
+                affordable[project] = self.quota_remaining(job["channel_id"], now) >= cost
+            if not affordable[project] and not self._has_session(job):
+                # Resuming an existing session costs no quota
+                job["retry_at"] = next_quota_reset(now)
+                wake_at = job["retry_at"] if wake_at is None else min(wake_at, job["retry_at"])
+                self._call(self.on_deferred, job["key"], job["retry_at"], "daily API quota used up")
+                continue
+            
+            return job, wake_at
+        
+        return None, wake_at
+    
+    def _run(self, job):
+        """Upload one job and handle the outcome"""
+        key = job["key"]
+        video_id = job["video_id"]
+        
+        if not self._has_session(job):
+            self.db.add_quota_usage(quota_project(self.config, job["channel_id"]), quota_day(),
+                                    int(self.config.get("upload.quota_cost", 1600)))
+        
+        try:
+            result = self.uploader.upload(
+                job["filepath"],
+                job["metadata"],
+                video_id=video_id,
+                channel_id=job["channel_id"],
+                progress_callback=lambda sent, total: self._call(self.on_progress, key, sent, total),
+                cancel_event=job["cancel_event"]
+            )
+        except UploadCancelled as e:
+            self._call(self.on_failed, key, e)
+        except QuotaExceeded as e:
+            self.db.mark_quota_exhausted(quota_project(self.config, job["channel_id"]), quota_day())
+            self._defer(job, next_quota_reset(), f"quota exceeded ({e})")
+        except UploadError as e:
+            job["attempts"] += 1
+            if job["attempts"] >= int(self.config.get("upload.max_attempts", 3)):
+                if video_id is not None:
+                    self.db.record_upload_failure(video_id, str(e))
+                self._call(self.on_failed, key, e)
+            else:
+                delay = min(60 * 2 ** (job["attempts"] - 1), 3600)
+                self._defer(job, time.time() + delay, str(e))
+        else:
+            if video_id is not None:
+                self.db.record_upload(video_id, result["id"], f"https://youtube.com/shorts/{result['id']}")
+            self._call(self.on_finished, key, result)
+    
+    def _defer(self, job, retry_at, reason):
+        """Put a job back in the queue to be started no earlier than retry_at"""
+        job["retry_at"] = retry_at
+        job["cancel_event"].clear()
+        with self._condition:
+            self._pending.append(job)
+            self._condition.notify()
+        print(f"Upload {job['key']} deferred until {time.strftime('%Y-%m-%d %H:%M', time.localtime(retry_at))}: {reason}")
+        self._call(self.on_deferred, job["key"], retry_at, reason)
+    
+    def _has_session(self, job):
+        """Check whether a job can resume an existing upload session"""
+        if job["video_id"] is None:
+            return False
+        session = self.db.get_upload_session(job["video_id"])
+        return bool(session and session["session_uri"])
+    
+    def _call(self, callback, *args):
+        """Run a callback, logging instead of raising its errors"""
+        if callback is None:
+            return
+        try:
+            callback(*args)
+        except Exception as e:
+            print(f"Error in upload callback: {e}")
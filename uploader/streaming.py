@@ -0,0 +1,141 @@
+import threading
+
+from uploader.youtube_uploader import YouTubeUploader
+from uploader.scheduler import BandwidthLimiter, quota_day, quota_project
+
+class StreamingUpload:
+    """
+    Processes a video and uploads it at the same time.
+    
+    FFmpeg writes the output as fragmented MP4, which is only ever appended
+    to, and the resumable upload session is opened right away. Chunks are sent
+    as soon as they are on disk, so when encoding ends only the last chunk is
+    left to upload, and there is no faststart pass rewriting the file.
+    
+    Enabled with ``upload.stream_while_encoding``. Channels with an upload
+    schedule aren't streamed, since their videos are uploaded ahead of their
+    publish time anyway, and neither are uploads the API quota can't cover.
+    """
+    
+    # Seconds between checks for a cancel request from the caller
+    CANCEL_CHECK_INTERVAL = 0.2
+    
+    def __init__(self, config, db, ffmpeg, uploader=None):
+        """
+        Initialize the streaming upload.
+        
+        Args:
+            config: Application configuration manager
+            db: Database manager storing sessions and quota usage
+            ffmpeg: FFmpegHandler that processes the videos
+            uploader: YouTubeUploader to use (optional, created with its own limiter)
+        """
+        self.config = config
+        self.db = db
+        self.ffmpeg = ffmpeg
+        self.uploader = uploader or YouTubeUploader(config, db, throttle=BandwidthLimiter(config).consume)
+    
+    def can_stream(self, channel_id):
+        """
+        Check whether a channel's videos should be uploaded while they are encoded.
+        
+        Args:
+            channel_id: YouTube channel ID (optional)
+        
+        Returns:
+            bool: True if streaming is enabled and nothing rules it out
+        """
+        if not self.config.get("upload.stream_while_encoding", False) or not channel_id:
+            return False
+        
+        channel = self.config.get("channels", {}).get(channel_id) or {}
+        if (channel.get("upload_schedule") or {}).get("enabled"):
+            return False
+        
+        usage = self.db.get_quota_usage(quota_project(self.config, channel_id), quota_day())
+        remaining = int(self.config.get("upload.daily_quota", 10000)) - usage["units_used"]
+        return not usage["exhausted"] and remaining >= int(self.config.get("upload.quota_cost", 1600))
+    
+    def process_and_upload(self, input_path, output_path, metadata, channel_id=None, video_id=None,
+                           progress_callback=None, cancel_event=None):
+        """
+        Process a video while uploading the output.
+        
+        Processing errors win over upload errors: if encoding fails the upload
+        is abandoned and the processing error is raised. If only the upload
+        fails, processing still runs to completion, so the output can be
+        uploaded normally later.
+        
+        Args:
+            input_path: Path to the input video file
+            output_path: Where to write the processed video
+            metadata: Upload metadata (see YouTubeUploader.video_metadata)
+            channel_id: YouTube channel ID (optional)
+            video_id: Database ID of the video (optional)
+            progress_callback: Callback receiving processing progress (0-100) (optional)
+            cancel_event: threading.Event that stops both processing and upload (optional)
+        
+        Returns:
+            dict: The uploaded video resource, including its ``id``
+        
+        Raises:
+            ProcessingCancelled: If cancelled
+            UploadError: If processing succeeded but the upload failed
+        """
+        complete = threading.Event()
+        abort = threading.Event()
+        outcome = {}
+        
+        def process():
+            try:
+                self.ffmpeg.process_video(
+                    input_path,
+                    channel_id,
+                    progress_callback=progress_callback,
+                    video_id=video_id,
+                    output_path=output_path,
+                    cancel_event=abort,
+                    fragmented=True
+                )
+            except Exception as e:
+                outcome["error"] = e
+                abort.set()  # The partial output must not be uploaded
+            finally:
+                complete.set()
+        
+        processing = threading.Thread(target=process, name="streaming-encode", daemon=True)
+        processing.start()
+        if cancel_event is not None:
+            threading.Thread(
+                target=self._forward_cancel, args=(cancel_event, abort, complete), daemon=True
+            ).start()
+        
+        self.db.add_quota_usage(
+            quota_project(self.config, channel_id), quota_day(), int(self.config.get("upload.quota_cost", 1600))
+        )
+        
+        try:
+            result = self.uploader.upload_growing(
+                output_path,
+                metadata,
+                complete,
+                video_id=video_id,
+                channel_id=channel_id,
+                cancel_event=abort
+            )
+        except Exception as e:
+            processing.join()
+            if "error" in outcome:
+                raise outcome["error"]
+            print(f"Streaming upload of {output_path} failed, processing finished: {e}")
+            raise
+        
+        processing.join()
+        return result
+    
+    def _forward_cancel(self, cancel_event, abort, complete):
+        """Pass a cancel request from the caller on until processing ends"""
+        while not complete.wait(self.CANCEL_CHECK_INTERVAL):
+            if cancel_event.is_set():
+                abort.set()
+                return
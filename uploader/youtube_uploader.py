@@ -0,0 +1,459 @@
+import os
+import json
+import time
+import random
+import urllib.error
+import urllib.parse
+import urllib.request
+
+class UploadError(Exception):
+    """Raised when an upload fails in a way retrying won't fix"""
+
+class UploadCancelled(Exception):
+    """Raised when an upload is stopped through its cancel event"""
+
+class QuotaExceeded(UploadError):
+    """Raised when the API refuses an upload because the daily quota is used up"""
+
+class YouTubeUploader:
+    """
+    Uploads videos with the YouTube Data API resumable upload protocol.
+    
+    An upload starts by creating an upload session, whose URI is stored in the
+    uploads table together with the number of bytes the server has
+    acknowledged. The file is then sent in chunks. After a network error, a
+    server error or a restart, the server is asked how much it already has and
+    the upload continues from that byte, so a video is never sent in full again
+    because of an interruption.
+    
+    The API base URL is configurable (``upload.base_url``) so the uploader can
+    be pointed at a local stand-in server.
+    """
+    
+    # Chunks must be a multiple of 256 KiB, except for the last one
+    CHUNK_GRANULARITY = 256 * 1024
+    
+    # Seconds between size checks of a file that is still being written
+    GROWING_POLL_INTERVAL = 0.5
+    
+    # Responses worth retrying after a pause
+    RETRIABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+    
+    # Error reasons of 403 responses: short-term rate limits are retried, while
+    # an exhausted daily quota only clears when the quota resets
+    RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+    QUOTA_REASONS = ("quotaExceeded", "dailyLimitExceeded", "uploadLimitExceeded")
+    
+    def __init__(self, config, db, token_provider=None, throttle=None):
+        """
+        Initialize the uploader.
+        
+        Args:
+            config: Application configuration manager
+            db: Database manager storing the upload sessions
+            token_provider: Function taking a channel ID and returning an OAuth
+                            access token (defaults to the channel's ``access_token``
+                            setting)
+            throttle: Function taking a chunk size and the cancel event, which
+                      returns once the chunk may be sent (optional)
+        """
+        self.config = config
+        self.db = db
+        self.token_provider = token_provider or self._configured_token
+        self.throttle = throttle
+    
+    @property
+    def chunk_size(self):
+        """Bytes sent per request, rounded down to the chunk granularity"""
+        chunk_size = int(float(self.config.get("upload.chunk_size_mb", 8)) * 1024 * 1024)
+        return max(chunk_size // self.CHUNK_GRANULARITY, 1) * self.CHUNK_GRANULARITY
+    
+    def upload(self, filepath, metadata, video_id=None, channel_id=None, progress_callback=None,
+               cancel_event=None):
+        """
+        Upload a video, resuming an earlier session for the same file if there is one.
+        
+        Args:
+            filepath: Path to the video file
+            metadata: Dictionary with title, description, tags, category_id,
+                      privacy_status and publish_at (see video_metadata)
+            video_id: Database ID of the video, used to store the session (optional)
+            channel_id: YouTube channel ID used to get the access token (optional)
+            progress_callback: Callback receiving (bytes_uploaded, total_bytes) (optional)
+            cancel_event: threading.Event that stops the upload between chunks (optional)
+        
+        Returns:
+            dict: The uploaded video resource returned by the API, including its ``id``
+        
+        Raises:
+            UploadError: If the upload failed and retrying won't help
+            UploadCancelled: If the cancel event was set; the session is kept
+        """
+        if not os.path.exists(filepath):
+            raise UploadError(f"Video file not found: {filepath}")
+        
+        total = os.path.getsize(filepath)
+        token = self.token_provider(channel_id)
+        if not token:
+            raise UploadError(f"No access token configured for channel {channel_id or '(none)'}")
+        
+        # A session is only reused for the exact same file contents
+        stat = os.stat(filepath)
+        file_signature = f"{os.path.abspath(filepath)}:{stat.st_size}:{stat.st_mtime_ns}"
+        
+        session_uri = None
+        offset = 0
+        if video_id is not None:
+            session = self.db.get_upload_session(video_id)
+            if session and session["session_uri"] and session["upload_file"] == file_signature:
+                session_uri = session["session_uri"]
+                status = self._with_retries(lambda: self._query_status(session_uri, total, token), cancel_event)
+                if status is None:
+                    print(f"Upload session for video {video_id} expired, starting over")
+                    session_uri = None
+                elif isinstance(status, dict):
+                    return status  # The last chunk made it before the interruption
+                else:
+                    offset = status
+                    print(f"Resuming upload of {os.path.basename(filepath)} at byte {offset} of {total}")
+        
+        if session_uri is None:
+            session_uri = self._with_retries(lambda: self._create_session(metadata, total, token), cancel_event)
+            if video_id is not None:
+                self.db.save_upload_session(video_id, session_uri, file_signature, total)
+        
+        if progress_callback:
+            progress_callback(offset, total)
+        
+        with open(filepath, "rb") as f:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise UploadCancelled("Upload was cancelled")
+                
+                f.seek(offset)
+                chunk = f.read(self.chunk_size)
+                
+                if self.throttle is not None:
+                    self.throttle(len(chunk), cancel_event)
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise UploadCancelled("Upload was cancelled")
+                result = self._with_retries(
+                    lambda: self._send_chunk(session_uri, chunk, offset, total, token),
+                    cancel_event,
+                    # After a failed chunk the server may have kept part of it
+                    recover=lambda: self._query_status(session_uri, total, token)
+                )
+                
+                if result is None:
+                    # The session expired between the failure and the status check
+                    if video_id is not None:
+                        self.db.clear_upload_session(video_id)
+                    raise UploadError("Upload session expired, the next attempt starts over")
+                
+                if isinstance(result, dict):
+                    if progress_callback:
+                        progress_callback(total, total)
+                    return result
+                
+                offset = result
+                if video_id is not None:
+                    self.db.update_upload_progress(video_id, offset)
+                if progress_callback:
+                    progress_callback(offset, total)
+    
+    def upload_growing(self, filepath, metadata, complete_event, video_id=None, channel_id=None,
+                       progress_callback=None, cancel_event=None):
+        """
+        Upload a file while another thread or process is still writing it.
+        
+        The file must only ever be appended to, like fragmented MP4. Full chunks
+        are sent as soon as they are on disk with the total size left open, and
+        the size is declared with the last chunk once complete_event is set.
+        
+        The session is stored for progress reporting, but it can't be resumed
+        by upload(), since the file it was started for was still changing.
+        
+        Args:
+            filepath: Path to the file being written
+            metadata: Upload metadata (see video_metadata)
+            complete_event: threading.Event set once the file is complete
+            video_id: Database ID of the video, used to store the session (optional)
+            channel_id: YouTube channel ID used to get the access token (optional)
+            progress_callback: Callback receiving (bytes_uploaded, total_bytes or None) (optional)
+            cancel_event: threading.Event that stops the upload, e.g. because the
+                          writer failed (optional)
+        
+        Returns:
+            dict: The uploaded video resource returned by the API, including its ``id``
+        
+        Raises:
+            UploadError: If the upload failed and retrying won't help
+            UploadCancelled: If the cancel event was set
+        """
+        token = self.token_provider(channel_id)
+        if not token:
+            raise UploadError(f"No access token configured for channel {channel_id or '(none)'}")
+        
+        def check_cancelled():
+            if cancel_event is not None and cancel_event.is_set():
+                raise UploadCancelled("Upload was cancelled")
+        
+        # The writer may not have created the file yet
+        while not os.path.exists(filepath):
+            check_cancelled()
+            if complete_event.wait(self.GROWING_POLL_INTERVAL) and not os.path.exists(filepath):
+                raise UploadError(f"Video file not found: {filepath}")
+        
+        session_uri = self._with_retries(lambda: self._create_session(metadata, None, token), cancel_event)
+        if video_id is not None:
+            self.db.save_upload_session(video_id, session_uri, f"{os.path.abspath(filepath)}:streaming", None)
+        
+        chunk_size = self.chunk_size
+        offset = 0
+        with open(filepath, "rb") as f:
+            while True:
+                check_cancelled()
+                
+                # Checked before the size, so a set event means the size is final;
+                # a writer that failed cancels before it completes
+                complete = complete_event.is_set()
+                check_cancelled()
+                size = os.fstat(f.fileno()).st_size
+                if not complete and size - offset < chunk_size:
+                    complete_event.wait(self.GROWING_POLL_INTERVAL)
+                    continue
+                
+                total = size if complete else "*"
+                f.seek(offset)
+                chunk = f.read(chunk_size)
+                
+                if chunk and self.throttle is not None:
+                    self.throttle(len(chunk), cancel_event)
+                    check_cancelled()
+                
+                if chunk:
+                    send = lambda: self._send_chunk(session_uri, chunk, offset, total, token)
+                else:
+                    # Everything was sent before the size was known; declaring it finishes the upload
+                    send = lambda: self._query_status(session_uri, total, token)
+                result = self._with_retries(
+                    send,
+                    cancel_event,
+                    recover=lambda: self._query_status(session_uri, total, token)
+                )
+                
+                if result is None:
+                    if video_id is not None:
+                        self.db.clear_upload_session(video_id)
+                    raise UploadError("Upload session expired while streaming")
+                
+                if isinstance(result, dict):
+                    if progress_callback:
+                        progress_callback(size, size)
+                    return result
+                
+                offset = result
+                if video_id is not None:
+                    self.db.update_upload_progress(video_id, offset)
+                if progress_callback:
+                    progress_callback(offset, size if complete else None)
+    
+    def video_metadata(self, video):
+        """
+        Build upload metadata from a database row.
+        
+        Args:
+            video: Row from get_videos_ready_for_upload or get_video_for_upload
+        
+        Returns:
+            dict: Metadata for upload()
+        """
+        tags = video.get("tags") or ""
+        return {
+            "title": video.get("meta_title") or video.get("title") or os.path.splitext(video["filename"])[0],
+            "description": video.get("description") or "",
+            "tags": [tag.strip() for tag in tags.split(",") if tag.strip()],
+            "category_id": video.get("category_id"),
+            "privacy_status": video.get("privacy_status") or "private",
+            "publish_at": video.get("publish_at")
+        }
+    
+    def _create_session(self, metadata, total, token):
+        """Start a resumable upload session and return its URI (total may be None if not known yet)"""
+        base_url = self.config.get("upload.base_url", "https://www.googleapis.com").rstrip("/")
+        url = f"{base_url}/upload/youtube/v3/videos?" + urllib.parse.urlencode({
+            "uploadType": "resumable",
+            "part": "snippet,status"
+        })
+        
+        snippet = {
+            "title": metadata["title"][:100],  # YouTube's title limit
+            "description": metadata.get("description") or "",
+            "tags": metadata.get("tags") or []
+        }
+        if metadata.get("category_id"):
+            snippet["categoryId"] = str(metadata["category_id"])
+        
+        status = {
+            "privacyStatus": metadata.get("privacy_status") or "private",
+            "selfDeclaredMadeForKids": False
+        }
+        if metadata.get("publish_at"):
+            # Scheduled publishing requires the video to start out private
+            status["privacyStatus"] = "private"
+            status["publishAt"] = metadata["publish_at"]
+        
+        request = urllib.request.Request(
+            url,
+            data=json.dumps({"snippet": snippet, "status": status}).encode("utf-8"),
+            method="POST",
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json; charset=UTF-8",
+                "X-Upload-Content-Type": "video/*"
+            }
+        )
+        if total is not None:
+            request.add_header("X-Upload-Content-Length", str(total))
+        with self._open(request) as response:
+            session_uri = response.headers.get("Location")
+        if not session_uri:
+            raise UploadError("Upload session response has no Location header")
+        return session_uri
+    
+    def _send_chunk(self, session_uri, chunk, offset, total, token):
+        """
+        Send one chunk of the file.
+        
+        Returns:
+            The video resource (dict) when the upload is complete, otherwise the
+            offset of the next byte the server expects
+        """
+        end = offset + len(chunk) - 1
+        request = urllib.request.Request(
+            session_uri,
+            data=chunk,
+            method="PUT",
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Content-Length": str(len(chunk)),
+                "Content-Range": f"bytes {offset}-{end}/{total}"
+            }
+        )
+        return self._upload_response(request)
+    
+    def _query_status(self, session_uri, total, token):
+        """
+        Ask the server how much of the file it has.
+        
+        Returns:
+            The video resource (dict) if the upload already completed, the offset
+            of the next byte to send, or None if the session no longer exists.
+            A total of "*" asks without declaring the size.
+        """
+        request = urllib.request.Request(
+            session_uri,
+            data=b"",
+            method="PUT",
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Content-Length": "0",
+                "Content-Range": f"bytes */{total}"
+            }
+        )
+        try:
+            return self._upload_response(request)
+        except UploadError as e:
+            if getattr(e, "status", None) in (404, 410):
+                return None
+            raise
+    
+    def _upload_response(self, request):
+        """Send an upload request and interpret a completed or incomplete response"""
+        try:
+            with self._open(request) as response:
+                return json.loads(response.read().decode("utf-8") or "{}")
+        except _ResumeIncomplete as incomplete:
+            # "Range: bytes=0-N" lists what was received; no header means nothing was
+            received = incomplete.headers.get("Range")
+            if not received:
+                return 0
+            return int(received.rsplit("-", 1)[1]) + 1
+    
+    def _open(self, request):
+        """
+        Open a request, sorting HTTP errors into retriable and fatal ones.
+        
+        Raises:
+            _ResumeIncomplete: For 308 responses, which report upload progress
+            _RetriableError: For server errors and network failures
+            QuotaExceeded: When the daily quota is used up
+            UploadError: For other errors
+        """
+        timeout = self.config.get("upload.timeout", 60)
+        try:
+            return urllib.request.build_opener(_NoRedirect).open(request, timeout=timeout)
+        except urllib.error.HTTPError as e:
+            if e.code == 308:
+                raise _ResumeIncomplete(e.headers)
+            body = e.read().decode("utf-8", "replace")[:500]
+            if e.code in self.RETRIABLE_STATUS_CODES:
+                raise _RetriableError(f"HTTP {e.code}: {body}")
+            if e.code == 403 and any(reason in body for reason in self.RATE_LIMIT_REASONS):
+                raise _RetriableError(f"Rate limited: {body}")
+            if e.code == 403 and any(reason in body for reason in self.QUOTA_REASONS):
+                raise QuotaExceeded(f"API quota exceeded: {body}")
+            error = UploadError(f"Upload request failed with HTTP {e.code}: {body}")
+            error.status = e.code
+            raise error
+        except (urllib.error.URLError, OSError) as e:
+            raise _RetriableError(str(e))
+    
+    def _with_retries(self, action, cancel_event=None, recover=None):
+        """
+        Run a request, retrying retriable failures with exponential backoff.
+        
+        Args:
+            action: Function performing the request
+            cancel_event: threading.Event that aborts waiting (optional)
+            recover: Function run instead of the action after a failure; its result
+                     is returned if it succeeds (optional)
+        """
+        max_retries = int(self.config.get("upload.max_retries", 8))
+        attempt = 0
+        while True:
+            try:
+                return action() if attempt == 0 or recover is None else recover()
+            except _RetriableError as e:
+                attempt += 1
+                if attempt > max_retries:
+                    raise UploadError(f"Upload failed after {max_retries} retries: {e}")
+                
+                delay = min(2 ** attempt, 64) + random.random()
+                print(f"Upload request failed ({e}), retrying in {delay:.0f}s")
+                if cancel_event is not None:
+                    if cancel_event.wait(delay):
+                        raise UploadCancelled("Upload was cancelled")
+                else:
+                    time.sleep(delay)
+    
+    def _configured_token(self, channel_id):
+        """Access token from the channel's settings"""
+        channel = self.config.get("channels", {}).get(channel_id) if channel_id else None
+        return (channel or {}).get("access_token") or self.config.get("upload.access_token")
+
+class _ResumeIncomplete(Exception):
+    """A 308 response to an upload request; carries the response headers"""
+    
+    def __init__(self, headers):
+        super().__init__("Resume Incomplete")
+        self.headers = headers
+
+class _RetriableError(Exception):
+    """A failure that may go away when the request is repeated"""
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Reports 308 Resume Incomplete as an error instead of following it"""
+    
+    def http_error_308(self, req, fp, code, msg, headers):
+        raise urllib.error.HTTPError(req.full_url, code, msg, headers, fp)